@@ -0,0 +1,100 @@
+"""
+Sentence-alignment benchmark: greedy one-pass matcher vs banded DP aligner.
+
+Documents are synthetic parallel texts with known sentence correspondence.
+English sentence lengths follow the Gale-Church model (proportional to the
+Bengali length, variance growing with it), and documents are perturbed
+with English-side splits (1:2), merges (2:1) and sentences missing on
+either side, which is what translated news articles look like.
+
+    python benchmarks/bench_align.py --docs 300 --sentences 40
+"""
+import argparse
+import math
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from processing.alignment import ALIGN_CONFIG, align_greedy, align_sentences
+from benchmarks.fixtures import BN_WORDS, EN_WORDS
+
+VARIANCE = ALIGN_CONFIG['variance']
+
+
+def synthetic_document(sentences: int, rng: random.Random, noise: float = 0.15):
+    """Return (bn_sents, en_sents, gold), gold being the set of correct (bn, en) pairs"""
+    bn_sents, en_sents, gold = [], [], set()
+
+    def sentence(words, k):
+        return ' '.join(rng.choice(words) for _ in range(k))
+
+    def translation(bn):
+        target = len(bn) + rng.gauss(0, math.sqrt(VARIANCE * len(bn)))
+        words = [rng.choice(EN_WORDS)]
+        while len(' '.join(words)) < target:
+            words.append(rng.choice(EN_WORDS))
+        return ' '.join(words)
+
+    for _ in range(sentences):
+        bn = sentence(BN_WORDS, rng.randint(5, 25))
+        en = translation(bn)
+        kind = rng.random()
+        if kind < noise / 3 and ' ' in en:
+            # Translator split the sentence in two
+            half = en.split(' ')
+            cut = max(1, len(half) // 2)
+            en_parts = [' '.join(half[:cut]), ' '.join(half[cut:])]
+            bn_sents.append(bn)
+            en_sents.extend(en_parts)
+            gold.add((bn, ' '.join(en_parts)))
+        elif kind < 2 * noise / 3:
+            # Two Bengali sentences rendered as one
+            extra = sentence(BN_WORDS, rng.randint(5, 15))
+            en = f"{en} {translation(extra)}"
+            bn_sents.extend([bn, extra])
+            en_sents.append(en)
+            gold.add((f"{bn} {extra}", en))
+        elif kind < noise:
+            # Sentence present on one side only
+            (bn_sents if rng.random() < 0.5 else en_sents).append(bn if rng.random() < 0.5 else en)
+        else:
+            bn_sents.append(bn)
+            en_sents.append(en)
+            gold.add((bn, en))
+    return bn_sents, en_sents, gold
+
+
+def score(aligner, documents):
+    found = correct = gold_total = 0
+    start = time.perf_counter()
+    outputs = [aligner(bn, en) for bn, en, _ in documents]
+    elapsed = time.perf_counter() - start
+    for pairs, (_, _, gold) in zip(outputs, documents):
+        found += len(pairs)
+        correct += sum(1 for pair in pairs if pair in gold)
+        gold_total += len(gold)
+    return elapsed, found, correct, gold_total
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark sentence alignment')
+    parser.add_argument('--docs', '-n', type=int, default=300)
+    parser.add_argument('--sentences', '-s', type=int, default=40)
+    parser.add_argument('--noise', type=float, default=0.15,
+                        help='share of sentences that are split, merged or dropped')
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    documents = [synthetic_document(args.sentences, rng, args.noise) for _ in range(args.docs)]
+
+    print(f"{'aligner':<8} {'ms/doc':>8} {'pairs':>7} {'correct':>8} {'recall':>7} {'precision':>10}")
+    for name, aligner in (('greedy', align_greedy), ('dp', align_sentences)):
+        elapsed, found, correct, gold_total = score(aligner, documents)
+        print(f"{name:<8} {elapsed / args.docs * 1000:8.2f} {found:7d} {correct:8d} "
+              f"{correct / gold_total:7.1%} {correct / max(found, 1):10.1%}")
+
+
+if __name__ == '__main__':
+    main()
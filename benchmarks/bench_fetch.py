@@ -0,0 +1,95 @@
+"""
+Fetch throughput benchmark: serial requests.get vs AsyncFetcher.
+
+Serves a synthetic article page from a local threaded HTTP server with a
+fixed per-request latency, so the numbers reflect round-trip overlap rather
+than the speed of any real outlet.
+
+    python benchmarks/bench_fetch.py --requests 200 --latency 0.05
+"""
+import argparse
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from scrapers.fetcher import AsyncFetcher
+
+PAGE = ('<html lang="bn"><body><h1 class="title">শিরোনাম</h1>'
+        + '<div class="story-element">' + '<p>বাংলা অনুচ্ছেদ।</p>' * 50 + '</div>'
+        + '</body></html>').encode('utf-8')
+
+
+def make_handler(latency: float):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            time.sleep(latency)
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(PAGE)))
+            self.end_headers()
+            self.wfile.write(PAGE)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def bench_serial(urls):
+    for url in urls:
+        requests.get(url).text
+
+
+def bench_session(urls):
+    with requests.Session() as session:
+        for url in urls:
+            session.get(url).text
+
+
+def bench_async(urls, concurrency, per_host):
+    AsyncFetcher(concurrency=concurrency, per_host=per_host).fetch_all(urls)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark page fetching')
+    parser.add_argument('--requests', '-n', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0.05,
+                        help='Simulated server latency in seconds')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--per-host', type=int, default=16)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(args.latency))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    urls = [f"{base}/bn/article/{i}" for i in range(args.requests)]
+
+    results = {}
+    for name, run in [
+        ('serial requests.get', lambda: bench_serial(urls)),
+        ('serial Session', lambda: bench_session(urls)),
+        (f'AsyncFetcher x{args.concurrency}',
+         lambda: bench_async(urls, args.concurrency, args.per_host)),
+    ]:
+        start = time.perf_counter()
+        run()
+        results[name] = time.perf_counter() - start
+
+    server.shutdown()
+    baseline = results['serial requests.get']
+    print(f"{'path':<24} {'seconds':>8} {'pages/s':>8} {'speedup':>8}")
+    for name, elapsed in results.items():
+        print(f"{name:<24} {elapsed:8.2f} {args.requests / elapsed:8.1f} "
+              f"{baseline / elapsed:7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Quality-filter benchmark: per-pair langdetect loop vs batched filter_pairs.
+
+    python benchmarks/bench_filter.py --pairs 2000
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+from langdetect import DetectorFactory, LangDetectException, detect
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from dataset.filters import filter_pairs
+from benchmarks.fixtures import BN_WORDS, EN_WORDS
+
+
+def synthetic_pairs(n: int, seed: int = 0):
+    """Mostly clean pairs, plus short, swapped and mixed-script ones"""
+    rng = random.Random(seed)
+
+    def sentence(words, k):
+        return ' '.join(rng.choice(words) for _ in range(k))
+
+    pairs = []
+    for _ in range(n):
+        k = rng.randint(6, 20)
+        bn, en = sentence(BN_WORDS, k), sentence(EN_WORDS, k)
+        kind = rng.random()
+        if kind < 0.05:
+            bn, en = bn[:10], en[:10]
+        elif kind < 0.10:
+            bn, en = en, bn
+        elif kind < 0.20:
+            bn = f"{bn} {sentence(EN_WORDS, k // 2)}"
+        pairs.append({'bn': bn, 'en': en, 'source': 'bench', 'url': '', 'date': ''})
+    return pairs
+
+
+def legacy_filter(pairs):
+    """The per-pair loop DatasetBuilder used before filter_pairs"""
+    filtered = []
+    for pair in pairs:
+        bn, en = pair['bn'], pair['en']
+        if len(bn) < 20 or len(en) < 20:
+            continue
+        ratio = len(bn) / len(en) if len(en) > 0 else 0
+        if not (0.5 <= ratio <= 3.0):
+            continue
+        try:
+            if not (detect(bn) == 'bn' and detect(en) == 'en'):
+                continue
+        except LangDetectException:
+            pass
+        filtered.append(pair)
+    return filtered
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark quality filtering')
+    parser.add_argument('--pairs', '-n', type=int, default=2000)
+    parser.add_argument('--workers', '-w', type=int, default=None)
+    args = parser.parse_args()
+
+    DetectorFactory.seed = 0
+    pairs = synthetic_pairs(args.pairs)
+
+    start = time.perf_counter()
+    legacy = legacy_filter(pairs)
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    kept, rejected = filter_pairs(pd.DataFrame(pairs), workers=args.workers)
+    batched_time = time.perf_counter() - start
+
+    print(f"{'filter':<10} {'seconds':>8} {'kept':>7} {'pairs/s':>10}")
+    print(f"{'legacy':<10} {legacy_time:8.2f} {len(legacy):7d} {args.pairs / legacy_time:10.0f}")
+    print(f"{'batched':<10} {batched_time:8.2f} {len(kept):7d} {args.pairs / batched_time:10.0f}")
+    print(f"speedup {legacy_time / batched_time:.1f}x; rejected: {dict(rejected)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Per-page extraction CPU benchmark across parser backends.
+
+Runs every source's extract_article over its saved page (see fixtures.py)
+with the network taken out, once per parser configuration.
+
+    python benchmarks/bench_parse.py --repeat 20
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from scrapers.config import NEWS_SOURCES
+from scrapers.news_scraper import NewsScraper
+from benchmarks.fixtures import load_pages
+
+CONFIGS = [
+    ('html.parser full', 'html.parser', False),
+    ('html.parser subtree', 'html.parser', True),
+    ('lxml full', 'lxml', False),
+    ('lxml subtree', 'lxml', True),
+    ('lxml-native', 'lxml-native', False),
+]
+
+
+def time_extraction(source: str, html: str, parser: str, subtree: bool, repeat: int):
+    """Return (seconds per page, extracted article) for one configuration"""
+    scraper = NewsScraper(NEWS_SOURCES[source], parser=parser, subtree=subtree)
+    url = f"{NEWS_SOURCES[source]['base_url']}/bn/bench"
+    article = None
+    start = time.perf_counter()
+    for _ in range(repeat):
+        scraper._prefetched[url] = html
+        article = scraper.extract_article(url)
+    return (time.perf_counter() - start) / repeat, article
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark article extraction')
+    parser.add_argument('--repeat', '-r', type=int, default=20)
+    args = parser.parse_args()
+
+    pages = load_pages('bn')
+    print(f"{'source':<14}" + ''.join(f"{name:>21}" for name, _, _ in CONFIGS))
+    totals = [0.0] * len(CONFIGS)
+    for source, html in pages.items():
+        row, reference = [], None
+        for i, (name, backend, subtree) in enumerate(CONFIGS):
+            seconds, article = time_extraction(source, html, backend, subtree, args.repeat)
+            if reference is None:
+                reference = article
+            elif article != reference:
+                raise SystemExit(f"{source}: {name} extracted different content")
+            totals[i] += seconds
+            row.append(seconds)
+        print(f"{source:<14}" + ''.join(f"{s * 1000:18.2f} ms" for s in row))
+
+    print(f"{'speedup':<14}" + ''.join(f"{totals[0] / t:20.1f}x" for t in totals))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,221 @@
+"""
+Stage-by-stage pipeline benchmark with stored results and regression checks.
+
+Times each stage on its own at several corpus sizes, all offline:
+
+    extract  NewsScraper.extract_article over the saved pages (fixtures.py)
+    clean    DatasetBuilder._clean_text and _split_sentences on article bodies
+    align    DatasetBuilder._align_paragraphs on synthetic parallel articles
+    filter   DatasetBuilder._apply_quality_filters on synthetic sentence pairs
+    build    DatasetBuilder.build_huggingface_dataset over a filled pair store
+
+Every run is appended to benchmarks/results/history.jsonl. With a baseline
+present (written by --update-baseline) any stage that got slower per item
+by more than --tolerance is reported and the script exits non-zero.
+
+    python benchmarks/bench_pipeline.py --sizes 10,100,500
+    python benchmarks/bench_pipeline.py --update-baseline
+"""
+import argparse
+import json
+import logging
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from scrapers.config import NEWS_SOURCES
+from scrapers.news_scraper import NewsScraper
+from dataset.dataset_builder import DatasetBuilder
+from benchmarks.bench_align import synthetic_document
+from benchmarks.bench_filter import synthetic_pairs
+from benchmarks.fixtures import load_pages
+
+RESULTS_DIR = Path(__file__).resolve().parent / 'results'
+STAGES = ('extract', 'clean', 'align', 'filter', 'build')
+SENTENCES_PER_ARTICLE = 30
+
+
+def synthetic_articles(n: int, seed: int = 0) -> List[Dict]:
+    """n parallel (bn, en) article pairs spread over the configured sources"""
+    rng = random.Random(seed)
+    sources = list(NEWS_SOURCES)
+    articles = []
+    for i in range(n):
+        bn_sents, en_sents, _ = synthetic_document(SENTENCES_PER_ARTICLE, rng)
+        base_url = NEWS_SOURCES[sources[i % len(sources)]]['base_url']
+        articles.append((
+            {'url': f"{base_url}/bn/bench/{i}", 'content': '। '.join(bn_sents) + '।'},
+            {'url': f"{base_url}/en/bench/{i}", 'content': '. '.join(en_sents) + '.'},
+        ))
+    return articles
+
+
+def bench_extract(size: int) -> Callable[[], None]:
+    pages = list(load_pages('bn').items())
+    scrapers = {source: NewsScraper(NEWS_SOURCES[source]) for source, _ in pages}
+
+    def run():
+        for i in range(size):
+            source, html = pages[i % len(pages)]
+            scraper = scrapers[source]
+            url = f"{NEWS_SOURCES[source]['base_url']}/bn/bench/{i}"
+            scraper._prefetched[url] = html
+            scraper.extract_article(url)
+    return run
+
+
+def bench_clean(size: int) -> Callable[[], None]:
+    texts = [text['content'] for pair in synthetic_articles(size) for text in pair]
+
+    def run():
+        for text in texts:
+            DatasetBuilder._split_sentences(DatasetBuilder._clean_text(text))
+    return run
+
+
+def bench_align(size: int) -> Callable[[], None]:
+    articles = synthetic_articles(size)
+
+    def run():
+        for bn_article, en_article in articles:
+            DatasetBuilder._align_paragraphs(bn_article['content'], en_article['content'])
+    return run
+
+
+def bench_filter(size: int, workspace: Path) -> Callable[[], None]:
+    # Filtering sees sentence pairs, so scale the input by the sentences in an article
+    pairs = synthetic_pairs(size * SENTENCES_PER_ARTICLE)
+    builder = DatasetBuilder(str(workspace / 'filter'))
+
+    def run():
+        builder._apply_quality_filters(pairs)
+    return run
+
+
+def bench_build(size: int, workspace: Path) -> Callable[[], None]:
+    builder = DatasetBuilder(str(workspace / 'build'))
+    for bn_article, en_article in synthetic_articles(size):
+        builder.add_article_pair(bn_article, en_article)
+
+    def run():
+        builder.build_huggingface_dataset()
+    return run
+
+
+def measure(run: Callable[[], None], repeat: int) -> float:
+    """Best wall time over repeat runs, the least noisy estimate of cost"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_suite(sizes: List[int], stages: List[str], repeat: int) -> List[Dict]:
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            for stage in stages:
+                workspace = Path(tmp) / f"{stage}-{size}"
+                if stage == 'extract':
+                    run = bench_extract(size)
+                elif stage == 'clean':
+                    run = bench_clean(size)
+                elif stage == 'align':
+                    run = bench_align(size)
+                elif stage == 'filter':
+                    run = bench_filter(size, workspace)
+                else:
+                    run = bench_build(size, workspace)
+                seconds = measure(run, repeat)
+                results.append({'stage': stage, 'size': size, 'seconds': seconds,
+                                'per_item_ms': seconds / size * 1000})
+                print(f"{stage:<8} {size:>6} {seconds:10.3f} s {seconds / size * 1000:10.3f} ms/article")
+    return results
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True, cwd=Path(__file__).resolve().parent).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: List[Dict], baseline: List[Dict], tolerance: float) -> List[str]:
+    """Describe every stage and size whose per-item time exceeds baseline * (1 + tolerance)"""
+    reference = {(r['stage'], r['size']): r['per_item_ms'] for r in baseline}
+    regressions = []
+    for result in results:
+        before = reference.get((result['stage'], result['size']))
+        if before and result['per_item_ms'] > before * (1 + tolerance):
+            regressions.append(f"{result['stage']} at {result['size']} articles: "
+                               f"{before:.3f} -> {result['per_item_ms']:.3f} ms/article "
+                               f"(+{result['per_item_ms'] / before - 1:.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark every pipeline stage')
+    parser.add_argument('--sizes', default='10,100,500',
+                        help='Comma-separated corpus sizes in article pairs')
+    parser.add_argument('--stages', default=','.join(STAGES))
+    parser.add_argument('--repeat', '-r', type=int, default=3)
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='Allowed slowdown per item against the baseline')
+    parser.add_argument('--results-dir', default=str(RESULTS_DIR))
+    parser.add_argument('--update-baseline', action='store_true',
+                        help='Store this run as the baseline instead of comparing against it')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    stages = [stage for stage in args.stages.split(',') if stage]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(sorted(unknown))}")
+
+    print(f"{'stage':<8} {'size':>6} {'total':>12} {'per article':>18}")
+    results = run_suite(sizes, stages, args.repeat)
+
+    results_dir = Path(args.results_dir)
+    results_dir.mkdir(parents=True, exist_ok=True)
+    run = {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'results': results,
+    }
+    with open(results_dir / 'history.jsonl', 'a', encoding='utf-8') as fp:
+        fp.write(json.dumps(run) + '\n')
+
+    baseline_path = results_dir / 'baseline.json'
+    if args.update_baseline:
+        baseline_path.write_text(json.dumps(run, indent=2), encoding='utf-8')
+        print(f"Baseline written to {baseline_path}")
+        return
+    if not baseline_path.exists():
+        print(f"No baseline at {baseline_path}; run with --update-baseline to create one")
+        return
+
+    regressions = compare(results, json.loads(baseline_path.read_text(encoding='utf-8'))['results'],
+                          args.tolerance)
+    if regressions:
+        print(f"REGRESSIONS against baseline (tolerance {args.tolerance:.0%}):")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+    print("No regressions against baseline")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Cold-start benchmark for the bangla-scrape CLI.
+
+Each case runs in a fresh interpreter and times importing main.py, parsing
+a command line and importing what that command needs before it starts
+work. A case fails when its median time is over STARTUP_BUDGET or when it
+loaded a module it has no use for; the script then exits non-zero, so it
+can gate CI.
+
+    python benchmarks/bench_startup.py --runs 5
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Dependencies only the build, validate, dedup and upload commands need
+HEAVY = ('pandas', 'datasets', 'pyarrow', 'tqdm', 'langdetect')
+
+# case: (code run after `import main`, median seconds allowed, modules it must not load)
+STARTUP_BUDGET = {
+    'help': ("try:\n"
+             "    main.parse_args(['--help'])\n"
+             "except SystemExit:\n"
+             "    pass",
+             0.25, HEAVY + ('numpy', 'aiohttp', 'requests', 'bs4')),
+    'scrape': ("main.parse_args(['scrape', '--max-articles', '10'])\n"
+               "from scraping.coordinator import ScrapingCoordinator\n"
+               "from scraping.queue_worker import run_worker",
+               1.5, HEAVY),
+}
+
+_CHILD = '''
+import json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {root!r})
+import main
+{code}
+print(json.dumps({{'seconds': time.perf_counter() - start,
+                  'loaded': [m for m in {modules!r} if m in sys.modules]}}))
+'''
+
+
+def measure(code: str, modules, runs: int):
+    """Median seconds over runs fresh interpreters, and the listed modules they loaded"""
+    times, loaded = [], set()
+    for _ in range(runs):
+        child = _CHILD.format(root=str(ROOT), code=code, modules=tuple(modules))
+        output = subprocess.run([sys.executable, '-c', child], cwd=str(ROOT), check=True,
+                                capture_output=True, text=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        times.append(result['seconds'])
+        loaded.update(result['loaded'])
+    return statistics.median(times), sorted(loaded)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark CLI cold start')
+    parser.add_argument('--runs', '-n', type=int, default=5)
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'case':<8} {'median s':>9} {'budget s':>9}  unwanted modules")
+    for case, (code, budget, forbidden) in STARTUP_BUDGET.items():
+        seconds, loaded = measure(code, forbidden, args.runs)
+        over = seconds > budget or bool(loaded)
+        failed |= over
+        print(f"{case:<8} {seconds:9.3f} {budget:9.2f}  {', '.join(loaded) or '-'}"
+              + ("  OVER BUDGET" if over else ""))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
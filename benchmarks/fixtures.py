@@ -0,0 +1,125 @@
+"""
+Saved article pages for offline benchmarks.
+
+Pages recorded into benchmarks/fixtures/<source>.<lang>.html are used as-is. For
+sources without a recording, a synthetic page is generated that carries the
+source's real selectors inside the boilerplate a news site ships around an
+article: inline scripts, navigation, teaser grids and a footer.
+
+Record a live article page for a source (English page optional):
+
+    python benchmarks/fixtures.py prothomalo <bengali article url> [<english article url>]
+"""
+import argparse
+import random
+import sys
+from pathlib import Path
+from typing import Dict
+
+import requests
+
+FIXTURE_DIR = Path(__file__).resolve().parent / 'fixtures'
+
+# (title, date, body container) markup per source, matching the scrapers
+PAGE_LAYOUTS = {
+    'prothomalo': ('<h1 class="title">{title}</h1>',
+                   '<time datetime="2023-03-01T10:00:00+06:00">১ মার্চ ২০২৩</time>',
+                   'div', 'story-element'),
+    'ittefaq': ('<h2 class="title-news">{title}</h2>',
+                '<div class="news-time">১ মার্চ ২০২৩</div>',
+                'div', 'dtl-news-txt'),
+    'banglatribune': ('<h1 class="title">{title}</h1>',
+                      '<div class="time">১ মার্চ ২০২৩</div>',
+                      'div', 'article-details'),
+    'bdpratidin': ('<h2 class="news-title">{title}</h2>',
+                   '<span class="time">১ মার্চ ২০২৩</span>',
+                   'div', 'news-details'),
+    'janakantha': ('<h1 class="news-title">{title}</h1>',
+                   '<span class="date">১ মার্চ ২০২৩</span>',
+                   'div', 'news-content'),
+    'jaijaidin': ('<h2 class="article-title">{title}</h2>',
+                  '<div class="publish-date">১ মার্চ ২০২৩</div>',
+                  'div', 'article-text'),
+}
+
+BN_WORDS = ('বাংলাদেশ সরকার আজ নতুন প্রকল্প ঘোষণা করেছে এবং দেশের অর্থনীতি '
+            'আগামী বছর আরও শক্তিশালী হবে বলে মন্ত্রী জানিয়েছেন').split()
+EN_WORDS = ('the government of bangladesh announced a new project today and the '
+            'minister said the economy will grow stronger next year').split()
+
+
+def _sentence(rng: random.Random, words, end: str) -> str:
+    return ' '.join(rng.choice(words) for _ in range(rng.randint(8, 20))) + end
+
+
+def synthetic_page(source: str, lang: str = 'bn', paragraphs: int = 20,
+                   teasers: int = 120, seed: int = 0) -> str:
+    """Build a full article page for source in the given language"""
+    rng = random.Random(f"{source}-{lang}-{seed}")
+    words, end = (BN_WORDS, '। ') if lang == 'bn' else (EN_WORDS, '. ')
+    title_html, date_html, tag, container = PAGE_LAYOUTS[source]
+
+    script = '<script>window.__STATE__ = {%s};</script>' % ','.join(
+        f'"k{i}": "{"x" * 40}"' for i in range(200))
+    nav = '<nav class="menu"><ul>' + ''.join(
+        f'<li class="menu-item"><a href="/section/{i}">{rng.choice(words)}</a></li>'
+        for i in range(80)) + '</ul></nav>'
+    grid = '<div class="teaser-grid">' + ''.join(
+        f'<div class="card"><a class="link" href="/{lang}/news/{i}">'
+        f'<span class="headline">{_sentence(rng, words, "")}</span></a>'
+        f'<p class="summary">{_sentence(rng, words, end)}</p></div>'
+        for i in range(teasers)) + '</div>'
+    body = f'<{tag} class="{container}">' + ''.join(
+        '<p>' + ''.join(_sentence(rng, words, end) for _ in range(rng.randint(2, 4))) + '</p>'
+        for _ in range(paragraphs)) + f'</{tag}>'
+    article = ('<div class="content-wrapper"><article>'
+               + title_html.format(title=_sentence(rng, words, '')) + date_html
+               + body + '</article></div>')
+
+    return (f'<!DOCTYPE html><html lang="{lang}"><head><meta charset="utf-8">'
+            f'<title>{source}</title>{script}<style>{"." * 2000}</style></head>'
+            f'<body><div class="page">{nav}{article}{grid}'
+            f'<footer>{_sentence(rng, words, end) * 10}</footer></div></body></html>')
+
+
+def load_pages(lang: str = 'bn') -> Dict[str, str]:
+    """One article page per source, preferring recorded fixtures"""
+    pages = {}
+    for source in PAGE_LAYOUTS:
+        recorded = FIXTURE_DIR / f"{source}.{lang}.html"
+        if recorded.exists():
+            pages[source] = recorded.read_text(encoding='utf-8')
+        else:
+            pages[source] = synthetic_page(source, lang)
+    return pages
+
+
+def record_page(source: str, lang: str, url: str) -> Path:
+    """Download url and save it as the fixture for source in lang"""
+    # Imported here so reading fixtures does not pull in the scraper config
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    from scrapers.config import USER_AGENT
+
+    response = requests.get(url, headers={'User-Agent': USER_AGENT}, timeout=30)
+    response.raise_for_status()
+    response.encoding = response.encoding or 'utf-8'
+    FIXTURE_DIR.mkdir(exist_ok=True)
+    path = FIXTURE_DIR / f"{source}.{lang}.html"
+    path.write_text(response.text, encoding='utf-8')
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Record article pages as benchmark fixtures')
+    parser.add_argument('source', choices=sorted(PAGE_LAYOUTS))
+    parser.add_argument('bn_url')
+    parser.add_argument('en_url', nargs='?')
+    args = parser.parse_args()
+
+    for lang, url in (('bn', args.bn_url), ('en', args.en_url)):
+        if url:
+            print(f"Recorded {url} -> {record_page(args.source, lang, url)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,179 @@
+"""
+End-to-end load test: ScrapingCoordinator against the simulated news sites.
+
+Starts news_site.py's servers, points NEWS_SOURCES at them and runs a full
+crawl of all six sources into a temporary directory. Reports pairs per
+second, fetch latency tails per host, what the servers answered and how
+the crawl recorded each URL. With --match, sources pair articles through
+their English sections instead of by URL, and the report adds how many of
+the matched pairs are the true counterparts. With --queue-workers, the
+crawl goes through a SQLite work queue drained by that many processes.
+With --max-fetch-ratio, the script exits non-zero when the crawl
+downloaded more Bengali articles than that multiple of the budget, so a
+budget that stops holding back discovery fails CI:
+
+    python benchmarks/load_test.py --max-articles 50 --latency 0.05 --error-rate 0.05 --rate-limit-rate 0.05
+    python benchmarks/load_test.py --max-articles 5 --max-fetch-ratio 2
+"""
+import argparse
+import json
+import logging
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from scrapers.config import NEWS_SOURCES, FETCH_CONFIG
+from scrapers.metrics import METRICS
+from scrapers.news_scraper import NewsScraper
+from scraping.coordinator import ScrapingCoordinator
+from benchmarks.news_site import SIM_CONFIG, NewsSiteSimulator
+
+
+def run_load_test(sim_config: Dict, max_articles: int, concurrency: int,
+                  parse_workers: Optional[int], align_workers: Optional[int],
+                  sitemaps: bool = False, match: bool = False, queue_workers: int = 0) -> Dict:
+    METRICS.drain()
+    simulator = NewsSiteSimulator(sim_config).start()
+    originals = {source: config['base_url'] for source, config in NEWS_SOURCES.items()}
+    base_urls = simulator.base_urls()
+    matches = None
+    try:
+        for source, url in base_urls.items():
+            NEWS_SOURCES[source]['base_url'] = url
+            if sitemaps:
+                NEWS_SOURCES[source]['sitemaps'] = ['/sitemap.xml']
+            if match:
+                NEWS_SOURCES[source]['english'] = {
+                    'list_urls': ['/en' + path for path in NEWS_SOURCES[source]['list_urls']]}
+        with tempfile.TemporaryDirectory() as output_dir:
+            coordinator = ScrapingCoordinator(output_dir, concurrency=concurrency)
+            for source in NEWS_SOURCES:
+                coordinator.register_scraper(source, NewsScraper)
+            start = time.perf_counter()
+            if queue_workers:
+                found = coordinator.run_queue(str(Path(output_dir) / 'queue.sqlite'), max_articles,
+                                              workers=queue_workers)
+            else:
+                found = coordinator.run(max_articles=max_articles, parse_workers=parse_workers,
+                                        align_workers=align_workers)
+            elapsed = time.perf_counter() - start
+            statuses = coordinator.index.counts()
+            coordinator.index.close()
+            if coordinator.english:
+                matches = Counter(
+                    'correct' if record['en_url'] == record['bn_url'].replace('/bn/', '/en/') else 'wrong'
+                    for record in coordinator.dataset.store.records())
+                matches.update(coordinator.english.counts())
+                coordinator.english.close()
+            coordinator.dataset.store.close()
+    finally:
+        simulator.stop()
+        for source, url in originals.items():
+            NEWS_SOURCES[source]['base_url'] = url
+            NEWS_SOURCES[source].pop('sitemaps', None)
+            NEWS_SOURCES[source].pop('english', None)
+
+    summary = METRICS.summary()
+    sources = {f"host={url.split('//')[1]}": source for source, url in base_urls.items()}
+    latency = {}
+    for labels, hist in summary['histograms'].get('fetch_seconds', {}).items():
+        latency[sources.get(labels, labels)] = {k: hist[k] for k in ('count', 'mean', 'p50', 'p90', 'p99')}
+    server = Counter()
+    for (_, kind), count in simulator.stats.items():
+        server[kind] += count
+    client = Counter()
+    for labels, count in summary['counters'].get('fetch_requests_total', {}).items():
+        client[labels.split('outcome=')[-1]] += count
+
+    pairs = sum(found.values())
+    report = {
+        'seconds': elapsed,
+        'pairs': pairs,
+        'pairs_per_second': pairs / elapsed if elapsed else 0.0,
+        'pairs_per_source': dict(found),
+        'fetch_latency': latency,
+        'server_responses': dict(server),
+        'client_outcomes': dict(client),
+        'url_statuses': statuses,
+        'article_fetches': dict(simulator.article_fetches),
+    }
+    if matches is not None:
+        report['matches'] = dict(matches)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load-test the crawler against simulated news sites')
+    parser.add_argument('--max-articles', '-n', type=int, default=50, help='Article pairs per source')
+    parser.add_argument('--concurrency', '-c', type=int, default=FETCH_CONFIG['concurrency'])
+    parser.add_argument('--parse-workers', type=int, default=None)
+    parser.add_argument('--align-workers', type=int, default=None)
+    parser.add_argument('--latency', type=float, default=SIM_CONFIG['latency'])
+    parser.add_argument('--error-rate', type=float, default=SIM_CONFIG['error_rate'])
+    parser.add_argument('--rate-limit-rate', type=float, default=SIM_CONFIG['rate_limit_rate'])
+    parser.add_argument('--slow-rate', type=float, default=SIM_CONFIG['slow_rate'])
+    parser.add_argument('--slow-seconds', type=float, default=SIM_CONFIG['slow_seconds'])
+    parser.add_argument('--down', default='',
+                        help='Comma-separated sources that answer every request with 503')
+    parser.add_argument('--sitemaps', action='store_true',
+                        help='Discover articles through /sitemap.xml before the listing pages')
+    parser.add_argument('--match', action='store_true',
+                        help='Pair articles by matching against crawled English sections')
+    parser.add_argument('--queue-workers', type=int, default=0,
+                        help='Crawl through a work queue with this many worker processes')
+    parser.add_argument('--max-fetch-ratio', type=float, default=None,
+                        help='Fail when a source downloads more Bengali articles than this times --max-articles')
+    parser.add_argument('--report', default=None, help='Also write the report as JSON here')
+    parser.add_argument('--verbose', '-v', action='store_true', help='Log every failed fetch')
+    args = parser.parse_args()
+    # Injected failures would otherwise log one error each
+    logging.basicConfig(level=logging.WARNING if args.verbose else logging.CRITICAL)
+
+    sim_config = {'latency': args.latency, 'error_rate': args.error_rate,
+                  'rate_limit_rate': args.rate_limit_rate, 'slow_rate': args.slow_rate,
+                  'slow_seconds': args.slow_seconds,
+                  'down': tuple(source for source in args.down.split(',') if source)}
+    report = run_load_test(sim_config, args.max_articles, args.concurrency,
+                           args.parse_workers, args.align_workers, args.sitemaps, args.match,
+                           args.queue_workers)
+
+    print(f"{report['pairs']} pairs in {report['seconds']:.1f} s "
+          f"({report['pairs_per_second']:.1f} pairs/s)")
+    print(f"{'source':<14} {'fetches':>8} {'mean ms':>8} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8}")
+
+    def ms(value):
+        return f"{value * 1000:8.0f}" if value is not None else f"{'>30s':>8}"
+
+    for source, hist in sorted(report['fetch_latency'].items()):
+        print(f"{source:<14} {hist['count']:8d} {ms(hist['mean'])} {ms(hist['p50'])} "
+              f"{ms(hist['p90'])} {ms(hist['p99'])}")
+    print("(percentiles are histogram bucket upper bounds)")
+    print(f"server responses: {report['server_responses']}")
+    print(f"client outcomes:  {report['client_outcomes']}")
+    print(f"URL statuses:     {report['url_statuses']}")
+    if 'matches' in report:
+        matches = report['matches']
+        paired = matches.get('correct', 0) + matches.get('wrong', 0)
+        precision = matches.get('correct', 0) / paired if paired else 0.0
+        print(f"matching:         {matches} (precision {precision:.1%})")
+
+    print(f"article fetches:  {report['article_fetches']}")
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as fp:
+            json.dump(report, fp, indent=2)
+
+    if args.max_fetch_ratio is not None:
+        limit = args.max_fetch_ratio * args.max_articles
+        over = {source: count for source, count in report['article_fetches'].items() if count > limit}
+        if over:
+            print(f"OVER BUDGET: more than {limit:.0f} article fetches from {', '.join(sorted(over))}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
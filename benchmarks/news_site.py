@@ -0,0 +1,299 @@
+"""
+Local stand-in for the six news outlets, for end-to-end load tests.
+
+Each source in NEWS_SOURCES gets its own HTTP server on 127.0.0.1, so every
+outlet is a separate host to the fetcher. Listing pages carry the source's
+article and link selectors, link to the next page with rel="next" and
+point at /bn/<section>/<n> articles; /sitemap.xml is a sitemap index over
+one news sitemap per section. The
+/en/ counterpart of every article exists too, except for a configurable
+share, and /en/<section> lists them. Article pages come from fixtures.py,
+with a per-article date, numbers and names written into both languages so
+the two editions of an article can be matched by content. Responses can be delayed,
+failed with 500, rate-limited with 429 and Retry-After, or trickled out
+slowly, at the rates in SIM_CONFIG; whole sources can be taken down.
+
+    python benchmarks/news_site.py --latency 0.05 --error-rate 0.02
+"""
+import argparse
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from scrapers.config import NEWS_SOURCES
+from benchmarks.fixtures import PAGE_LAYOUTS, synthetic_page
+
+SIM_CONFIG = {
+    'latency': 0.02,          # mean seconds before a response starts
+    'jitter': 0.5,            # latency varies uniformly by +/- this share
+    'error_rate': 0.0,        # share of requests answered with 500
+    'rate_limit_rate': 0.0,   # share answered with 429
+    'retry_after': 1,         # seconds sent in Retry-After with a 429
+    'slow_rate': 0.0,         # share whose body is trickled out
+    'slow_seconds': 1.0,      # time a slow body takes to arrive
+    'missing_en_rate': 0.05,  # share of articles without an English version
+    'links_per_list': 30,
+    'pages_per_list': 3,      # listing pages per section, linked with rel="next"
+    'sitemap_links': 200,     # articles per section sitemap
+    'page_variants': 16,      # distinct article pages generated per source and language
+    'down': (),               # sources that answer every request with 503
+}
+
+_ARTICLE_PATH = re.compile(r'^/(bn|en)/([\w-]+)/(\d+)$')
+
+# (Bengali, English) spellings of names written into article pages
+NAMES = (('ঢাকা', 'Dhaka'), ('চট্টগ্রাম', 'Chittagong'), ('সিলেট', 'Sylhet'), ('খুলনা', 'Khulna'),
+         ('রাজশাহী', 'Rajshahi'), ('বরিশাল', 'Barisal'), ('রংপুর', 'Rangpur'), ('কুমিল্লা', 'Comilla'),
+         ('হাসিনা', 'Hasina'), ('ইউনূস', 'Yunus'), ('পদ্মা', 'Padma'), ('যমুনা', 'Jamuna'),
+         ('মেঘনা', 'Meghna'), ('কক্সবাজার', 'Coxsbazar'), ('নারায়ণগঞ্জ', 'Narayanganj'),
+         ('গাজীপুর', 'Gazipur'))
+_BN_DIGITS = str.maketrans('0123456789', '০১২৩৪৫৬৭৮৯')
+
+
+def _element(token: str, inner: str, default_tag: str = 'div', attrs: str = '') -> str:
+    """Markup matching one simple selector token: tag, .class or tag.class"""
+    tag, _, classes = token.partition('.')
+    tag = tag or default_tag
+    class_attr = f' class="{classes.replace(".", " ")}"' if classes else ''
+    return f'<{tag}{class_attr}{attrs}>{inner}</{tag}>'
+
+
+def listing_markup(source_config: Dict, hrefs: List[str], next_href: Optional[str] = None) -> str:
+    """One card per href, nested so article_selector and link_selector both match"""
+    cards = []
+    for i, href in enumerate(hrefs):
+        tokens = source_config['link_selector'].split()
+        # The last token is the link itself; the ones before it wrap it
+        inner = _element(tokens[-1], f'Headline {i}', 'a', f' href="{href}"')
+        for token in reversed(tokens[:-1]):
+            inner = _element(token, inner)
+        cards.append(_element(source_config['article_selector'], inner))
+    pager = f'<nav class="pagination"><a rel="next" href="{next_href}">next</a></nav>' if next_href else ''
+    return ('<!DOCTYPE html><html lang="bn"><head><meta charset="utf-8"></head><body>'
+            + ''.join(cards) + pager + '</body></html>')
+
+
+def sitemap_markup(locations: List[str], index: bool = False) -> str:
+    """A sitemap index over locations, or a news sitemap listing them"""
+    if index:
+        entries = ''.join(f'<sitemap><loc>{loc}</loc><lastmod>2023-03-01</lastmod></sitemap>'
+                          for loc in locations)
+        return ('<?xml version="1.0" encoding="UTF-8"?>'
+                '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+                + entries + '</sitemapindex>')
+    entries = ''.join(f'<url><loc>{loc}</loc><news:news><news:publication_date>2023-03-01'
+                      f'</news:publication_date></news:news></url>' for loc in locations)
+    return ('<?xml version="1.0" encoding="UTF-8"?>'
+            '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9" '
+            'xmlns:news="http://www.google.com/schemas/sitemap-news/0.9">'
+            + entries + '</urlset>')
+
+
+@lru_cache(maxsize=None)
+def _article_page(source: str, lang: str, variant: int) -> str:
+    return synthetic_page(source, lang, seed=variant)
+
+
+def article_markup(source: str, lang: str, section: str, number: int, variant: int) -> str:
+    """
+    An article page whose date, numbers and names are those of article
+    section/number, written the way each edition would
+    """
+    rng = random.Random(f'{source}-{section}-{number}')
+    day = 1 + rng.randrange(28)
+    figures = [str(rng.randrange(100, 100000)) for _ in range(3)]
+    names = rng.sample(NAMES, 2)
+    if lang == 'bn':
+        date_text = f'{day} মার্চ 2023'.translate(_BN_DIGITS)
+        facts = (f'{names[0][0]} ও {names[1][0]} এলাকায় {figures[0]} জন, {figures[1]} টাকা এবং '
+                 f'{figures[2]} টি প্রকল্প।').translate(_BN_DIGITS)
+    else:
+        date_text = f'March {day}, 2023'
+        facts = (f'{figures[0]} people, Tk {figures[1]} and {figures[2]} projects in '
+                 f'{names[0][1]} and {names[1][1]}.')
+    _, _, tag, container = PAGE_LAYOUTS[source]
+    opening = f'<{tag} class="{container}">'
+    return (_article_page(source, lang, variant)
+            .replace('2023-03-01', f'2023-03-{day:02d}')
+            .replace('১ মার্চ ২০২৩', date_text)
+            .replace(opening, f'{opening}<p>{facts}</p>', 1))
+
+
+class NewsSiteSimulator:
+    """One threaded HTTP server per source; base_urls() says where each one listens"""
+
+    def __init__(self, config: Optional[Dict] = None, seed: int = 0):
+        self.config = dict(SIM_CONFIG, **(config or {}))
+        self.stats = Counter()  # responses per (source, kind)
+        self.article_fetches = Counter()  # Bengali article pages served per source
+        self._lock = threading.Lock()
+        self._rng = random.Random(seed)
+        self._servers: Dict[str, ThreadingHTTPServer] = {}
+
+    def _roll(self) -> float:
+        with self._lock:
+            return self._rng.random()
+
+    def _count(self, source: str, kind: str):
+        with self._lock:
+            self.stats[source, kind] += 1
+
+    def _make_handler(self, source: str):
+        simulator, config = self, self.config
+        source_config = NEWS_SOURCES[source]
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                latency = config['latency'] * (1 + config['jitter'] * (2 * simulator._roll() - 1))
+                time.sleep(max(0.0, latency))
+
+                if source in config['down']:
+                    simulator._count(source, '503')
+                    return self._send(503, b'')
+                roll = simulator._roll()
+                if roll < config['rate_limit_rate']:
+                    simulator._count(source, '429')
+                    return self._send(429, b'', {'Retry-After': str(config['retry_after'])})
+                if roll < config['rate_limit_rate'] + config['error_rate']:
+                    simulator._count(source, '500')
+                    return self._send(500, b'')
+
+                body = self._body()
+                if body is None:
+                    simulator._count(source, '404')
+                    return self._send(404, b'')
+                slow = simulator._roll() < config['slow_rate']
+                simulator._count(source, 'head' if self.command == 'HEAD' else 'slow' if slow else '200')
+                self._send(200, body, slow=slow)
+
+            def _body(self) -> Optional[bytes]:
+                path, _, query = self.path.partition('?')
+                sections = [url.strip('/') for url in source_config['list_urls']]
+                lang = 'en' if path.startswith('/en/') else 'bn'
+                list_path = path[len('/en'):] if lang == 'en' else path
+                if list_path in source_config['list_urls']:
+                    section = list_path.strip('/')
+                    page = int(query.split('page=')[-1]) if 'page=' in query else 1
+                    if page > config['pages_per_list']:
+                        return listing_markup(source_config, []).encode('utf-8')
+                    per_page = config['links_per_list']
+                    hrefs = [f'/{lang}/{section}/{n}' for n in range((page - 1) * per_page, page * per_page)]
+                    next_href = f'{path}?page={page + 1}' if page < config['pages_per_list'] else None
+                    return listing_markup(source_config, hrefs, next_href).encode('utf-8')
+                origin = f"http://{self.headers.get('Host')}"
+                if path == '/sitemap.xml':
+                    return sitemap_markup([f'{origin}/sitemap-{section}.xml' for section in sections],
+                                          index=True).encode('utf-8')
+                if path.startswith('/sitemap-') and path[len('/sitemap-'):-len('.xml')] in sections:
+                    section = path[len('/sitemap-'):-len('.xml')]
+                    return sitemap_markup([f'{origin}/bn/{section}/{n}'
+                                           for n in range(config['sitemap_links'])]).encode('utf-8')
+                match = _ARTICLE_PATH.match(path)
+                if not match:
+                    return None
+                lang, section, number = match.group(1), match.group(2), int(match.group(3))
+                if lang == 'bn' and self.command == 'GET':
+                    with simulator._lock:
+                        simulator.article_fetches[source] += 1
+                if lang == 'en':
+                    # Decide per article, so retries see the same answer
+                    missing = random.Random(f'{source}{section}{number}').random()
+                    if missing < config['missing_en_rate']:
+                        return None
+                return article_markup(source, lang, section, number,
+                                      number % config['page_variants']).encode('utf-8')
+
+            # Answered like GET, without the body
+            do_HEAD = do_GET
+
+            def _send(self, status: int, body: bytes, headers: Optional[Dict[str, str]] = None,
+                      slow: bool = False):
+                self.send_response(status)
+                content_type = 'application/xml' if self.path.endswith('.xml') else 'text/html'
+                self.send_header('Content-Type', f'{content_type}; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                if self.command == 'HEAD':
+                    return
+                if not slow:
+                    self.wfile.write(body)
+                    return
+                pieces = 10
+                step = max(1, len(body) // pieces)
+                for start in range(0, len(body), step):
+                    self.wfile.write(body[start:start + step])
+                    self.wfile.flush()
+                    time.sleep(config['slow_seconds'] / pieces)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self, port: int = 0):
+        """Start a server per source; with port set, sources take consecutive ports from it"""
+        for i, source in enumerate(NEWS_SOURCES):
+            server = ThreadingHTTPServer(('127.0.0.1', port + i if port else 0),
+                                         self._make_handler(source))
+            server.daemon_threads = True
+            threading.Thread(target=server.serve_forever, name=f'sim-{source}', daemon=True).start()
+            self._servers[source] = server
+        return self
+
+    def base_urls(self) -> Dict[str, str]:
+        return {source: f'http://127.0.0.1:{server.server_address[1]}'
+                for source, server in self._servers.items()}
+
+    def stop(self):
+        for server in self._servers.values():
+            server.shutdown()
+            server.server_close()
+        self._servers.clear()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve simulated news sites locally')
+    parser.add_argument('--port', type=int, default=8000,
+                        help='First port; sources take consecutive ports')
+    parser.add_argument('--latency', type=float, default=SIM_CONFIG['latency'])
+    parser.add_argument('--error-rate', type=float, default=SIM_CONFIG['error_rate'])
+    parser.add_argument('--rate-limit-rate', type=float, default=SIM_CONFIG['rate_limit_rate'])
+    parser.add_argument('--slow-rate', type=float, default=SIM_CONFIG['slow_rate'])
+    args = parser.parse_args()
+
+    simulator = NewsSiteSimulator({'latency': args.latency, 'error_rate': args.error_rate,
+                                   'rate_limit_rate': args.rate_limit_rate,
+                                   'slow_rate': args.slow_rate})
+    simulator.start(args.port)
+    for source, url in simulator.base_urls().items():
+        print(f"{source:<14} {url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        simulator.stop()
+
+
+if __name__ == '__main__':
+    main()
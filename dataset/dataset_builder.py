@@ -1,20 +1,79 @@
-from typing import List, Dict, Tuple, Optional
+from typing import TYPE_CHECKING, List, Dict, Tuple, Optional, Iterable, Iterator
+import contextlib
+import hashlib
+import itertools
 import json
-import pandas as pd
-import numpy as np
+import os
 from pathlib import Path
 import logging
 from collections import Counter
-from tqdm import tqdm
-from datasets import Dataset, DatasetDict
-from langdetect import detect, LangDetectException
+from processing import alignment, normalize
+from scrapers.metrics import METRICS
+from .pair_store import PairStore, legacy_pair_files
+
+# pandas, tqdm and the filters are imported where the dataset is built, so
+# a crawl, which only saves pairs, does not pay for them at startup
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+PAIR_COLUMNS = ['bn', 'en', 'source', 'url', 'date']
+
+BUILD_CONFIG = {
+    'chunk_size': 50_000,  # sentence pairs filtered and written per step
+    'splits': (('train', 0.8), ('validation', 0.1), ('test', 0.1))
+}
+
+
+def assign_splits(urls: 'pd.Series') -> 'np.ndarray':
+    """
+    Index into BUILD_CONFIG['splits'] for each row, derived from the article id
+    (md5 of the Bengali URL). All sentences of an article share a split, and
+    an article keeps its split across rebuilds as long as the shares do not change.
+    """
+    import numpy as np
+    bounds = np.cumsum([share for _, share in BUILD_CONFIG['splits']])
+    buckets = {url: int(hashlib.md5(url.encode()).hexdigest()[:8], 16) / 2 ** 32
+               for url in urls.unique()}
+    return np.minimum(np.searchsorted(bounds, urls.map(buckets).to_numpy(), side='right'),
+                      len(bounds) - 1)
+
+
+class _JSONLWriter:
+    """Append DataFrames to a JSON lines file, replacing the target only on success"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.tmp_path = self.path.with_name(self.path.name + '.tmp')
+
+    def __enter__(self):
+        self.fp = open(self.tmp_path, 'w', encoding='utf-8')
+        return self
+
+    def write(self, df: 'pd.DataFrame'):
+        if not df.empty:
+            with METRICS.timer('write_seconds', target=self.path.name):
+                data = df.to_json(orient='records', lines=True).rstrip('\n') + '\n'
+                self.fp.write(data)
+            METRICS.inc('write_bytes_total', len(data), target=self.path.name)
+
+    def __exit__(self, exc_type, exc, tb):
+        self.fp.close()
+        if exc_type is None:
+            os.replace(self.tmp_path, self.path)
+        else:
+            self.tmp_path.unlink(missing_ok=True)
+
 
 class DatasetBuilder:
-    def __init__(self, output_dir: str):
+    def __init__(self, output_dir: str, filter_workers: Optional[int] = None):
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
         self.dataset_path = self.output_dir / 'dataset.json'
         self.stats = Counter()  # For tracking statistics
+        self.rejections = Counter()  # Filtered-out pairs per reason
+        self.filter_workers = filter_workers
+        self.store = PairStore(str(self.output_dir))
         
     def add_article_pair(self, bn_article: Dict, en_article: Dict):
         """Add a Bengali-English article pair to the dataset"""
@@ -22,52 +81,101 @@ class DatasetBuilder:
             bn_article['content'],
             en_article['content']
         )
+        return self.add_aligned_pair(bn_article, en_article, aligned_pairs)
         
+    def add_aligned_pair(self, bn_article: Dict, en_article: Dict,
+                         aligned_pairs: List[Tuple[str, str]]) -> int:
+        """Save sentence pairs already aligned elsewhere, e.g. in a worker process"""
+        source = bn_article['url'].split('/')[2]
+        METRICS.observe('pairs_per_article', len(aligned_pairs), source=source)
+        METRICS.inc('articles_total', source=source, outcome='paired' if aligned_pairs else 'unaligned')
         if aligned_pairs:
             # Save aligned pairs
             pair_id = self._generate_pair_id(bn_article['url'])
             self._save_pair(pair_id, aligned_pairs, 
                           bn_article['url'], en_article['url'])
-            self.stats[bn_article['url'].split('/')[2]] += len(aligned_pairs)
+            self.stats[source] += len(aligned_pairs)
             return len(aligned_pairs)
         return 0
     
-    def build_huggingface_dataset(self) -> str:
-        """Convert saved pairs to HuggingFace dataset format with filtering"""
+    def build_huggingface_dataset(self, chunk_size: int = BUILD_CONFIG['chunk_size']) -> str:
+        """
+        Convert saved pairs to HuggingFace dataset format with filtering.
+
+        Pair files are read lazily and filtered ``chunk_size`` sentence pairs
+        at a time; each filtered chunk is appended to dataset.json and the
+        split files before the next one is read, so memory use does not grow
+        with the corpus. Splits come from assign_splits, so an article never
+        moves between train, validation and test across rebuilds.
+        """
         logging.info("Building dataset from saved pairs...")
-        pairs = []
-        pair_files = list(self.output_dir.glob('*.json'))
-        logging.info(f"Found {len(pair_files)} article pair files")
-        
-        for f in tqdm(pair_files, desc="Processing pairs"):
-            with open(f) as fp:
+        total = kept = 0
+        split_counts = Counter()
+        names = [name for name, _ in BUILD_CONFIG['splits']]
+
+        with contextlib.ExitStack() as stack:
+            dataset_out = stack.enter_context(_JSONLWriter(self.dataset_path))
+            split_outs = [stack.enter_context(_JSONLWriter(self.output_dir / f'{name}.json'))
+                          for name in names]
+            for chunk in self._iter_chunks(self._iter_pairs(), chunk_size):
+                total += len(chunk)
+                # Apply quality filters
+                df = self._apply_quality_filters(chunk)
+                kept += len(df)
+                dataset_out.write(df)
+
+                # Create train-test-validation split
+                split = assign_splits(df['url'])
+                for idx, name in enumerate(names):
+                    part = df[split == idx]
+                    split_outs[idx].write(part)
+                    split_counts[name] += len(part)
+
+        logging.info(f"Total pairs before filtering: {total}")
+        logging.info(f"Total pairs after filtering: {kept}")
+        logging.info(f"Created splits: train={split_counts['train']}, "
+                     f"val={split_counts['validation']}, test={split_counts['test']}")
+        return str(self.dataset_path)
+
+    def _iter_pairs(self) -> Iterator[Dict]:
+        """Yield sentence pairs from the pair store, then from legacy per-article files"""
+        from tqdm import tqdm
+        records = itertools.chain(self.store.records(), self._iter_legacy_records())
+        for pair_data in tqdm(records, desc="Processing pairs"):
+            try:
+                for bn, en in pair_data['pairs']:
+                    yield {
+                        'bn': bn,
+                        'en': en,
+                        'source': pair_data.get('source', 'unknown'),
+                        'url': pair_data.get('bn_url', ''),
+                        'date': pair_data.get('date', '')
+                    }
+            except (KeyError, TypeError, ValueError):
+                logging.warning(f"Malformed pair record {pair_data.get('id', '')}")
+
+    def _iter_legacy_records(self) -> Iterator[Dict]:
+        for f in legacy_pair_files(self.output_dir):
+            if f.stem in self.store:
+                continue
+            with open(f, encoding='utf-8') as fp:
                 try:
-                    pair_data = json.load(fp)
-                    for bn, en in pair_data['pairs']:
-                        pairs.append({
-                            'bn': bn,
-                            'en': en,
-                            'source': pair_data.get('source', 'unknown'),
-                            'url': pair_data.get('bn_url', ''),
-                            'date': pair_data.get('date', '')
-                        })
+                    yield json.load(fp)
                 except json.JSONDecodeError:
                     logging.warning(f"Failed to parse {f}")
-        
-        logging.info(f"Total pairs before filtering: {len(pairs)}")
-        
-        # Apply quality filters
-        filtered_pairs = self._apply_quality_filters(pairs)
-        logging.info(f"Total pairs after filtering: {len(filtered_pairs)}")
-        
-        # Save as JSON lines
-        df = pd.DataFrame(filtered_pairs)
-        df.to_json(self.dataset_path, orient='records', lines=True)
-        
-        # Create train-test-validation split
-        self._create_splits(df)
-        
-        return str(self.dataset_path)
+
+    @staticmethod
+    def _iter_chunks(pairs: Iterable[Dict], chunk_size: int) -> Iterator['pd.DataFrame']:
+        """Group a stream of pair dicts into DataFrames of at most chunk_size rows"""
+        import pandas as pd
+        chunk = []
+        for pair in pairs:
+            chunk.append(pair)
+            if len(chunk) >= chunk_size:
+                yield pd.DataFrame(chunk, columns=PAIR_COLUMNS)
+                chunk = []
+        if chunk:
+            yield pd.DataFrame(chunk, columns=PAIR_COLUMNS)
     
     def upload_to_huggingface(self, repo_id: str):
         """Upload dataset to Hugging Face Hub"""
@@ -104,65 +212,34 @@ class DatasetBuilder:
             logging.error(f"Error uploading to Hugging Face: {str(e)}")
             return False
 
-    def _apply_quality_filters(self, pairs: List[Dict]) -> List[Dict]:
+    def _apply_quality_filters(self, pairs) -> 'pd.DataFrame':
         """Apply quality filters to remove bad pairs"""
+        import pandas as pd
+        from .filters import filter_pairs
         logging.info("Applying quality filters...")
-        filtered = []
-        
-        for pair in tqdm(pairs, desc="Filtering"):
-            bn, en = pair['bn'], pair['en']
-            
-            # Check minimum length
-            if len(bn) < 20 or len(en) < 20:
-                continue
-                
-            # Check length ratio (Bengali to English)
-            ratio = len(bn) / len(en) if len(en) > 0 else 0
-            if not (0.5 <= ratio <= 3.0):
-                continue
-                
-            # Verify language if possible
-            try:
-                bn_lang = detect(bn)
-                en_lang = detect(en)
-                if not (bn_lang == 'bn' and en_lang == 'en'):
-                    continue
-            except LangDetectException:
-                # If language detection fails, keep the pair
-                pass
-                
-            filtered.append(pair)
-            
+        df = pairs if isinstance(pairs, pd.DataFrame) else pd.DataFrame(pairs, columns=PAIR_COLUMNS)
+        with METRICS.timer('filter_seconds'):
+            filtered, rejected = filter_pairs(df, workers=self.filter_workers)
+        self.rejections.update(rejected)
+        METRICS.inc('filter_pairs_total', len(filtered), outcome='kept')
+        for reason, count in rejected.items():
+            METRICS.inc('filter_pairs_total', count, outcome=reason)
+        for reason, count in rejected.most_common():
+            logging.info(f"Rejected {count} pairs: {reason}")
         return filtered
     
-    def _create_splits(self, df: pd.DataFrame):
-        """Create train-test-validation splits"""
-        # Shuffle dataframe
-        df = df.sample(frac=1, random_state=42).reset_index(drop=True)
-        
-        # Create splits (80% train, 10% validation, 10% test)
-        train_size = int(0.8 * len(df))
-        val_size = int(0.1 * len(df))
-        
-        train_df = df[:train_size]
-        val_df = df[train_size:train_size+val_size]
-        test_df = df[train_size+val_size:]
-        
-        # Save splits
-        train_df.to_json(self.output_dir / 'train.json', orient='records', lines=True)
-        val_df.to_json(self.output_dir / 'validation.json', orient='records', lines=True)
-        test_df.to_json(self.output_dir / 'test.json', orient='records', lines=True)
-        
-        logging.info(f"Created splits: train={len(train_df)}, val={len(val_df)}, test={len(test_df)}")
-
     def _generate_pair_id(self, url: str) -> str:
         """Generate unique ID for article pair"""
-        import hashlib
         return hashlib.md5(url.encode()).hexdigest()
         
+    def has_pair(self, bn_url: str) -> bool:
+        """Check whether pairs for this Bengali article are already saved"""
+        pair_id = self._generate_pair_id(bn_url)
+        return pair_id in self.store or (self.output_dir / f"{pair_id}.json").exists()
+        
     def _save_pair(self, pair_id: str, pairs: List[Tuple[str, str]], 
                    bn_url: str, en_url: str, date: str = ''):
-        """Save aligned sentence pairs to JSON"""
+        """Append aligned sentence pairs to the pair store"""
         data = {
             'id': pair_id,
             'bn_url': bn_url,
@@ -171,64 +248,22 @@ class DatasetBuilder:
             'source': bn_url.split('/')[2],
             'date': date
         }
-        
-        out_path = self.output_dir / f"{pair_id}.json"
-        with open(out_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        self.store.append(data)
             
-    def _align_paragraphs(self, bn_text: str, en_text: str) -> List[Tuple[str, str]]:
+    @classmethod
+    def _align_paragraphs(cls, bn_text: str, en_text: str) -> List[Tuple[str, str]]:
         """Align Bengali and English paragraphs"""
-        # Split into sentences
-        bn_sents = self._split_sentences(bn_text)
-        en_sents = self._split_sentences(en_text)
-        
-        # Simple length-based alignment
-        aligned = []
-        bn_idx = en_idx = 0
-        
-        while bn_idx < len(bn_sents) and en_idx < len(en_sents):
-            bn_sent = self._clean_text(bn_sents[bn_idx])
-            en_sent = self._clean_text(en_sents[en_idx])
-            
-            # Skip empty sentences
-            if not bn_sent:
-                bn_idx += 1
-                continue
-            if not en_sent:
-                en_idx += 1
-                continue
-            
-            # Check length ratio is reasonable
-            ratio = len(bn_sent) / len(en_sent) if len(en_sent) > 0 else 0
-            if 0.5 <= ratio <= 2.5:
-                aligned.append((bn_sent, en_sent))
-                bn_idx += 1
-                en_idx += 1
-            else:
-                # Skip likely misaligned sentence
-                if len(bn_sent) < len(en_sent):
-                    bn_idx += 1
-                else:
-                    en_idx += 1
-                    
-        return aligned
+        # Clean each document once, split into sentences and align with the banded DP
+        with METRICS.timer('align_seconds'):
+            return alignment.align_sentences(normalize.sentences(bn_text),
+                                             normalize.sentences(en_text))
     
     @staticmethod
     def _clean_text(text: str) -> str:
         """Clean text by removing extra whitespace and normalizing"""
-        import re
-        # Remove extra whitespace
-        text = re.sub(r'\s+', ' ', text)
-        
-        # Remove special characters but preserve Bengali Unicode
-        text = re.sub(r'[^\u0980-\u09FF\s\w\.\?\!\,\'\"\(\)\-]', '', text)
-        
-        return text.strip()
+        return normalize.clean_text(text)
     
     @staticmethod 
     def _split_sentences(text: str) -> List[str]:
         """Split text into sentences"""
-        import re
-        # Split on । (Bengali full stop), . ! ?
-        sentences = re.split(r'[।\.\!\?]', text)
-        return [s.strip() for s in sentences if s.strip()]
+        return normalize.split_sentences(text)
@@ -0,0 +1,129 @@
+import logging
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+FILTER_CONFIG = {
+    'min_length': 20,           # characters, both sides
+    'ratio_range': (0.5, 3.0),  # len(bn) / len(en)
+    'bn_script_min': 0.9,       # Bengali share of letters above which bn is certain
+    'en_script_max': 0.05,      # Bengali share of letters below which en is certain
+    'script_reject': 0.5,       # shares on the wrong side of this are rejected outright
+    'detect_chunk': 256         # ambiguous pairs per language-detection task
+}
+
+# Rejection reasons reported by filter_pairs
+TOO_SHORT = 'too_short'
+LENGTH_RATIO = 'length_ratio'
+SCRIPT_MISMATCH = 'script_mismatch'
+LANGUAGE = 'language'
+
+_ROW_CHUNK = 4096
+
+
+def bengali_share(texts: Sequence[str]) -> np.ndarray:
+    """
+    Share of Bengali-script letters (U+0980-U+09FF) among Bengali and Latin
+    letters for each text, computed on one flat UTF-32 code point array per
+    block of rows, so a long text does not pad the others. NaN for texts
+    with neither.
+    """
+    shares = np.empty(len(texts))
+    for start in range(0, len(texts), _ROW_CHUNK):
+        block = list(map(str, texts[start:start + _ROW_CHUNK]))
+        # A trailing NUL keeps the start of an empty last text in range
+        codes = np.frombuffer((''.join(block) + '\0').encode('utf-32-le', 'surrogatepass'), dtype='<u4')
+        lengths = np.fromiter(map(len, block), dtype=np.int64, count=len(block))
+        starts = np.cumsum(lengths) - lengths
+        folded = codes | 0x20
+        counts = []
+        for is_letter in ((codes >= 0x0980) & (codes <= 0x09FF),
+                          (folded >= ord('a')) & (folded <= ord('z'))):
+            # reduceat gives an empty segment the element at its start instead of 0
+            count = np.add.reduceat(is_letter.view(np.uint8), starts, dtype=np.int64)
+            count[lengths == 0] = 0
+            counts.append(count)
+        bengali, latin = counts
+        letters = bengali + latin
+        with np.errstate(invalid='ignore', divide='ignore'):
+            shares[start:start + len(block)] = np.where(letters > 0, bengali / letters, np.nan)
+    return shares
+
+
+def _init_detector():
+    from langdetect import DetectorFactory
+    DetectorFactory.seed = 0
+
+
+def _detect_chunk(pairs: List[Tuple[str, str]]) -> List[bool]:
+    """True for pairs langdetect accepts as (bn, en) or cannot decide on"""
+    from langdetect import detect, LangDetectException
+    _init_detector()
+    keep = []
+    for bn, en in pairs:
+        try:
+            keep.append(detect(bn) == 'bn' and detect(en) == 'en')
+        except LangDetectException:
+            # If language detection fails, keep the pair
+            keep.append(True)
+    return keep
+
+
+def _detect_languages(pairs: List[Tuple[str, str]], workers: Optional[int]) -> np.ndarray:
+    chunk = FILTER_CONFIG['detect_chunk']
+    chunks = [pairs[i:i + chunk] for i in range(0, len(pairs), chunk)]
+    workers = (os.cpu_count() or 1) if workers is None else workers
+    if workers <= 1 or len(chunks) <= 1:
+        results = [_detect_chunk(c) for c in chunks]
+    else:
+        with ProcessPoolExecutor(min(workers, len(chunks)), initializer=_init_detector) as pool:
+            results = list(pool.map(_detect_chunk, chunks))
+    return np.fromiter((k for r in results for k in r), dtype=bool, count=len(pairs))
+
+
+def filter_pairs(df: pd.DataFrame, workers: Optional[int] = None) -> Tuple[pd.DataFrame, Counter]:
+    """
+    Apply the quality filters to a frame with 'bn' and 'en' columns.
+
+    Length, length-ratio and script checks run over whole columns. Only
+    pairs whose script shares are inconclusive go to langdetect, spread
+    over ``workers`` processes. Returns the kept rows and a Counter of
+    rejections per reason.
+    """
+    rejected = Counter()
+    if df.empty:
+        return df, rejected
+
+    bn_len = df['bn'].str.len().to_numpy()
+    en_len = df['en'].str.len().to_numpy()
+    alive = (bn_len >= FILTER_CONFIG['min_length']) & (en_len >= FILTER_CONFIG['min_length'])
+    rejected[TOO_SHORT] = int((~alive).sum())
+
+    low, high = FILTER_CONFIG['ratio_range']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = np.where(en_len > 0, bn_len / en_len, 0)
+    bad_ratio = alive & ~((ratio >= low) & (ratio <= high))
+    rejected[LENGTH_RATIO] = int(bad_ratio.sum())
+    alive &= ~bad_ratio
+
+    bn_share = bengali_share(df['bn'].tolist())
+    en_share = bengali_share(df['en'].tolist())
+    wrong = (bn_share < FILTER_CONFIG['script_reject']) | (en_share > FILTER_CONFIG['script_reject'])
+    mismatch = alive & wrong
+    rejected[SCRIPT_MISMATCH] = int(mismatch.sum())
+    alive &= ~mismatch
+
+    confident = (bn_share >= FILTER_CONFIG['bn_script_min']) & (en_share <= FILTER_CONFIG['en_script_max'])
+    ambiguous = np.flatnonzero(alive & ~confident)
+    if len(ambiguous):
+        logging.info(f"Running language detection on {len(ambiguous)} ambiguous pairs")
+        subset = df.iloc[ambiguous]
+        keep = _detect_languages(list(zip(subset['bn'], subset['en'])), workers)
+        rejected[LANGUAGE] = int((~keep).sum())
+        alive[ambiguous[~keep]] = False
+
+    return df[alive], +rejected
@@ -0,0 +1,317 @@
+import gzip
+import json
+import logging
+import os
+import re
+import shutil
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from scrapers.metrics import METRICS
+
+STORE_CONFIG = {
+    'shard_bytes': 64 * 1024 * 1024,  # uncompressed size at which the active shard is sealed
+    'compress_level': 6
+}
+
+_SHARD_NAME = re.compile(r'^pairs-(\d{6})\.jsonl(\.gz)?$')
+# Per-article files written before the store: <md5 of the Bengali URL>.json
+_LEGACY_PAIR_FILE = re.compile(r'^[0-9a-f]{32}\.json$')
+
+
+def _fsync_dir(path: Path):
+    try:
+        fd = os.open(str(path), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def legacy_pair_files(directory: Path) -> Iterator[Path]:
+    """Per-article pair files in directory, skipping dataset.json and the split files"""
+    for path in Path(directory).iterdir():
+        if _LEGACY_PAIR_FILE.match(path.name):
+            yield path
+
+
+class PairStore:
+    """
+    Append-only store of aligned article pairs in a few large shards.
+
+    Each article pair is one JSON line appended to the active shard
+    (shards/pairs-NNNNNN.jsonl). Once the shard passes ``shard_bytes`` it is
+    sealed: gzipped to a temporary file, renamed into place and only then
+    recorded as sealed in the index, so a crash at any point leaves either
+    the plain or the compressed shard authoritative, never a half-written
+    one. A SQLite index maps pair id -> (shard, offset, length), offsets
+    counting uncompressed bytes. Saving a pair id again appends a new record
+    and repoints the index; compact() rewrites the live records and drops
+    the superseded ones.
+    """
+
+    def __init__(self, root: str, shard_bytes: int = STORE_CONFIG['shard_bytes']):
+        self.root = Path(root)
+        self.shard_dir = self.root / 'shards'
+        self.shard_dir.mkdir(parents=True, exist_ok=True)
+        self.shard_bytes = shard_bytes
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.root / 'pair_index.sqlite'), check_same_thread=False)
+        self._db.executescript('''
+            CREATE TABLE IF NOT EXISTS shards (
+                shard INTEGER PRIMARY KEY,
+                sealed INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS pairs (
+                id TEXT PRIMARY KEY,
+                shard INTEGER NOT NULL,
+                offset INTEGER NOT NULL,
+                length INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS pairs_by_shard ON pairs (shard, offset);
+        ''')
+        self._recover()
+
+    # Paths
+    def _plain_path(self, shard: int) -> Path:
+        return self.shard_dir / f'pairs-{shard:06d}.jsonl'
+
+    def _sealed_path(self, shard: int) -> Path:
+        return self.shard_dir / f'pairs-{shard:06d}.jsonl.gz'
+
+    def _shard_path(self, shard: int, sealed: bool) -> Path:
+        return self._sealed_path(shard) if sealed else self._plain_path(shard)
+
+    def _recover(self):
+        """Bring the shard directory back in line with the index after a crash"""
+        shards = dict(self._db.execute('SELECT shard, sealed FROM shards'))
+        for path in self.shard_dir.iterdir():
+            match = _SHARD_NAME.match(path.name)
+            if not match:
+                # Temporary file of an interrupted seal or compaction
+                if path.name.endswith('.tmp'):
+                    path.unlink()
+                continue
+            shard, compressed = int(match.group(1)), bool(match.group(2))
+            if shard not in shards or compressed != bool(shards[shard]):
+                # Orphan of an interrupted compaction, or the other half of an interrupted seal
+                path.unlink()
+
+        active = [shard for shard, sealed in shards.items() if not sealed]
+        if active:
+            self._active = max(active)
+        else:
+            self._active = max(shards, default=0) + 1
+            self._db.execute('INSERT INTO shards (shard, sealed) VALUES (?, 0)', (self._active,))
+            self._db.commit()
+
+        # Drop a record that was written but never indexed
+        end = self._db.execute('SELECT COALESCE(MAX(offset + length), 0) FROM pairs WHERE shard = ?',
+                               (self._active,)).fetchone()[0]
+        self._fp = open(self._plain_path(self._active), 'ab')
+        if self._fp.tell() != end:
+            logging.warning(f"Truncating {self._plain_path(self._active)} to {end} bytes")
+            self._fp.truncate(end)
+            self._fp.seek(end)
+        self._size = end
+
+    def append(self, record: Dict):
+        """Append one article record; record['id'] is its key in the index"""
+        line = (json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8')
+        start = time.perf_counter()
+        with self._lock:
+            offset = self._size
+            self._fp.write(line)
+            self._fp.flush()
+            self._db.execute('INSERT OR REPLACE INTO pairs (id, shard, offset, length) VALUES (?, ?, ?, ?)',
+                             (record['id'], self._active, offset, len(line)))
+            self._db.commit()
+            self._size += len(line)
+            if self._size >= self.shard_bytes:
+                self._rollover()
+        METRICS.observe('write_seconds', time.perf_counter() - start, target='pair_store')
+        METRICS.inc('write_bytes_total', len(line), target='pair_store')
+
+    def _seal(self, shard: int):
+        """Compress a closed plain shard and mark it sealed"""
+        plain, sealed = self._plain_path(shard), self._sealed_path(shard)
+        tmp = sealed.with_name(sealed.name + '.tmp')
+        with open(plain, 'rb') as src, gzip.open(tmp, 'wb', STORE_CONFIG['compress_level']) as dst:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+        with open(tmp, 'rb') as fp:
+            os.fsync(fp.fileno())
+        os.replace(tmp, sealed)
+        _fsync_dir(self.shard_dir)
+        self._db.execute('UPDATE shards SET sealed = 1 WHERE shard = ?', (shard,))
+        self._db.commit()
+        plain.unlink()
+
+    def _rollover(self):
+        """Seal the active shard and start the next one; caller holds the lock"""
+        self._fp.flush()
+        os.fsync(self._fp.fileno())
+        self._fp.close()
+        self._seal(self._active)
+        self._active += 1
+        self._db.execute('INSERT INTO shards (shard, sealed) VALUES (?, 0)', (self._active,))
+        self._db.commit()
+        self._fp = open(self._plain_path(self._active), 'ab')
+        self._size = 0
+        logging.info(f"Started pair shard {self._plain_path(self._active).name}")
+
+    def __contains__(self, pair_id: str) -> bool:
+        with self._lock:
+            row = self._db.execute('SELECT 1 FROM pairs WHERE id = ?', (pair_id,)).fetchone()
+        return row is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM pairs').fetchone()[0]
+
+    def _open(self, shard: int, sealed: bool):
+        path = self._shard_path(shard, sealed)
+        return gzip.open(path, 'rb') if sealed else open(path, 'rb')
+
+    def get(self, pair_id: str) -> Optional[Dict]:
+        """Read one record by id; seeking into a sealed shard decompresses up to it"""
+        with self._lock:
+            row = self._db.execute('''
+                SELECT pairs.shard, sealed, offset, length FROM pairs
+                JOIN shards ON shards.shard = pairs.shard WHERE id = ?
+            ''', (pair_id,)).fetchone()
+            if row is None:
+                return None
+            self._fp.flush()
+        shard, sealed, offset, length = row
+        with self._open(shard, sealed) as fp:
+            fp.seek(offset)
+            return json.loads(fp.read(length))
+
+    def _shard_list(self) -> List[Tuple[int, int]]:
+        with self._lock:
+            self._fp.flush()
+            return list(self._db.execute('SELECT shard, sealed FROM shards ORDER BY shard'))
+
+    def records(self) -> Iterator[Dict]:
+        """Yield the live record of every pair id, reading shards sequentially"""
+        for shard, sealed in self._shard_list():
+            with self._lock:
+                live = {offset for (offset,) in
+                        self._db.execute('SELECT offset FROM pairs WHERE shard = ?', (shard,))}
+                end = self._size if shard == self._active else None
+            if not live:
+                continue
+            with self._open(shard, sealed) as fp:
+                offset = 0
+                for line in fp:
+                    if end is not None and offset >= end:
+                        break
+                    if offset in live:
+                        try:
+                            yield json.loads(line)
+                        except json.JSONDecodeError:
+                            logging.warning(f"Corrupt record in {self._shard_path(shard, sealed)} at {offset}")
+                    offset += len(line)
+
+    def import_legacy(self, directory: Path, remove: bool = False) -> int:
+        """Append per-article JSON files not yet in the store; returns the number imported"""
+        imported = 0
+        for path in list(legacy_pair_files(directory)):
+            if path.stem not in self:
+                with open(path, encoding='utf-8') as fp:
+                    try:
+                        record = json.load(fp)
+                    except json.JSONDecodeError:
+                        logging.warning(f"Failed to parse {path}")
+                        continue
+                record.setdefault('id', path.stem)
+                self.append(record)
+                imported += 1
+            if remove:
+                path.unlink()
+        return imported
+
+    def import_store(self, root: str) -> int:
+        """Append every live record of another store, e.g. a crawl worker's; returns the number imported"""
+        other = PairStore(root)
+        imported = 0
+        try:
+            for record in other.records():
+                self.append(record)
+                imported += 1
+        finally:
+            other.close()
+        return imported
+
+    def compact(self) -> Dict[str, int]:
+        """
+        Rewrite every live record into fresh sealed shards and delete the old
+        ones. The index switches to the new shards in one transaction; until
+        it commits the old shards stay authoritative.
+        """
+        with self._lock:
+            old = [shard for (shard,) in self._db.execute('SELECT shard FROM shards')]
+            first = self._active + 1
+            before = sum(self._shard_path(s, s != self._active).stat().st_size
+                         for s in old if self._shard_path(s, s != self._active).exists())
+        # Records are read without the lock, so writers must be quiesced
+        relocated = []
+        shard, size, tmp_paths = first, 0, []
+        out = None
+        for record in self.records():
+            line = (json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8')
+            if out is None or size >= self.shard_bytes:
+                if out:
+                    out.close()
+                    shard += 1
+                tmp = self._sealed_path(shard).with_name(self._sealed_path(shard).name + '.tmp')
+                tmp_paths.append((shard, tmp))
+                out = gzip.open(tmp, 'wb', STORE_CONFIG['compress_level'])
+                size = 0
+            relocated.append((shard, size, len(line), record['id']))
+            out.write(line)
+            size += len(line)
+        if out:
+            out.close()
+
+        for new_shard, tmp in tmp_paths:
+            with open(tmp, 'rb') as fp:
+                os.fsync(fp.fileno())
+            os.replace(tmp, self._sealed_path(new_shard))
+        _fsync_dir(self.shard_dir)
+
+        with self._lock:
+            self._fp.close()
+            with self._db:
+                self._db.executemany('UPDATE pairs SET shard = ?, offset = ?, length = ? WHERE id = ?',
+                                     relocated)
+                self._db.executemany('INSERT INTO shards (shard, sealed) VALUES (?, 1)',
+                                     [(s,) for s, _ in tmp_paths])
+                placeholders = ','.join('?' * len(old))
+                # Ids whose record could not be read have nothing left to point at
+                self._db.execute(f'DELETE FROM pairs WHERE shard IN ({placeholders})', old)
+                self._db.execute(f'DELETE FROM shards WHERE shard IN ({placeholders})', old)
+                self._active = (tmp_paths[-1][0] if tmp_paths else self._active) + 1
+                self._db.execute('INSERT INTO shards (shard, sealed) VALUES (?, 0)', (self._active,))
+            for s in old:
+                for path in (self._plain_path(s), self._sealed_path(s)):
+                    if path.exists():
+                        path.unlink()
+            self._fp = open(self._plain_path(self._active), 'ab')
+            self._size = 0
+            after = sum(self._sealed_path(s).stat().st_size for s, _ in tmp_paths)
+        return {'records': len(relocated), 'shards': len(tmp_paths),
+                'bytes_before': before, 'bytes_after': after}
+
+    def close(self):
+        with self._lock:
+            self._fp.close()
+            self._db.commit()
+            self._db.close()
@@ -1,22 +1,24 @@
 import logging
 from pathlib import Path
 import os
+import sys
 import argparse
 from datetime import datetime
-from scraping.coordinator import ScrapingCoordinator
-from scrapers.prothomalo import ProthomAloScraper
-from scrapers.ittefaq import IttefaqScraper
-from scrapers.banglatribune import BanglaTribuneScraper
-from scrapers.bdpratidin import BDPratidinScraper
-from scrapers.janakantha import JanakanthaScraper
-from scrapers.jaijaidin import JaiJaidinScraper
+from scrapers.config import NEWS_SOURCES, PARSER_BACKENDS
+from scrapers.metrics import METRICS
+
+# The crawler, pandas, datasets and langdetect are imported by the commands
+# that use them, so --help and the light commands start without them
+COMMANDS = ('scrape', 'build', 'validate', 'dedup', 'upload')
+# Commands whose options belong to a script in scripts/
+FORWARDED = ('validate', 'dedup')
 
 def setup_logging(log_dir='logs'):
     """Setup logging with rotation"""
     os.makedirs(log_dir, exist_ok=True)
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
     log_file = os.path.join(log_dir, f'scraping_{timestamp}.log')
-    
+
     logging.basicConfig(
         level=logging.INFO,
         format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
@@ -26,58 +28,179 @@ def setup_logging(log_dir='logs'):
         ]
     )
 
-def parse_args():
-    parser = argparse.ArgumentParser(description='Bengali-English News Dataset Builder')
-    parser.add_argument('--output', '-o', default='data', help='Output directory for dataset')
-    parser.add_argument('--max-articles', '-m', type=int, default=1000, 
+def _add_hf_repo(parser):
+    parser.add_argument('--hf-repo', default='BanglaNLP/bengali-english-news',
+                        help='Hugging Face repository name')
+
+def parse_args(argv=None):
+    """
+    Parse a command line; one without a command is a scrape, as before the
+    CLI had commands. Returns (args, arguments forwarded to a script).
+    """
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or (argv[0] not in COMMANDS and argv[0] not in ('-h', '--help')):
+        argv = ['scrape'] + argv
+
+    parser = argparse.ArgumentParser(prog='bangla-scrape',
+                                     description='Bengali-English News Dataset Builder',
+                                     epilog='Without a command, runs scrape.')
+    commands = parser.add_subparsers(dest='command', metavar='command')
+
+    scrape = commands.add_parser('scrape', help='Crawl the news sources, then build the dataset')
+    scrape.add_argument('--output', '-o', default='data', help='Output directory for dataset')
+    scrape.add_argument('--max-articles', '-m', type=int, default=1000,
                         help='Maximum number of articles to scrape per source')
-    parser.add_argument('--sources', '-s', nargs='+',
-                        default=['prothomalo', 'ittefaq', 'banglatribune', 'bdpratidin', 'janakantha', 'jaijaidin'],
+    scrape.add_argument('--sources', '-s', nargs='+',
+                        default=list(NEWS_SOURCES),
                         help='News sources to scrape')
-    parser.add_argument('--upload', '-u', action='store_true', 
+    scrape.add_argument('--concurrency', '-c', type=int, default=16,
+                        help='Maximum number of requests in flight')
+    scrape.add_argument('--cache-dir', default=None,
+                        help='HTTP cache directory (default: <output>/cache/http)')
+    scrape.add_argument('--no-cache', action='store_true',
+                        help='Disable the on-disk HTTP response cache')
+    scrape.add_argument('--full-recrawl', action='store_true',
+                        help='Ignore the seen-URL index and re-extract every discovered article')
+    scrape.add_argument('--parser', choices=PARSER_BACKENDS, default=None,
+                        help='HTML parser backend (default: fastest installed)')
+    scrape.add_argument('--parse-workers', type=int, default=None,
+                        help='Extraction processes (default: one per CPU core, 0 = inline)')
+    scrape.add_argument('--align-workers', type=int, default=None,
+                        help='Alignment processes (default: one per CPU core, 0 = inline)')
+    scrape.add_argument('--archive-dir', default=None,
+                        help='Raw page archive directory (default: <output>/archive)')
+    scrape.add_argument('--no-archive', action='store_true',
+                        help='Do not keep fetched pages in the raw page archive')
+    scrape.add_argument('--from-archive', action='store_true',
+                        help='Rebuild pairs from the raw page archive instead of crawling; no network')
+    scrape.add_argument('--resume', action='store_true',
+                        help='Continue the interrupted run checkpointed in <output>/checkpoint.json')
+    scrape.add_argument('--queue', default=None,
+                        help='Crawl through this SQLite work queue with --workers processes')
+    scrape.add_argument('--workers', type=int, default=1,
+                        help='Local queue worker processes for --queue (0 = wait for --worker runs)')
+    scrape.add_argument('--worker', action='store_true',
+                        help='Only work on the tasks of --queue, filled by another run, then exit')
+    scrape.add_argument('--metrics-dir', default=None,
+                        help='Where to write metrics.prom and metrics.json (default: <output>)')
+    scrape.add_argument('--no-build', action='store_true',
+                        help='Stop after the crawl; build the dataset later with the build command')
+    scrape.add_argument('--upload', '-u', action='store_true',
                         help='Upload dataset to Hugging Face')
-    parser.add_argument('--hf-repo', default='BanglaNLP/bengali-english-news',
-                        help='Hugging Face repository name')
-    return parser.parse_args()
+    _add_hf_repo(scrape)
+
+    build = commands.add_parser('build', help='Build dataset.json and the splits from the pair store')
+    build.add_argument('--output', '-o', default='data', help='Output directory for dataset')
+
+    upload = commands.add_parser('upload', help='Upload the built dataset to Hugging Face')
+    upload.add_argument('--output', '-o', default='data', help='Output directory for dataset')
+    _add_hf_repo(upload)
+
+    # Options are parsed by scripts/validate_dataset.py and scripts/maintenance.py
+    commands.add_parser('validate', add_help=False,
+                        help='Validate the built dataset (options: validate --help)')
+    commands.add_parser('dedup', add_help=False,
+                        help='Filter and near-deduplicate the dataset (options: dedup --help)')
+
+    args, rest = parser.parse_known_args(argv)
+    if rest and args.command not in FORWARDED:
+        parser.error(f"unrecognized arguments: {' '.join(rest)}")
+    if args.command == 'scrape' and args.worker and not args.queue:
+        parser.error('--worker requires --queue')
+    return args, rest
+
+def scrape(args):
+    """Crawl the requested sources into the pair store, then build and upload the dataset"""
+    from scraping.coordinator import ScrapingCoordinator
+    from scraping.queue_worker import default_worker_id, run_worker
 
-def main():
-    args = parse_args()
-    setup_logging()
-    
     output_dir = Path(args.output)
     output_dir.mkdir(exist_ok=True, parents=True)
-    
-    coordinator = ScrapingCoordinator(str(output_dir))
-    
-    # Dictionary mapping source names to scraper classes
-    scrapers = {
-        'prothomalo': ProthomAloScraper,
-        'ittefaq': IttefaqScraper,
-        'banglatribune': BanglaTribuneScraper,
-        'bdpratidin': BDPratidinScraper,
-        'janakantha': JanakanthaScraper,
-        'jaijaidin': JaiJaidinScraper
-    }
-    
-    # Register only requested scrapers
+
+    if args.worker:
+        # Help drain a queue filled by a coordinator run; pairs are merged by that run
+        worker_id = default_worker_id()
+        try:
+            _, metrics = run_worker(args.queue, str(output_dir), worker_id, concurrency=args.concurrency,
+                                    parser=args.parser, archive=not args.no_archive)
+            METRICS.merge(metrics)
+        finally:
+            METRICS.write(args.metrics_dir or str(output_dir), name=f'metrics-{worker_id}')
+        return
+
+    cache_dir = None if args.no_cache else (args.cache_dir or str(output_dir / 'cache' / 'http'))
+    archive_dir = None if args.no_archive else (args.archive_dir or str(output_dir / 'archive'))
+    coordinator = ScrapingCoordinator(str(output_dir), concurrency=args.concurrency,
+                                      cache_dir=cache_dir, incremental=not args.full_recrawl,
+                                      parser=args.parser, archive_dir=archive_dir)
+
+    # Register only requested scrapers; each scraper class is imported as
+    # its source is registered (NEWS_SOURCES[name]['scraper'], by default
+    # the generic config-driven scraper)
     for source in args.sources:
-        if source in scrapers:
+        if source in NEWS_SOURCES:
             logging.info(f"Registering scraper for {source}")
-            coordinator.register_scraper(source, scrapers[source])
+            coordinator.register_scraper(source)
         else:
             logging.warning(f"Unknown source: {source}")
-    
-    # Run scraping
-    coordinator.run(max_articles=args.max_articles)
-    
-    # Build final dataset
-    dataset_path = coordinator.dataset.build_huggingface_dataset()
+
+    try:
+        if args.from_archive:
+            # Re-extract and re-align archived pages
+            coordinator.rebuild_from_archive(parse_workers=args.parse_workers,
+                                             align_workers=args.align_workers)
+        elif args.queue:
+            # Crawl through the work queue with worker processes
+            coordinator.run_queue(args.queue, max_articles=args.max_articles,
+                                  workers=args.workers, resume=args.resume)
+        else:
+            # Run scraping
+            coordinator.run(max_articles=args.max_articles, parse_workers=args.parse_workers,
+                            align_workers=args.align_workers, resume=args.resume)
+
+        if args.no_build:
+            return
+        # Build final dataset
+        dataset_path = coordinator.dataset.build_huggingface_dataset()
+        logging.info(f"Dataset built at {dataset_path}")
+
+        # Upload to Hugging Face if requested
+        if args.upload:
+            logging.info(f"Uploading dataset to Hugging Face: {args.hf_repo}")
+            coordinator.dataset.upload_to_huggingface(args.hf_repo)
+    finally:
+        # Export run metrics, including for runs that fail part-way
+        metrics_dir = args.metrics_dir or str(output_dir)
+        METRICS.write(metrics_dir)
+        logging.info(f"Metrics written to {metrics_dir}/metrics.prom and metrics.json")
+
+def build(args):
+    """Build dataset.json and the split files from the pair store"""
+    from dataset.dataset_builder import DatasetBuilder
+    dataset_path = DatasetBuilder(str(Path(args.output) / 'pairs')).build_huggingface_dataset()
     logging.info(f"Dataset built at {dataset_path}")
-    
-    # Upload to Hugging Face if requested
-    if args.upload:
-        logging.info(f"Uploading dataset to Hugging Face: {args.hf_repo}")
-        coordinator.dataset.upload_to_huggingface(args.hf_repo)
+
+def upload(args):
+    """Upload the built splits to Hugging Face"""
+    from dataset.dataset_builder import DatasetBuilder
+    logging.info(f"Uploading dataset to Hugging Face: {args.hf_repo}")
+    if not DatasetBuilder(str(Path(args.output) / 'pairs')).upload_to_huggingface(args.hf_repo):
+        sys.exit(1)
+
+def validate(rest):
+    from scripts.validate_dataset import main as validate_main
+    validate_main(rest, prog='bangla-scrape validate')
+
+def dedup(rest):
+    from scripts.maintenance import main as dedup_main
+    dedup_main(rest, prog='bangla-scrape dedup')
+
+HANDLERS = {'scrape': scrape, 'build': build, 'upload': upload, 'validate': validate, 'dedup': dedup}
+
+def main(argv=None):
+    args, rest = parse_args(argv)
+    setup_logging()
+    HANDLERS[args.command](rest if args.command in FORWARDED else args)
 
 if __name__ == '__main__':
     main()
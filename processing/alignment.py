@@ -0,0 +1,175 @@
+"""
+Sentence alignment for Bengali-English article pairs.
+
+align_sentences is a length-based dynamic-programming aligner in the style
+of Gale & Church (1993). It supports 1:1, 1:2, 2:1, 1:0 and 0:1 beads, so
+one split or merged sentence costs a single bead instead of the rest of
+the document. Only cells within ``band`` of the diagonal are computed, so
+the cost stays linear in document length. Each DP row is evaluated with
+NumPy; the in-row 0:1 dependency is resolved with a running minimum.
+"""
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+ALIGN_CONFIG = {
+    'band': 12,                 # cells on each side of the diagonal
+    'variance': 6.8,            # Gale-Church s^2
+    'ratio_range': (0.5, 2.5),  # len(bn) / len(en) accepted in the output
+}
+
+# Bead priors from Gale & Church, split evenly between mirrored beads
+_PRIOR_COST = {
+    (1, 1): -np.log(0.89),
+    (1, 0): -np.log(0.0099 / 2),
+    (0, 1): -np.log(0.0099 / 2),
+    (2, 1): -np.log(0.089 / 2),
+    (1, 2): -np.log(0.089 / 2),
+}
+# Backpointer codes, indexing _BEADS
+_BEADS = [(0, 0), (1, 1), (1, 0), (2, 1), (1, 2), (0, 1)]
+
+# Abramowitz & Stegun 7.1.26 coefficients for erfc
+_P = 0.3275911
+_A = (0.254829592, -0.284496736, 1.421413741, -1.453152027, 1.061405429)
+
+
+def _neg_log_erfc(x: np.ndarray) -> np.ndarray:
+    """-log(erfc(x)) for x >= 0, computed in log space so it never overflows"""
+    t = 1.0 / (1.0 + _P * x)
+    poly = t * (_A[0] + t * (_A[1] + t * (_A[2] + t * (_A[3] + t * _A[4]))))
+    return x * x - np.log(poly)
+
+
+def _bead_cost(bn_len: np.ndarray, en_len: np.ndarray, ratio: float,
+               variance: float, bead: Tuple[int, int]) -> np.ndarray:
+    """Gale-Church cost of beads with the given total character lengths"""
+    mean = np.maximum((bn_len + en_len / ratio) / 2, 1e-9)
+    z = np.abs(ratio * mean - en_len) / np.sqrt(variance * mean)
+    # 2 * (1 - Phi(|z|)) == erfc(|z| / sqrt(2))
+    return _PRIOR_COST[bead] + _neg_log_erfc(z / np.sqrt(2))
+
+
+def _within_ratio(bn: str, en: str, ratio_range: Tuple[float, float]) -> bool:
+    low, high = ratio_range
+    return low <= len(bn) / len(en) <= high
+
+
+def align_sentences(bn_sents: Sequence[str], en_sents: Sequence[str],
+                    band: int = ALIGN_CONFIG['band'],
+                    ratio_range: Optional[Tuple[float, float]] = ALIGN_CONFIG['ratio_range']
+                    ) -> List[Tuple[str, str]]:
+    """
+    Align two lists of clean sentences. Returns (bengali, english) pairs for
+    every 1:1, 2:1 and 1:2 bead, sentences of a bead joined with a space.
+    Beads outside ratio_range are dropped; pass None to keep them all.
+    """
+    n, m = len(bn_sents), len(en_sents)
+    if not n or not m:
+        return []
+
+    bn_len = np.fromiter((len(s) for s in bn_sents), dtype=float, count=n)
+    en_len = np.fromiter((len(s) for s in en_sents), dtype=float, count=m)
+    bn_cum = np.concatenate(([0.0], np.cumsum(bn_len)))
+    en_cum = np.concatenate(([0.0], np.cumsum(en_len)))
+    ratio = en_cum[-1] / bn_cum[-1]
+    variance = ALIGN_CONFIG['variance']
+
+    # Row i covers columns lo[i]..hi[i] around the diagonal from (0, 0) to (n, m);
+    # neighbouring rows must overlap for (n, m) to stay reachable. Band cell
+    # (i, k) is column lo[i] + k; cells past hi[i] stay at infinite cost.
+    band = max(band, int(np.ceil(m / n)) + 1)
+    center = np.rint(np.arange(n + 1) * (m / n)).astype(int)
+    lo = np.clip(center - band, 0, m)
+    hi = np.clip(center + band, 0, m)
+    width = int((hi - lo).max()) + 1
+    rows = np.arange(n + 1)
+    cols = lo[:, None] + np.arange(width)
+    in_band = cols <= hi[:, None]
+    cols = np.minimum(cols, m)
+
+    # Cost of ending each bead type at every band cell, all computed up front
+    bead_costs = {}
+    with np.errstate(invalid='ignore'):
+        for di, dj in _BEADS[1:]:
+            bn_part = np.where(rows >= di, bn_cum[rows] - bn_cum[np.maximum(rows - di, 0)], np.nan)
+            en_part = np.where(cols >= dj, en_cum[cols] - en_cum[np.maximum(cols - dj, 0)], np.nan)
+            step = _bead_cost(bn_part[:, None], en_part, ratio, variance, (di, dj))
+            bead_costs[di, dj] = np.where(in_band & np.isfinite(step), step, np.inf)
+
+    cost = np.full((n + 1, width), np.inf)
+    back = np.zeros((n + 1, width), dtype=np.int8)
+    cost[0, 0] = 0.0
+    span = np.arange(width)
+
+    for i in range(n + 1):
+        best = cost[i].copy()
+        move = np.zeros(width, dtype=np.int8)
+        for code, (di, dj) in enumerate(_BEADS[1:5], start=1):
+            if i < di:
+                continue
+            # Band index of (i - di, j - dj) in the source row
+            source = span + (lo[i] - lo[i - di] - dj)
+            ok = (source >= 0) & (source < width)
+            total = np.where(ok, cost[i - di, np.clip(source, 0, width - 1)], np.inf)
+            total += bead_costs[di, dj][i]
+            better = total < best
+            best[better] = total[better]
+            move[better] = code
+
+        # 0:1 beads chain along the row: cost[k] = min(best[k], cost[k-1] + skip[k]),
+        # which is the running minimum of best - prefix(skip) shifted back by prefix(skip)
+        skip = bead_costs[0, 1][i].copy()
+        skip[0] = 0.0  # the row's first cell has no left neighbour
+        skip[~np.isfinite(skip)] = 0.0  # past hi[i]; best is infinite there anyway
+        prefix = np.cumsum(skip)
+        chained = np.minimum.accumulate(best - prefix) + prefix
+        # best - prefix + prefix can round below best; only a real improvement counts
+        from_left = (chained < best - 1e-9) & in_band[i]
+        cost[i] = np.where(from_left, chained, best)
+        back[i] = np.where(from_left, 5, move)
+
+    # Walk the backpointers from (n, m)
+    pairs = []
+    i, j = n, m
+    if not np.isfinite(cost[n, m - lo[n]]):
+        return pairs
+    while i > 0 or j > 0:
+        code = back[i, j - lo[i]]
+        if code == 0:
+            break
+        di, dj = _BEADS[code]
+        if di and dj:
+            bn = ' '.join(bn_sents[i - di:i])
+            en = ' '.join(en_sents[j - dj:j])
+            if ratio_range is None or _within_ratio(bn, en, ratio_range):
+                pairs.append((bn, en))
+        i, j = i - di, j - dj
+    pairs.reverse()
+    return pairs
+
+
+def align_greedy(bn_sents: Sequence[str], en_sents: Sequence[str],
+                 ratio_range: Tuple[float, float] = ALIGN_CONFIG['ratio_range']
+                 ) -> List[Tuple[str, str]]:
+    """
+    The original one-pass matcher: pair sentences in order while their
+    length ratio is reasonable, otherwise skip the shorter one. Kept for
+    comparison; it loses sync after any split or merged sentence.
+    """
+    aligned = []
+    bn_idx = en_idx = 0
+    low, high = ratio_range
+    while bn_idx < len(bn_sents) and en_idx < len(en_sents):
+        bn_sent = bn_sents[bn_idx]
+        en_sent = en_sents[en_idx]
+        ratio = len(bn_sent) / len(en_sent) if len(en_sent) > 0 else 0
+        if low <= ratio <= high:
+            aligned.append((bn_sent, en_sent))
+            bn_idx += 1
+            en_idx += 1
+        elif len(bn_sent) < len(en_sent):
+            bn_idx += 1
+        else:
+            en_idx += 1
+    return aligned
@@ -0,0 +1,158 @@
+"""
+Cross-lingual article matching features.
+
+A Bengali article and its English edition rarely share a URL, but they do
+share facts that survive translation: the publication date, the numbers in
+the text, the names of people and places, and roughly the length. Each
+article is reduced to those features once; score() compares two feature
+sets. Names are compared as consonant skeletons, so ঢাকা and Dhaka, or
+হাসিনা and Hasina, reduce to the same key without a transliteration model.
+"""
+import math
+import re
+from datetime import date
+from typing import Dict, Iterable, Optional, Set
+
+MATCH_WEIGHTS = {'numerals': 0.4, 'entities': 0.3, 'length': 0.2, 'date': 0.1}
+# English characters per Bengali character in translated news text
+LENGTH_RATIO = 1.1
+
+_BN_DIGITS = str.maketrans('০১২৩৪৫৬৭৮৯', '0123456789')
+_NUMBER = re.compile(r'\d+(?:[,.]\d+)*')
+_ISO_DATE = re.compile(r'(\d{4})-(\d{1,2})-(\d{1,2})')
+# Bengali month names carry vowel signs, which \w does not match
+_MONTH_NAME = r'([A-Za-z]+|[ঀ-৿]+)'
+_DAY_MONTH_YEAR = re.compile(r'(\d{1,2})\s+' + _MONTH_NAME + r',?\s+(\d{4})')
+_MONTH_DAY_YEAR = re.compile(_MONTH_NAME + r'\s+(\d{1,2}),?\s+(\d{4})')
+
+_MONTHS = {
+    'জানুয়ারি': 1, 'ফেব্রুয়ারি': 2, 'মার্চ': 3, 'এপ্রিল': 4, 'মে': 5, 'জুন': 6,
+    'জুলাই': 7, 'আগস্ট': 8, 'সেপ্টেম্বর': 9, 'অক্টোবর': 10, 'নভেম্বর': 11, 'ডিসেম্বর': 12,
+}
+for _i, _name in enumerate(('january', 'february', 'march', 'april', 'may', 'june', 'july',
+                            'august', 'september', 'october', 'november', 'december'), 1):
+    _MONTHS[_name] = _MONTHS[_name[:3]] = _i
+_MONTHS['sept'] = 9
+
+# Bengali consonants to the Latin consonant an English spelling would use; vowels are dropped
+_BN_CONSONANTS = {
+    'ক': 'k', 'খ': 'k', 'গ': 'g', 'ঘ': 'g', 'ঙ': 'n', 'চ': 'c', 'ছ': 'c', 'জ': 'j', 'ঝ': 'j',
+    'ঞ': 'n', 'ট': 't', 'ঠ': 't', 'ড': 'd', 'ঢ': 'd', 'ণ': 'n', 'ত': 't', 'থ': 't', 'দ': 'd',
+    'ধ': 'd', 'ন': 'n', 'প': 'p', 'ফ': 'f', 'ব': 'b', 'ভ': 'b', 'ম': 'm', 'য': 'j', 'র': 'r',
+    'ল': 'l', 'শ': 's', 'ষ': 's', 'স': 's', '\u09dc': 'r', '\u09dd': 'r', 'ৎ': 't', 'ং': 'ng',
+}
+# Letters with a nukta, as the decomposed pairs often found in scraped text, to their single code points
+_BN_NUKTA = {'\u09a1\u09bc': '\u09dc', '\u09a2\u09bc': '\u09dd', '\u09af\u09bc': '\u09df'}
+# Digraphs first, then single letters; h and vowels are dropped
+_EN_DIGRAPHS = (('ph', 'f'), ('sh', 's'), ('ch', 'c'), ('kh', 'k'), ('gh', 'g'), ('th', 't'),
+                ('dh', 'd'), ('bh', 'b'), ('ck', 'k'), ('q', 'k'), ('x', 'ks'), ('z', 'j'),
+                ('v', 'b'), ('w', 'b'))
+_EN_DROP = re.compile(r'[aeiouyh]')
+_EN_NAME = re.compile(r'\b[A-Z][a-z]{2,}')
+_BN_WORD = re.compile(r'[ঀ-৿]{2,}')
+# Capitalized words that are rarely names
+_EN_STOPWORDS = frozenset('''the this that these those there their they then than when where what
+which while with without within from into about after before also among and are because but
+for has have however its not our said says since some such was were will would his her him
+she you your who how monday tuesday wednesday thursday friday saturday sunday january february
+march april may june july august september october november december'''.split())
+
+
+def parse_day(text: str) -> Optional[int]:
+    """Ordinal day of a date written as ISO, '1 March 2023', 'March 1, 2023' or '১ মার্চ ২০২৩'"""
+    if not text:
+        return None
+    text = text.translate(_BN_DIGITS)
+    match = _ISO_DATE.search(text)
+    try:
+        if match:
+            return date(int(match.group(1)), int(match.group(2)), int(match.group(3))).toordinal()
+        match = _DAY_MONTH_YEAR.search(text)
+        if match and match.group(2).lower() in _MONTHS:
+            return date(int(match.group(3)), _MONTHS[match.group(2).lower()],
+                        int(match.group(1))).toordinal()
+        match = _MONTH_DAY_YEAR.search(text)
+        if match and match.group(1).lower() in _MONTHS:
+            return date(int(match.group(3)), _MONTHS[match.group(1).lower()],
+                        int(match.group(2))).toordinal()
+    except ValueError:
+        return None
+    return None
+
+
+def numerals(text: str) -> Set[str]:
+    """Numbers of two or more digits, Bengali digits converted and separators removed"""
+    found = set()
+    for number in _NUMBER.findall(text.translate(_BN_DIGITS)):
+        digits = number.replace(',', '').rstrip('.')
+        if len(digits.replace('.', '')) >= 2:
+            found.add(digits)
+    return found
+
+
+def _squeeze(skeleton: str) -> str:
+    return re.sub(r'(.)\1+', r'\1', skeleton)
+
+
+def bengali_skeleton(word: str) -> str:
+    for decomposed, composed in _BN_NUKTA.items():
+        word = word.replace(decomposed, composed)
+    return _squeeze(''.join(_BN_CONSONANTS.get(ch, '') for ch in word))
+
+
+def english_skeleton(word: str) -> str:
+    word = word.lower()
+    for digraph, consonant in _EN_DIGRAPHS:
+        word = word.replace(digraph, consonant)
+    return _squeeze(_EN_DROP.sub('', word))
+
+
+def bengali_entities(text: str) -> Set[str]:
+    """Skeletons of every Bengali word; names are not marked in Bengali script"""
+    return {s for s in map(bengali_skeleton, _BN_WORD.findall(text)) if len(s) >= 2}
+
+
+def english_entities(text: str) -> Set[str]:
+    """Skeletons of capitalized words that are not common sentence starters"""
+    return {s for s in (english_skeleton(w) for w in _EN_NAME.findall(text)
+                        if w.lower() not in _EN_STOPWORDS) if len(s) >= 2}
+
+
+def features(article: Dict, lang: str) -> Dict:
+    """Matching features of an extracted article in language lang ('bn' or 'en')"""
+    text = f"{article.get('title', '')} {article.get('content', '')}"
+    entities = bengali_entities(text) if lang == 'bn' else english_entities(text)
+    return {
+        'day': parse_day(article.get('date', '')),
+        'numerals': sorted(numerals(text)),
+        'entities': sorted(entities),
+        'length': len(article.get('content', '')),
+    }
+
+
+def _overlap(a: Iterable[str], b: Iterable[str]) -> float:
+    a, b = set(a), set(b)
+    if not a or not b:
+        return 0.0
+    return len(a & b) / min(len(a), len(b))
+
+
+def score(bn: Dict, en: Dict, date_window: int = 1) -> float:
+    """Weighted similarity in [0, 1] of a Bengali and an English feature set"""
+    en_entities = set(en['entities'])
+    entities = len(en_entities & set(bn['entities'])) / len(en_entities) if en_entities else 0.0
+
+    length = 0.0
+    if bn['length'] and en['length']:
+        ratio = en['length'] / (bn['length'] * LENGTH_RATIO)
+        length = max(0.0, 1 - abs(math.log(ratio)) / math.log(3))
+
+    day = 0.0
+    if bn['day'] is not None and en['day'] is not None:
+        gap = abs(bn['day'] - en['day'])
+        day = 1.0 if gap == 0 else 0.5 if gap <= date_window else 0.0
+
+    return (MATCH_WEIGHTS['numerals'] * _overlap(bn['numerals'], en['numerals'])
+            + MATCH_WEIGHTS['entities'] * entities
+            + MATCH_WEIGHTS['length'] * length
+            + MATCH_WEIGHTS['date'] * day)
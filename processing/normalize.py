@@ -0,0 +1,55 @@
+"""
+Text normalization shared by DatasetBuilder and TextCleaner.
+
+Patterns are compiled once at import. Character filtering has a
+translate-table fast path for ASCII text (most English sentences), which
+is an order of magnitude cheaper than a regex substitution; other text
+goes through one precompiled regex per document.
+"""
+import re
+from typing import Iterable, List
+
+# Punctuation kept besides Bengali script (U+0980-U+09FF), whitespace and word characters
+KEPT_PUNCTUATION = '.?!,\'"()-'
+
+_DROP = re.compile(r'[^ঀ-৿\s\w' + re.escape(KEPT_PUNCTUATION) + ']')
+# Same, but keeps the danda so documents can be filtered before splitting
+_DROP_EXCEPT_DANDA = re.compile(r'[^ঀ-৿\s\w।' + re.escape(KEPT_PUNCTUATION) + ']')
+# Split on । (Bengali full stop), . ! ?
+_SENTENCE_END = re.compile(r'[।\.\!\?]')
+
+_ASCII_TABLE = {
+    cp: cp if (chr(cp).isalnum() or chr(cp).isspace() or chr(cp) in '_' + KEPT_PUNCTUATION) else None
+    for cp in range(128)
+}
+
+
+def _filter_chars(text: str, pattern: re.Pattern = _DROP) -> str:
+    if text.isascii():
+        return text.translate(_ASCII_TABLE)
+    return pattern.sub('', text)
+
+
+def clean_text(text: str) -> str:
+    """Drop characters outside Bengali, word characters and basic punctuation; collapse whitespace"""
+    return ' '.join(_filter_chars(text).split())
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split text into stripped, non-empty sentences"""
+    return [s.strip() for s in _SENTENCE_END.split(text) if s.strip()]
+
+
+def sentences(text: str) -> List[str]:
+    """Filter a whole document once, then split it into clean, non-empty sentences"""
+    result = []
+    for sent in _SENTENCE_END.split(_filter_chars(text, _DROP_EXCEPT_DANDA)):
+        sent = ' '.join(sent.split())
+        if sent:
+            result.append(sent)
+    return result
+
+
+def normalize_documents(texts: Iterable[str]) -> List[List[str]]:
+    """Clean and split a batch of documents in one pass"""
+    return [sentences(text) for text in texts]
@@ -1,22 +1,151 @@
 import requests
-from bs4 import BeautifulSoup
-from .config import USER_AGENT
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urljoin, urlparse
+from .config import USER_AGENT, DISCOVERY_CONFIG, FETCH_CONFIG, PARSER_CONFIG
+from .fetcher import AsyncFetcher
+from .http_cache import HTTPCache
+from .metrics import METRICS
+from .parsing import build_strainer, default_backend, parse_html
+from .resilience import RETRY_STATUSES, backoff_delay, parse_retry_after
+from .sitemap import parse_sitemap
 import logging
 
 class BaseScraper:
-    def __init__(self, source_config):
+    # Selectors extract_article reads. In subtree mode (BeautifulSoup
+    # backends only) just the elements they can match are built; an empty
+    # list means parse the whole page.
+    parse_selectors: List[str] = []
+
+    def __init__(self, source_config, fetcher: Optional[AsyncFetcher] = None,
+                 cache: Optional[HTTPCache] = None,
+                 parser: Optional[str] = PARSER_CONFIG['backend'],
+                 subtree: bool = PARSER_CONFIG['subtree']):
+        self.source_config = source_config
         self.base_url = source_config['base_url']
+        self.host = urlparse(self.base_url).netloc
         self.article_selector = source_config['article_selector']
         self.headers = {'User-Agent': USER_AGENT}
-        
-    def get_page(self, url):
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        self.cache = cache
+        self.fetcher = fetcher or AsyncFetcher(self.headers, cache=cache)
+        self._prefetched: Dict[str, Optional[str]] = {}
+        self.parser = parser or default_backend()
+        # The native lxml backend always builds the whole tree
+        self.subtree = subtree and self.parser != 'lxml-native'
+        self._strainers = {}
+
+    def prefetch(self, urls: Iterable[str]):
+        """
+        Fetch a batch of URLs concurrently ahead of extraction.
+        The next get_page() call for each URL is served from this buffer,
+        so extract_article implementations need no changes.
+        """
+        urls = [url for url in urls if url not in self._prefetched]
+        self._prefetched.update(self.fetcher.fetch_all(urls))
+
+    def extract_from_html(self, url, html: str):
+        """Run extract_article over a page that was already fetched"""
+        self._prefetched[url] = html
         try:
-            response = requests.get(url, headers=self.headers)
-            response.raise_for_status()
-            return BeautifulSoup(response.text, 'html.parser')
-        except Exception as e:
-            logging.error(f"Error fetching {url}: {str(e)}")
+            return self.extract_article(url)
+        finally:
+            self._prefetched.pop(url, None)
+
+    def discard_prefetched(self):
+        """Drop buffered pages that were never consumed"""
+        self._prefetched.clear()
+
+    def fetch(self, url) -> Optional[str]:
+        """
+        Return the page body for url, or None on failure. Shares retry policy
+        and circuit breaker with the async fetcher.
+        """
+        if url in self._prefetched:
+            return self._prefetched.pop(url)
+        host = urlparse(url).netloc
+        entry, body, headers = self.cache.prepare(url) if self.cache else (None, None, {})
+        if body is not None:
+            METRICS.inc('fetch_requests_total', host=host, outcome='cache')
+            return body
+        breaker = self.fetcher.breaker
+        timeout = (FETCH_CONFIG['connect_timeout'], FETCH_CONFIG['read_timeout'])
+        for attempt in range(self.fetcher.retries + 1):
+            if not breaker.allow(host):
+                METRICS.inc('fetch_requests_total', host=host, outcome='circuit_open')
+                logging.debug(f"Skipping {url}: circuit for {host} is open")
+                return None
+            start = time.perf_counter()
+            outcome = 'error'
+            retry_after = None
+            # Recorded with the breaker on every way out, so a half-open probe is never left hanging
+            host_up = False
+            try:
+                response = self.session.get(url, headers=headers, timeout=timeout)
+                outcome = str(response.status_code)
+                if response.status_code == 304 and self.cache:
+                    host_up = True
+                    return self.cache.resolve(url, entry, 304, None, response.headers)
+                if response.status_code in RETRY_STATUSES:
+                    retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                    error = f"HTTP {response.status_code}"
+                else:
+                    response.raise_for_status()
+                    METRICS.inc('fetch_bytes_total', len(response.content), host=host)
+                    host_up = True
+                    if self.cache:
+                        self.cache.resolve(url, entry, response.status_code,
+                                           response.text, response.headers)
+                    return response.text
+            except requests.HTTPError as e:
+                # A 4xx other than 429: the host is up and a retry will not help
+                host_up = True
+                logging.error(f"Error fetching {url}: {str(e)}")
+                return None
+            except requests.RequestException as e:
+                error = str(e)
+            except Exception as e:
+                logging.error(f"Error fetching {url}: {str(e)}")
+                return None
+            finally:
+                if host_up:
+                    breaker.record_success(host)
+                else:
+                    breaker.record_failure(host)
+                METRICS.observe('fetch_seconds', time.perf_counter() - start, host=host)
+                METRICS.inc('fetch_requests_total', host=host, outcome=outcome)
+
+            delay = backoff_delay(attempt, retry_after) if attempt < self.fetcher.retries else None
+            if delay is None:
+                logging.error(f"Error fetching {url} after {attempt + 1} attempts: {error}")
+                return None
+            METRICS.inc('fetch_retries_total', host=host)
+            time.sleep(delay)
+        return None
+
+    def is_unchanged(self, url) -> bool:
+        """True if the last fetch of url was answered from the cache"""
+        return bool(self.cache) and url in self.cache.unchanged
+
+    def get_page(self, url, selectors: Optional[List[str]] = None):
+        """
+        Fetch and parse a page. selectors defaults to parse_selectors and
+        limits parsing to the subtrees they need when subtree mode is on.
+        """
+        text = self.fetch(url)
+        if text is None:
+            return None
+        with METRICS.timer('parse_seconds', backend=self.parser):
+            return parse_html(text, self.parser, self._strainer(selectors or self.parse_selectors))
+
+    def _strainer(self, selectors: List[str]):
+        if not (self.subtree and selectors):
             return None
+        key = tuple(selectors)
+        if key not in self._strainers:
+            self._strainers[key] = build_strainer(selectors)
+        return self._strainers[key]
 
     def extract_article(self, url):
         """
@@ -36,18 +165,80 @@ class BaseScraper:
             'language': ''
         }
     
-    def discover_article_urls(self, list_url):
-        """Get article URLs from a listing page"""
-        soup = self.get_page(f"{self.base_url}{list_url}")
+    def discovery_entries(self) -> List[str]:
+        """Sitemaps first, as they list many articles per request, then listing pages"""
+        return list(self.source_config.get('sitemaps', [])) + list(self.source_config['list_urls'])
+
+    def iter_article_urls(self, entry: str) -> Iterator[str]:
+        """
+        Lazily yield article URLs for one discovery entry: a sitemap (an
+        entry ending in .xml) or a listing page, whose pagination is followed
+        up to DISCOVERY_CONFIG['max_pages']. Pages are fetched only as the
+        caller consumes URLs, so abandoning the generator stops discovery.
+        """
+        url = entry if entry.startswith('http') else f"{self.base_url}{entry}"
+        if urlparse(url).path.endswith('.xml'):
+            yield from self._iter_sitemap(url)
+        else:
+            yield from self._iter_listing(url)
+
+    def _iter_listing(self, url: str) -> Iterator[str]:
+        seen, pages = set(), set()
+        for _ in range(DISCOVERY_CONFIG['max_pages']):
+            pages.add(url)
+            urls, next_url = self.discover_page(url)
+            fresh = [u for u in dict.fromkeys(urls) if u not in seen]
+            if not fresh:
+                # Past the last page, or a site that ignores the page parameter
+                return
+            seen.update(fresh)
+            yield from fresh
+            if not next_url or next_url in pages:
+                return
+            url = next_url
+
+    def _iter_sitemap(self, url: str, nested: bool = False) -> Iterator[str]:
+        text = self.fetch(url)
+        if text is None:
+            return
+        kind, locations = parse_sitemap(text)
+        if kind == 'sitemapindex':
+            if nested:
+                logging.warning(f"Ignoring sitemap index nested in {url}")
+                return
+            for child in locations[:DISCOVERY_CONFIG['max_sitemaps']]:
+                yield from self._iter_sitemap(child, nested=True)
+            return
+        for location in locations:
+            if self.is_article_url(location):
+                yield location
+
+    def is_article_url(self, url: str) -> bool:
+        """
+        Article pages of this source in the edition it crawls; sitemaps also
+        list section pages and, on shared hosts, the other language's articles
+        """
+        parsed = urlparse(url)
+        if parsed.netloc != self.host or parsed.path.count('/') < 2:
+            return False
+        if self.source_config.get('edition', 'bn') == 'en':
+            return '/bn/' not in parsed.path
+        return '/en/' not in parsed.path
+
+    def discover_page(self, page_url: str) -> Tuple[List[str], Optional[str]]:
+        """Article URLs on one listing page and the URL of the next page, if any"""
+        link_selector = self.source_config['link_selector']
+        next_selector = self.source_config.get('next_selector', DISCOVERY_CONFIG['next_selector'])
+        soup = self.get_page(page_url, [link_selector, next_selector])
         if not soup:
-            return []
-            
-        links = soup.select(self.source_config['link_selector'])
-        urls = []
-        for link in links:
-            href = link.get('href')
-            if href:
-                if not href.startswith('http'):
-                    href = f"{self.base_url}{href}"
-                urls.append(href)
-        return urls
+            return [], None
+
+        urls = [urljoin(page_url, link.get('href'))
+                for link in soup.select(link_selector) if link.get('href')]
+        next_link = soup.select_one(next_selector)
+        next_url = urljoin(page_url, next_link.get('href')) if next_link and next_link.get('href') else None
+        return urls, next_url
+
+    def discover_article_urls(self, list_url):
+        """Get article URLs from the first page of a listing"""
+        return self.discover_page(f"{self.base_url}{list_url}")[0]
@@ -1,8 +1,23 @@
+# Each source is fully described here. 'extract' is compiled once into an
+# ExtractionPlan (scrapers/extraction.py):
+#   title, content, date  CSS selectors; content joins every match, date may
+#                         be {'selector': ..., 'attr': ...} to read an attribute
+#   language              {'html_lang': 'bn'}       bn if <html lang> starts with it
+#                         {'url_contains': '/bangla/'} bn if the URL contains it
+#                         {'url_lacks': '/en/'}      bn unless the URL contains it
+# 'scraper' optionally names the scraper class by dotted path; sources without
+# one use the generic config-driven NewsScraper.
 NEWS_SOURCES = {
     'prothomalo': {
         'base_url': 'https://www.prothomalo.com',
         'article_selector': 'article.story-card',
         'link_selector': 'a.link-overlay',
+        'extract': {
+            'title': 'h1.title',
+            'content': 'div.story-element p',
+            'date': {'selector': 'time', 'attr': 'datetime'},
+            'language': {'html_lang': 'bn'}
+        },
         'list_urls': [
             '/international',
             '/sports',
@@ -13,6 +28,12 @@ NEWS_SOURCES = {
         'base_url': 'https://www.ittefaq.com.bd',
         'article_selector': 'div.news-item',
         'link_selector': 'h3.title a',
+        'extract': {
+            'title': 'h2.title-news',
+            'content': 'div.dtl-news-txt p',
+            'date': 'div.news-time',
+            'language': {'url_contains': '/bangla/'}
+        },
         'list_urls': [
             '/international',
             '/sports-news',
@@ -23,6 +44,12 @@ NEWS_SOURCES = {
         'base_url': 'https://www.banglatribune.com',
         'article_selector': 'div.article-box',
         'link_selector': 'h3.title a',
+        'extract': {
+            'title': 'h1.title',
+            'content': 'div.article-details p',
+            'date': 'div.time',
+            'language': {'url_lacks': '/en/'}
+        },
         'list_urls': [
             '/world',
             '/sports',
@@ -33,6 +60,12 @@ NEWS_SOURCES = {
         'base_url': 'https://www.bd-pratidin.com',
         'article_selector': 'div.all-news-content',
         'link_selector': 'h3.news-title a',
+        'extract': {
+            'title': 'h2.news-title',
+            'content': 'div.news-details p',
+            'date': 'span.time',
+            'language': {'url_contains': '/bangla/'}
+        },
         'list_urls': [
             '/first-page',
             '/country',
@@ -46,6 +79,12 @@ NEWS_SOURCES = {
         'base_url': 'https://www.dailyjanakantha.com',
         'article_selector': 'div.news-card',
         'link_selector': 'h2.title a',
+        'extract': {
+            'title': 'h1.news-title',
+            'content': 'div.news-content p',
+            'date': 'span.date',
+            'language': {'url_contains': '/bangla/'}
+        },
         'list_urls': [
             '/bangladesh',
             '/international',
@@ -58,6 +97,12 @@ NEWS_SOURCES = {
         'base_url': 'https://www.jaijaidinbd.com',
         'article_selector': 'div.news-box',
         'link_selector': '.news-title a',
+        'extract': {
+            'title': 'h2.article-title',
+            'content': 'div.article-text p',
+            'date': 'div.publish-date',
+            'language': {'url_lacks': '/en/'}
+        },
         'list_urls': [
             '/national',
             '/international',
@@ -69,3 +114,98 @@ NEWS_SOURCES = {
 }
 
 USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+# Network settings shared by BaseScraper and AsyncFetcher
+FETCH_CONFIG = {
+    'concurrency': 16,    # requests in flight across all hosts
+    'per_host': 4,        # keep-alive connections per outlet
+    'timeout': 30,        # seconds per attempt, end to end
+    'connect_timeout': 10,
+    'read_timeout': 20,   # seconds without receiving data
+    'retries': 3,         # extra attempts after a timeout, connection error, 429 or 5xx
+    'backoff_base': 0.5,  # seconds; attempt n waits up to base * 2**n, jittered
+    'backoff_max': 30,    # longest wait between attempts, Retry-After included
+    'breaker_failures': 5,   # consecutive failures that open a host's circuit
+    'breaker_reset': 60      # seconds an open circuit rejects requests before a probe
+}
+
+# Article discovery (BaseScraper.iter_article_urls). A source may set its own
+# 'next_selector' and list 'sitemaps': paths of sitemap.xml files, sitemap
+# indexes or news sitemaps, read before its list_urls.
+DISCOVERY_CONFIG = {
+    'next_selector': 'a[rel~="next"], link[rel~="next"]',
+    'max_pages': 20,      # listing pages followed per list_urls entry
+    'max_sitemaps': 50    # child sitemaps read from a sitemap index, newest first
+}
+
+# Bilingual matching (scraping/article_index.py). A source with an 'english'
+# entry, e.g. {'base_url': ..., 'list_urls': [...]}, has its English sections
+# crawled into an index, and Bengali articles are paired with the best
+# scoring indexed article instead of a guessed /bn/ -> /en/ URL. Keys in the
+# entry other than list_urls and sitemaps override the source's own, so an
+# English edition on another host can use its own selectors.
+MATCH_CONFIG = {
+    'english_per_article': 2,   # English pages indexed per run, per Bengali article budgeted
+    'date_window': 1,           # days either side of the Bengali date searched
+    'min_score': 0.6,           # lowest score accepted; length and date alone stay below it
+    'max_candidates': 500       # English articles scored per Bengali article
+}
+
+# English counterparts guessed by URL rewriting (scraping/counterparts.py), for
+# sources without an 'english' entry. A source may list its own
+# 'counterpart_rules'. Counterpart URLs are probed with HEAD, or a one-byte
+# range GET where HEAD is refused, before the page is downloaded; misses are
+# remembered for negative_ttl, and a rule that keeps missing is dropped.
+COUNTERPART_CONFIG = {
+    'rules': [('/bn/', '/en/')],   # (find, replace) applied to the Bengali URL
+    'negative_ttl': 7 * 24 * 3600,  # seconds a 404 or unextractable URL is not retried
+    'probe_below': 0.8,    # hit rate under which a rule's URLs are probed before the GET
+    'rule_attempts': 300,  # lookups before a rule's hit rate is judged
+    'rule_min_hits': 0.01  # hit rate below which a judged rule is no longer tried
+}
+
+# On-disk HTTP response cache (scrapers/http_cache.py)
+CACHE_CONFIG = {
+    'dir': 'data/cache/http',
+    'max_bytes': 512 * 1024 * 1024,
+    'fresh_for': 3600     # seconds a response is reused without revalidation
+}
+
+# Work-queue crawling (scraping/work_queue.py, scraping/queue_worker.py)
+QUEUE_CONFIG = {
+    'batch': 32,          # tasks leased at once by a worker
+    'visibility': 300,    # seconds a lease lasts without a heartbeat
+    'heartbeat': 60,      # seconds between lease extensions while a batch is worked on
+    'max_attempts': 3,    # leases of a task before it is set aside as dead
+    'retry_delay': 30,    # seconds before a failed task is retried, times its attempts
+    'poll': 2.0           # seconds an idle worker waits before asking again
+}
+
+# Raw page archive (scrapers/page_archive.py): every fetched page, kept so
+# extraction and alignment can be rerun offline with main.py --from-archive
+ARCHIVE_CONFIG = {
+    'segment_bytes': 256 * 1024 * 1024,  # compressed size at which a new segment is started
+    'compress_level': 6
+}
+
+# HTML parsing (scrapers/parsing.py). backend None picks the fastest one
+# installed, 'lxml-native' when lxml and cssselect are. 'lxml-native' builds
+# the whole tree in C and answers selectors through compiled XPath; the
+# other two build a BeautifulSoup tree with that parser. subtree only
+# applies to those two: it has them build just the elements a scraper's
+# selectors can match. 'lxml-native' has no equivalent and ignores it.
+PARSER_BACKENDS = ('lxml-native', 'lxml', 'html.parser')
+PARSER_CONFIG = {
+    'backend': None,
+    'subtree': True       # BeautifulSoup backends only
+}
+
+# Stage widths for the crawl pipeline (scraping/pipeline.py). The fetch width
+# is FETCH_CONFIG['concurrency']; None uses one worker process per CPU core.
+PIPELINE_CONFIG = {
+    'discover': 2,        # listing-page threads
+    'parse': None,        # extraction processes
+    'align': None,        # alignment processes
+    'queue_size': 64,     # items buffered between stages
+    'checkpoint_every': 30   # seconds between crawl checkpoints (scraping/checkpoint.py)
+}
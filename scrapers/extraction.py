@@ -0,0 +1,63 @@
+import json
+from typing import Callable, Dict, List, Optional
+
+from .parsing import CompiledSelector
+
+
+def _language_rule(rule: Dict[str, str]) -> Callable[[str, object], str]:
+    """Compile a NEWS_SOURCES language rule into fn(url, doc) -> 'bn' | 'en'"""
+    if 'html_lang' in rule:
+        prefix = rule['html_lang']
+        return lambda url, doc: 'bn' if doc.document_lang.startswith(prefix) else 'en'
+    if 'url_contains' in rule:
+        marker = rule['url_contains']
+        return lambda url, doc: 'bn' if marker in url else 'en'
+    if 'url_lacks' in rule:
+        marker = rule['url_lacks']
+        return lambda url, doc: 'en' if marker in url else 'bn'
+    raise ValueError(f"Unknown language rule: {rule}")
+
+
+class ExtractionPlan:
+    """
+    A source's 'extract' rules with every selector compiled up front.
+    Executing a plan is the same handful of selector calls for any source.
+    """
+
+    def __init__(self, rules: Dict):
+        date = rules['date']
+        if isinstance(date, str):
+            date = {'selector': date}
+        self.title = CompiledSelector(rules['title'])
+        self.content = CompiledSelector(rules['content'])
+        self.date = CompiledSelector(date['selector'])
+        self.date_attr: Optional[str] = date.get('attr')
+        self.language = _language_rule(rules['language'])
+        # What subtree parsing has to keep for this plan
+        self.parse_selectors: List[str] = [rules['title'], rules['content'], date['selector']]
+
+    def execute(self, url: str, doc) -> Dict:
+        """
+        Run the plan over a parsed page. Raises AttributeError when the title
+        or date element is missing, like the hand-written scrapers did.
+        """
+        date_node = self.date.select_one(doc)
+        return {
+            'url': url,
+            'title': self.title.select_one(doc).text.strip(),
+            'content': ' '.join(p.text.strip() for p in self.content.select(doc)),
+            'date': date_node.get(self.date_attr, '') if self.date_attr else date_node.text.strip(),
+            'language': self.language(url, doc)
+        }
+
+
+_PLANS: Dict[str, ExtractionPlan] = {}
+
+
+def get_plan(source_config: Dict) -> ExtractionPlan:
+    """Return the compiled plan for a source, compiling it on first use"""
+    key = json.dumps(source_config['extract'], sort_keys=True)
+    plan = _PLANS.get(key)
+    if plan is None:
+        plan = _PLANS[key] = ExtractionPlan(source_config['extract'])
+    return plan
@@ -0,0 +1,179 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Iterable, Optional, Tuple
+from urllib.parse import urlparse
+
+import aiohttp
+
+from .config import FETCH_CONFIG
+from .http_cache import HTTPCache
+from .page_archive import PageArchive
+from .metrics import METRICS
+from .resilience import RETRY_STATUSES, CircuitBreaker, backoff_delay, parse_retry_after
+
+
+class AsyncFetcher:
+    """Concurrent page fetcher backed by aiohttp.
+
+    A single ``TCPConnector`` keeps a keep-alive pool per host; ``concurrency``
+    caps the requests in flight overall and ``per_host`` caps them per outlet.
+    With a ``cache``, fresh pages are served from disk and stale ones are
+    revalidated with conditional GETs. Failed attempts are retried with
+    backoff and counted by a per-host ``breaker`` (scrapers/resilience.py).
+    With an ``archive``, every page fetched is also kept in it for offline
+    re-extraction (scrapers/page_archive.py).
+    """
+
+    def __init__(self, headers: Optional[Dict[str, str]] = None,
+                 concurrency: int = FETCH_CONFIG['concurrency'],
+                 per_host: int = FETCH_CONFIG['per_host'],
+                 timeout: float = FETCH_CONFIG['timeout'],
+                 cache: Optional[HTTPCache] = None,
+                 retries: int = FETCH_CONFIG['retries'],
+                 breaker: Optional[CircuitBreaker] = None,
+                 archive: Optional[PageArchive] = None):
+        self.headers = headers or {}
+        self.cache = cache
+        self.archive = archive
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.timeout = timeout
+        self.retries = retries
+        self.breaker = breaker or CircuitBreaker()
+
+    def fetch_all(self, urls: Iterable[str]) -> Dict[str, Optional[str]]:
+        """Fetch all URLs concurrently; failed URLs map to None"""
+        return asyncio.run(self.fetch_all_async(urls))
+
+    async def fetch_all_async(self, urls: Iterable[str]) -> Dict[str, Optional[str]]:
+        urls = list(dict.fromkeys(urls))
+        if not urls:
+            return {}
+
+        async with self.session() as session:
+            bodies = await asyncio.gather(*(self.fetch(session, url) for url in urls))
+        return dict(zip(urls, bodies))
+
+    def session(self) -> aiohttp.ClientSession:
+        """Open a pooled session; use as ``async with fetcher.session() as s``"""
+        connector = aiohttp.TCPConnector(limit=self.concurrency,
+                                         limit_per_host=self.per_host)
+        timeout = aiohttp.ClientTimeout(total=self.timeout,
+                                        sock_connect=FETCH_CONFIG['connect_timeout'],
+                                        sock_read=FETCH_CONFIG['read_timeout'])
+        return aiohttp.ClientSession(headers=self.headers, connector=connector,
+                                     timeout=timeout)
+
+    async def fetch(self, session: aiohttp.ClientSession, url: str) -> Optional[str]:
+        """Fetch one URL within a session from session(); None on failure"""
+        return (await self.fetch_status(session, url))[1]
+
+    async def fetch_status(self, session: aiohttp.ClientSession,
+                           url: str) -> Tuple[Optional[int], Optional[str]]:
+        """
+        Like fetch(), but also returns the final HTTP status: 200 for pages
+        served from the cache, None when no response was received
+        """
+        status, body = await self._fetch_status(session, url)
+        if body is not None and self.archive is not None:
+            self.archive.add(url, body)
+        return status, body
+
+    async def _fetch_status(self, session: aiohttp.ClientSession,
+                            url: str) -> Tuple[Optional[int], Optional[str]]:
+        host = urlparse(url).netloc
+        entry, body, headers = self.cache.prepare(url) if self.cache else (None, None, {})
+        if body is not None:
+            METRICS.inc('fetch_requests_total', host=host, outcome='cache')
+            return 200, body
+        status = None
+        for attempt in range(self.retries + 1):
+            if not self.breaker.allow(host):
+                METRICS.inc('fetch_requests_total', host=host, outcome='circuit_open')
+                logging.debug(f"Skipping {url}: circuit for {host} is open")
+                return status, None
+            start = time.perf_counter()
+            outcome = 'error'
+            retry_after = None
+            # Recorded with the breaker on every way out, so a half-open probe is never left hanging
+            host_up = False
+            try:
+                async with session.get(url, headers=headers) as response:
+                    status = response.status
+                    outcome = str(status)
+                    if response.status == 304 and self.cache:
+                        host_up = True
+                        return 200, self.cache.resolve(url, entry, 304, None, response.headers)
+                    if response.status in RETRY_STATUSES:
+                        retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                        error = f"HTTP {response.status}"
+                    else:
+                        response.raise_for_status()
+                        raw = await response.read()
+                        text = await response.text()
+                        METRICS.inc('fetch_bytes_total', len(raw), host=host)
+                        host_up = True
+                        if self.cache:
+                            self.cache.resolve(url, entry, response.status, text, response.headers)
+                        return status, text
+            except aiohttp.ClientResponseError as e:
+                # A 4xx other than 429: the host is up and a retry will not help
+                host_up = True
+                logging.error(f"Error fetching {url}: {str(e)}")
+                return status, None
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error = str(e) or type(e).__name__
+            except Exception as e:
+                logging.error(f"Error fetching {url}: {str(e)}")
+                return status, None
+            finally:
+                if host_up:
+                    self.breaker.record_success(host)
+                else:
+                    self.breaker.record_failure(host)
+                METRICS.observe('fetch_seconds', time.perf_counter() - start, host=host)
+                METRICS.inc('fetch_requests_total', host=host, outcome=outcome)
+
+            delay = backoff_delay(attempt, retry_after) if attempt < self.retries else None
+            if delay is None:
+                logging.error(f"Error fetching {url} after {attempt + 1} attempts: {error}")
+                return status, None
+            METRICS.inc('fetch_retries_total', host=host)
+            await asyncio.sleep(delay)
+        return status, None
+
+    async def probe(self, session: aiohttp.ClientSession, url: str, method: str = 'head') -> Optional[int]:
+        """
+        Check that url exists without downloading it, with a HEAD request or
+        ('range') a GET for its first byte. Returns the status, or None when
+        no answer came back; a single attempt, since callers fall back to a
+        full fetch.
+        """
+        host = urlparse(url).netloc
+        if self.cache and self.cache.lookup(url):
+            return 200
+        if not self.breaker.allow(host):
+            return None
+        start = time.perf_counter()
+        outcome = 'error'
+        host_up = False
+        try:
+            if method == 'head':
+                request = session.head(url, allow_redirects=True)
+            else:
+                request = session.get(url, headers={'Range': 'bytes=0-0'})
+            async with request as response:
+                outcome = str(response.status)
+                host_up = response.status not in RETRY_STATUSES
+                return response.status
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logging.debug(f"Probe of {url} failed: {str(e) or type(e).__name__}")
+            return None
+        finally:
+            if host_up:
+                self.breaker.record_success(host)
+            else:
+                self.breaker.record_failure(host)
+            METRICS.observe('probe_seconds', time.perf_counter() - start, host=host)
+            METRICS.inc('probe_requests_total', host=host, method=method, outcome=outcome)
@@ -0,0 +1,209 @@
+import hashlib
+import logging
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Dict, Mapping, Optional, Set, Tuple
+
+from .config import CACHE_CONFIG
+
+_MAX_AGE = re.compile(r'max-age=(\d+)')
+
+
+class HTTPCache:
+    """
+    Persistent on-disk response cache.
+
+    Bodies are stored zlib-compressed under their SHA-256 digest, so identical
+    pages served at several URLs share one object. A small SQLite index maps
+    each URL to its digest plus the ETag/Last-Modified validators used for
+    conditional GETs. When the objects exceed ``max_bytes`` the least recently
+    used URLs are evicted.
+    """
+
+    def __init__(self, cache_dir: str = CACHE_CONFIG['dir'],
+                 max_bytes: int = CACHE_CONFIG['max_bytes'],
+                 fresh_for: int = CACHE_CONFIG['fresh_for']):
+        self.cache_dir = Path(cache_dir)
+        self.objects_dir = self.cache_dir / 'objects'
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.fresh_for = fresh_for
+        # URLs answered from the cache (fresh hit or 304) during this process
+        self.unchanged: Set[str] = set()
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.cache_dir / 'index.sqlite'),
+                                   check_same_thread=False)
+        self._db.executescript('''
+            CREATE TABLE IF NOT EXISTS entries (
+                url TEXT PRIMARY KEY,
+                digest TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS objects (
+                digest TEXT PRIMARY KEY,
+                size INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS entries_lru ON entries (last_access);
+        ''')
+        self._total = self._db.execute(
+            'SELECT COALESCE(SUM(size), 0) FROM objects').fetchone()[0]
+
+    def lookup(self, url: str) -> Optional[Dict]:
+        """Return the index entry for url, or None if it is not cached"""
+        with self._lock:
+            row = self._db.execute(
+                'SELECT digest, etag, last_modified, expires_at FROM entries WHERE url = ?',
+                (url,)).fetchone()
+        if not row:
+            return None
+        return {
+            'digest': row[0],
+            'etag': row[1],
+            'last_modified': row[2],
+            'fresh': row[3] > time.time()
+        }
+
+    def prepare(self, url: str) -> Tuple[Optional[Dict], Optional[str], Dict[str, str]]:
+        """
+        Look url up before a request.
+        Returns (entry, body, headers): body is set when the entry is still
+        fresh and no request is needed; otherwise headers holds the
+        conditional request headers to send.
+        """
+        entry = self.lookup(url)
+        if not entry:
+            return None, None, {}
+        if entry['fresh']:
+            body = self._read(entry['digest'])
+            if body is not None:
+                self._touch(url)
+                self.unchanged.add(url)
+                return entry, body, {}
+        headers = {}
+        if entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+        if entry['last_modified']:
+            headers['If-Modified-Since'] = entry['last_modified']
+        return entry, None, headers
+
+    def resolve(self, url: str, entry: Optional[Dict], status: int,
+                body: Optional[str], headers: Mapping[str, str]) -> Optional[str]:
+        """
+        Record the outcome of a request made with prepare()'s headers.
+        Returns the page body, reading it from disk on a 304.
+        """
+        if status == 304 and entry:
+            cached = self._read(entry['digest'])
+            if cached is not None:
+                self._touch(url, self._expires_at(headers))
+                self.unchanged.add(url)
+                return cached
+            return None
+        if body is not None and 'no-store' not in headers.get('Cache-Control', ''):
+            self.store(url, body, headers)
+        return body
+
+    def store(self, url: str, body: str, headers: Mapping[str, str]):
+        """Store a 200 response body and its validators"""
+        raw = body.encode('utf-8')
+        digest = hashlib.sha256(raw).hexdigest()
+        path = self._object_path(digest)
+        now = time.time()
+
+        with self._lock:
+            exists = self._db.execute(
+                'SELECT 1 FROM objects WHERE digest = ?', (digest,)).fetchone()
+            if not exists:
+                data = zlib.compress(raw, 6)
+                path.parent.mkdir(exist_ok=True)
+                tmp = path.with_suffix('.tmp')
+                tmp.write_bytes(data)
+                tmp.replace(path)
+                self._db.execute('INSERT INTO objects (digest, size) VALUES (?, ?)',
+                                 (digest, len(data)))
+                self._total += len(data)
+
+            old = self._db.execute('SELECT digest FROM entries WHERE url = ?',
+                                   (url,)).fetchone()
+            self._db.execute(
+                'INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)',
+                (url, digest, headers.get('ETag'), headers.get('Last-Modified'),
+                 self._expires_at(headers, now), now))
+            if old and old[0] != digest:
+                self._release(old[0])
+            self._evict()
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.commit()
+            self._db.close()
+
+    def _expires_at(self, headers: Mapping[str, str], now: Optional[float] = None) -> float:
+        now = now or time.time()
+        match = _MAX_AGE.search(headers.get('Cache-Control', ''))
+        if match:
+            return now + int(match.group(1))
+        expires = headers.get('Expires')
+        if expires:
+            try:
+                return parsedate_to_datetime(expires).timestamp()
+            except (TypeError, ValueError):
+                pass
+        return now + self.fresh_for
+
+    def _touch(self, url: str, expires_at: Optional[float] = None):
+        with self._lock:
+            if expires_at is None:
+                self._db.execute('UPDATE entries SET last_access = ? WHERE url = ?',
+                                 (time.time(), url))
+            else:
+                self._db.execute(
+                    'UPDATE entries SET last_access = ?, expires_at = ? WHERE url = ?',
+                    (time.time(), expires_at, url))
+            self._db.commit()
+
+    def _read(self, digest: str) -> Optional[str]:
+        try:
+            return zlib.decompress(self._object_path(digest).read_bytes()).decode('utf-8')
+        except (OSError, zlib.error) as e:
+            logging.warning(f"Dropping unreadable cache object {digest}: {str(e)}")
+            with self._lock:
+                self._db.execute('DELETE FROM entries WHERE digest = ?', (digest,))
+                self._release(digest)
+                self._db.commit()
+            return None
+
+    def _object_path(self, digest: str) -> Path:
+        return self.objects_dir / digest[:2] / digest[2:]
+
+    def _release(self, digest: str):
+        """Delete an object once no URL refers to it (caller holds the lock)"""
+        if self._db.execute('SELECT 1 FROM entries WHERE digest = ? LIMIT 1',
+                            (digest,)).fetchone():
+            return
+        row = self._db.execute('SELECT size FROM objects WHERE digest = ?',
+                               (digest,)).fetchone()
+        if row:
+            self._db.execute('DELETE FROM objects WHERE digest = ?', (digest,))
+            self._total -= row[0]
+        self._object_path(digest).unlink(missing_ok=True)
+
+    def _evict(self):
+        """Evict least recently used URLs until under max_bytes (caller holds the lock)"""
+        while self._total > self.max_bytes:
+            row = self._db.execute(
+                'SELECT url, digest FROM entries ORDER BY last_access LIMIT 1').fetchone()
+            if not row:
+                break
+            self._db.execute('DELETE FROM entries WHERE url = ?', (row[0],))
+            self._release(row[1])
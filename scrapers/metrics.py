@@ -0,0 +1,239 @@
+"""
+In-process metrics shared by every pipeline stage.
+
+Stages report into the module-level METRICS registry: counters via inc(),
+histograms via observe() or the timer() context manager. Worker processes
+have their own registry; they hand it back with drain() and the parent
+merges it, so the totals cover the whole run. At the end of a run write()
+exports a Prometheus text file and a JSON summary.
+"""
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Sequence, Tuple
+
+PREFIX = 'banglanlp_'
+
+# Upper bounds in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Upper bounds for per-item counts such as sentence pairs per article
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+# Upper bounds for similarity scores in [0, 1]
+SCORE_BUCKETS = (0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0)
+
+# Histograms that do not measure seconds
+_BUCKETS = {
+    'pairs_per_article': COUNT_BUCKETS,
+    'match_score': SCORE_BUCKETS,
+}
+
+_HELP = {
+    'fetch_seconds': 'HTTP fetch latency per host',
+    'fetch_requests_total': 'HTTP fetches per host and outcome',
+    'fetch_bytes_total': 'Response body bytes received per host',
+    'fetch_retries_total': 'Fetch attempts retried per host',
+    'breaker_opened_total': 'Times a host circuit breaker opened',
+    'probe_seconds': 'Counterpart existence probe latency per host',
+    'probe_requests_total': 'Counterpart existence probes per host, method and outcome',
+    'counterpart_total': 'English counterpart lookups per source and outcome',
+    'parse_seconds': 'HTML parse time per backend',
+    'extract_seconds': 'Article extraction time per source, parse included',
+    'align_seconds': 'Sentence alignment time per article pair',
+    'filter_seconds': 'Quality filter time per chunk',
+    'filter_pairs_total': 'Sentence pairs through the quality filters per outcome',
+    'write_seconds': 'Time spent writing per target',
+    'write_bytes_total': 'Bytes written per target',
+    'pairs_per_article': 'Aligned sentence pairs per article pair',
+    'articles_total': 'Article pairs handled per source and outcome',
+    'english_indexed_total': 'English articles added to the matching index per source',
+    'match_total': 'Bengali articles matched against the English index per source and outcome',
+    'match_score': 'Similarity of accepted Bengali-English matches per source',
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _finite(value: Optional[float]) -> Optional[float]:
+    return value if value is not None and value != float('inf') else None
+
+
+class Histogram:
+    """Fixed-bucket histogram; counts[i] is the number of values <= buckets[i]"""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def merge(self, other: 'Histogram'):
+        for i, n in enumerate(other.counts):
+            self.counts[i] += n
+        self.sum += other.sum
+        self.count += other.count
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Bucket upper bound below which a fraction q of values fall"""
+        if not self.count:
+            return None
+        target, seen = q * self.count, 0
+        for bound, n in zip(self.buckets + (float('inf'),), self.counts):
+            seen += n
+            if seen >= target:
+                return bound
+        return float('inf')
+
+
+class Metrics:
+    """Thread-safe registry of labelled counters and histograms"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: Dict[Tuple[str, Labels], float] = {}
+        self.histograms: Dict[Tuple[str, Labels], Histogram] = {}
+
+    @staticmethod
+    def _key(name: str, labels: Dict[str, object]) -> Tuple[str, Labels]:
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = Histogram(_BUCKETS.get(name, LATENCY_BUCKETS))
+            hist.observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels) -> Iterator[None]:
+        """Observe the wall time of the with-block into histogram name"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def drain(self) -> 'Metrics':
+        """Return everything recorded so far and start from zero"""
+        drained = Metrics()
+        with self._lock:
+            drained.counters, self.counters = self.counters, {}
+            drained.histograms, self.histograms = self.histograms, {}
+        return drained
+
+    def merge(self, other: Optional['Metrics']):
+        """Add another registry's values, e.g. one drained in a worker process"""
+        if other is None or other is self:
+            return
+        with self._lock:
+            for key, value in other.counters.items():
+                self.counters[key] = self.counters.get(key, 0) + value
+            for key, hist in other.histograms.items():
+                if key in self.histograms:
+                    self.histograms[key].merge(hist)
+                else:
+                    copy = self.histograms[key] = Histogram(hist.buckets)
+                    copy.merge(hist)
+
+    def __getstate__(self):
+        with self._lock:
+            return {'counters': dict(self.counters), 'histograms': dict(self.histograms)}
+
+    def __setstate__(self, state):
+        self._lock = threading.Lock()
+        self.counters = state['counters']
+        self.histograms = state['histograms']
+
+    # Export
+    def to_prometheus(self) -> str:
+        """Prometheus text exposition format"""
+        def fmt(labels: Labels, extra: Labels = ()) -> str:
+            pairs = labels + extra
+            if not pairs:
+                return ''
+            inner = ','.join(f'{k}="{_escape(v)}"' for k, v in pairs)
+            return '{' + inner + '}'
+
+        lines = []
+        with self._lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted(self.histograms.items(), key=lambda item: item[0])
+        typed = set()
+        for (name, labels), value in counters:
+            if name not in typed:
+                typed.add(name)
+                if name in _HELP:
+                    lines.append(f'# HELP {PREFIX}{name} {_HELP[name]}')
+                lines.append(f'# TYPE {PREFIX}{name} counter')
+            lines.append(f'{PREFIX}{name}{fmt(labels)} {_number(value)}')
+        for (name, labels), hist in histograms:
+            if name not in typed:
+                typed.add(name)
+                if name in _HELP:
+                    lines.append(f'# HELP {PREFIX}{name} {_HELP[name]}')
+                lines.append(f'# TYPE {PREFIX}{name} histogram')
+            cumulative = 0
+            for bound, n in zip(hist.buckets + (float('inf'),), hist.counts):
+                cumulative += n
+                le = '+Inf' if bound == float('inf') else f'{bound:g}'
+                lines.append(f'{PREFIX}{name}_bucket{fmt(labels, (("le", le),))} {cumulative}')
+            lines.append(f'{PREFIX}{name}_sum{fmt(labels)} {_number(hist.sum)}')
+            lines.append(f'{PREFIX}{name}_count{fmt(labels)} {hist.count}')
+        return '\n'.join(lines) + '\n'
+
+    def summary(self) -> Dict:
+        """JSON-friendly totals: counters, and count/sum/mean/p50/p90/p99 per histogram"""
+        def label_str(labels: Labels) -> str:
+            return ','.join(f'{k}={v}' for k, v in labels) or 'all'
+
+        result = {'counters': {}, 'histograms': {}}
+        with self._lock:
+            for (name, labels), value in sorted(self.counters.items()):
+                result['counters'].setdefault(name, {})[label_str(labels)] = value
+            for (name, labels), hist in sorted(self.histograms.items(), key=lambda item: item[0]):
+                result['histograms'].setdefault(name, {})[label_str(labels)] = {
+                    'count': hist.count,
+                    'sum': hist.sum,
+                    'mean': hist.sum / hist.count if hist.count else None,
+                    # None when the quantile falls in the +Inf bucket
+                    'p50': _finite(hist.quantile(0.5)),
+                    'p90': _finite(hist.quantile(0.9)),
+                    'p99': _finite(hist.quantile(0.99)),
+                }
+        return result
+
+    def write(self, directory: str, name: str = 'metrics'):
+        """Write <name>.prom and <name>.json into directory, each replaced atomically"""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        summary = json.dumps(self.summary(), indent=2)
+        for path, content in ((directory / f'{name}.prom', self.to_prometheus()),
+                              (directory / f'{name}.json', summary)):
+            tmp = path.with_name(path.name + '.tmp')
+            tmp.write_text(content, encoding='utf-8')
+            os.replace(tmp, path)
+
+
+METRICS = Metrics()
@@ -0,0 +1,28 @@
+import logging
+from .base_scraper import BaseScraper
+from .extraction import get_plan
+from .metrics import METRICS
+
+class NewsScraper(BaseScraper):
+    """
+    Scraper for any source declared in NEWS_SOURCES. The source's 'extract'
+    rules are compiled once into an ExtractionPlan that this class executes,
+    so a new outlet needs a config entry and no new class.
+    """
+
+    def __init__(self, source_config, **kwargs):
+        super().__init__(source_config, **kwargs)
+        self.plan = get_plan(source_config)
+        self.parse_selectors = self.plan.parse_selectors
+
+    def extract_article(self, url):
+        with METRICS.timer('extract_seconds', source=self.host):
+            soup = self.get_page(url)
+            if not soup:
+                return None
+
+            try:
+                return self.plan.execute(url, soup)
+            except Exception as e:
+                logging.error(f"Error extracting from {url}: {str(e)}")
+                return None
@@ -0,0 +1,224 @@
+import gzip
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from .config import ARCHIVE_CONFIG
+from .metrics import METRICS
+
+_SEGMENT_NAME = re.compile(r'^pages-(\d{6})\.warc\.gz$')
+
+
+def warc_record(url: str, body: bytes, fetched_at: float) -> bytes:
+    """One WARC/1.1 resource record holding a page body"""
+    date = datetime.fromtimestamp(fetched_at, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+    headers = (
+        'WARC/1.1\r\n'
+        'WARC-Type: resource\r\n'
+        f'WARC-Record-ID: <urn:uuid:{uuid.uuid4()}>\r\n'
+        f'WARC-Date: {date}\r\n'
+        f'WARC-Target-URI: {url}\r\n'
+        f'WARC-Block-Digest: sha256:{hashlib.sha256(body).hexdigest()}\r\n'
+        'Content-Type: text/html; charset=utf-8\r\n'
+        f'Content-Length: {len(body)}\r\n'
+        '\r\n'
+    )
+    return headers.encode('utf-8') + body + b'\r\n\r\n'
+
+
+def parse_warc_record(record: bytes) -> Tuple[Dict[str, str], bytes]:
+    """Split a decompressed WARC record into its header fields and block"""
+    head, _, rest = record.partition(b'\r\n\r\n')
+    fields = {}
+    for line in head.decode('utf-8').split('\r\n')[1:]:
+        name, _, value = line.partition(':')
+        fields[name.strip()] = value.strip()
+    return fields, rest[:int(fields['Content-Length'])]
+
+
+class PageArchive:
+    """
+    Append-only archive of raw fetched pages, in WARC format.
+
+    Each page is one WARC resource record, gzip-compressed on its own and
+    appended to the active segment (pages-NNNNNN.warc.gz); the segments are
+    ordinary multi-member .warc.gz files that WARC tools can read. A SQLite
+    index maps each URL to the segment, offset and compressed length of its
+    latest record, so one page can be read back without decompressing the
+    rest. A page is written once: fetching it again only appends a record
+    if its content changed. A record written but not yet indexed when the
+    process died is truncated away on the next open.
+    """
+
+    def __init__(self, root: str, segment_bytes: int = ARCHIVE_CONFIG['segment_bytes'],
+                 compress_level: int = ARCHIVE_CONFIG['compress_level']):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.segment_bytes = segment_bytes
+        self.compress_level = compress_level
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.root / 'index.sqlite'), check_same_thread=False)
+        self._db.executescript('''
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                host TEXT NOT NULL,
+                digest TEXT NOT NULL,
+                segment INTEGER NOT NULL,
+                offset INTEGER NOT NULL,
+                length INTEGER NOT NULL,
+                fetched_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS pages_by_host ON pages (host, segment, offset);
+        ''')
+        self._recover()
+
+    def _segment_path(self, segment: int) -> Path:
+        return self.root / f'pages-{segment:06d}.warc.gz'
+
+    def _recover(self):
+        segments = [int(m.group(1)) for m in map(_SEGMENT_NAME.match, os.listdir(self.root)) if m]
+        self._active = max(segments, default=1)
+        # Drop a record that was written but never indexed
+        end = self._db.execute('SELECT COALESCE(MAX(offset + length), 0) FROM pages WHERE segment = ?',
+                               (self._active,)).fetchone()[0]
+        self._fp = open(self._segment_path(self._active), 'ab')
+        if self._fp.tell() != end:
+            logging.warning(f"Truncating {self._segment_path(self._active)} to {end} bytes")
+            self._fp.truncate(end)
+            self._fp.seek(end)
+        self._size = end
+
+    def add(self, url: str, html: str) -> bool:
+        """Archive a fetched page; False if the archive already holds this exact content"""
+        body = html.encode('utf-8')
+        digest = hashlib.sha256(body).hexdigest()
+        with self._lock:
+            row = self._db.execute('SELECT digest FROM pages WHERE url = ?', (url,)).fetchone()
+            if row and row[0] == digest:
+                return False
+        fetched_at = time.time()
+        data = gzip.compress(warc_record(url, body, fetched_at), self.compress_level)
+        start = time.perf_counter()
+        with self._lock:
+            offset = self._size
+            self._fp.write(data)
+            self._fp.flush()
+            self._db.execute('INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?)',
+                             (url, urlparse(url).netloc, digest, self._active, offset, len(data),
+                              fetched_at))
+            self._db.commit()
+            self._size += len(data)
+            if self._size >= self.segment_bytes:
+                self._rollover()
+        METRICS.observe('write_seconds', time.perf_counter() - start, target='page_archive')
+        METRICS.inc('write_bytes_total', len(data), target='page_archive')
+        return True
+
+    def _rollover(self):
+        """Close the active segment and start the next; caller holds the lock"""
+        os.fsync(self._fp.fileno())
+        self._fp.close()
+        self._active += 1
+        self._fp = open(self._segment_path(self._active), 'ab')
+        self._size = 0
+        logging.info(f"Started archive segment {self._segment_path(self._active).name}")
+
+    def __contains__(self, url: str) -> bool:
+        with self._lock:
+            return self._db.execute('SELECT 1 FROM pages WHERE url = ?', (url,)).fetchone() is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM pages').fetchone()[0]
+
+    def _read(self, segment: int, offset: int, length: int) -> str:
+        with open(self._segment_path(segment), 'rb') as fp:
+            fp.seek(offset)
+            _, body = parse_warc_record(gzip.decompress(fp.read(length)))
+        return body.decode('utf-8')
+
+    def get(self, url: str) -> Optional[str]:
+        """The latest archived body of url, or None"""
+        with self._lock:
+            row = self._db.execute('SELECT segment, offset, length FROM pages WHERE url = ?',
+                                   (url,)).fetchone()
+            self._fp.flush()
+        return self._read(*row) if row else None
+
+    def urls(self, host: Optional[str] = None) -> List[str]:
+        """Archived URLs, of one host if given, in the order they sit on disk"""
+        with self._lock:
+            if host is None:
+                rows = self._db.execute('SELECT url FROM pages ORDER BY segment, offset')
+            else:
+                rows = self._db.execute('SELECT url FROM pages WHERE host = ? ORDER BY segment, offset',
+                                        (host,))
+            return [url for (url,) in rows]
+
+    def records(self, urls: Optional[Iterable[str]] = None) -> Iterator[Tuple[str, str]]:
+        """Yield (url, html) for urls, or for every archived page"""
+        for url in self.urls() if urls is None else urls:
+            html = self.get(url)
+            if html is not None:
+                yield url, html
+
+    def import_archive(self, root: str) -> int:
+        """Add every page of another archive, e.g. a crawl worker's; returns the number added"""
+        other = PageArchive(root)
+        try:
+            return sum(self.add(url, html) for url, html in other.records())
+        finally:
+            other.close()
+
+    def close(self):
+        with self._lock:
+            self._fp.close()
+            self._db.commit()
+            self._db.close()
+
+
+class _OfflineSession:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+
+class ArchiveFetcher:
+    """
+    Stand-in for AsyncFetcher that answers from a PageArchive: archived
+    pages come back with status 200, everything else as a 404. Nothing goes
+    over the network.
+    """
+
+    def __init__(self, archive: PageArchive, concurrency: int = 16):
+        self.archive = archive
+        self.concurrency = concurrency
+
+    def session(self) -> _OfflineSession:
+        return _OfflineSession()
+
+    async def fetch(self, session, url: str) -> Optional[str]:
+        return (await self.fetch_status(session, url))[1]
+
+    async def fetch_status(self, session, url: str) -> Tuple[Optional[int], Optional[str]]:
+        html = self.archive.get(url)
+        METRICS.inc('fetch_requests_total', host=urlparse(url).netloc,
+                    outcome='archive' if html is not None else 'archive_miss')
+        return (200, html) if html is not None else (404, None)
+
+    async def probe(self, session, url: str, method: str = 'head') -> Optional[int]:
+        return 200 if url in self.archive else 404
+
+    def fetch_all(self, urls: Iterable[str]) -> Dict[str, Optional[str]]:
+        return {url: self.archive.get(url) for url in dict.fromkeys(urls)}
@@ -0,0 +1,220 @@
+import logging
+import re
+from functools import lru_cache
+from typing import Iterable, List, Optional, Tuple
+
+from bs4 import BeautifulSoup, FeatureNotFound, SoupStrainer
+
+from .config import PARSER_BACKENDS
+
+_HTML_LANG = re.compile(r'<html\b[^>]*?\blang\s*=\s*["\']?([\w-]+)', re.IGNORECASE)
+_COMPOUND = re.compile(r'^([a-zA-Z][\w-]*|\*)?((?:[.#][\w-]+)*)$')
+_TOKEN = re.compile(r'([.#])([\w-]+)')
+_ATTRIBUTE = re.compile(r'\[[^\]]*\]')
+
+
+def _first_compound(selector: str) -> Optional[Tuple[Optional[str], frozenset, Optional[str]]]:
+    """
+    Parse the leftmost compound of a selector into (tag, classes, id).
+    Everything the full selector matches lies inside that compound's subtree,
+    as long as no sibling combinator is involved. Returns None otherwise.
+    """
+    # Attribute tests only narrow a match, so the subtree to keep is the same without them
+    selector = _ATTRIBUTE.sub('', selector).strip()
+    if not selector or '+' in selector or '~' in selector:
+        return None
+    match = _COMPOUND.match(selector.split()[0].split('>')[0])
+    if not match:
+        return None
+    tag, tokens = match.groups()
+    classes = frozenset(value for kind, value in _TOKEN.findall(tokens) if kind == '.')
+    ids = [value for kind, value in _TOKEN.findall(tokens) if kind == '#']
+    if tag == '*':
+        tag = None
+    if not (tag or classes or ids):
+        return None
+    return tag, classes, ids[0] if ids else None
+
+
+class SelectorStrainer(SoupStrainer):
+    """
+    SoupStrainer that keeps only the subtrees rooted at the leftmost compound
+    of each selector, e.g. ``div.story-element`` for ``div.story-element p``.
+    Nodes outside those subtrees are never turned into Python objects.
+    """
+
+    def __init__(self, compounds: List[Tuple[Optional[str], frozenset, Optional[str]]]):
+        super().__init__()
+        self.compounds = compounds
+
+    def _matches(self, name: str, attrs) -> bool:
+        if attrs is None:
+            attrs = {}
+        elif not hasattr(attrs, 'get'):
+            attrs = dict(attrs)
+        classes = attrs.get('class') or ()
+        if isinstance(classes, str):
+            classes = classes.split()
+        for tag, wanted, tag_id in self.compounds:
+            if tag and tag != name:
+                continue
+            if wanted and not wanted.issubset(classes):
+                continue
+            if tag_id and attrs.get('id') != tag_id:
+                continue
+            return True
+        return False
+
+    # beautifulsoup4 >= 4.13
+    def allow_tag_creation(self, nsprefix, name, attrs) -> bool:
+        return self._matches(name, attrs)
+
+    def allow_string_creation(self, string) -> bool:
+        return False
+
+    # beautifulsoup4 < 4.13
+    def search_tag(self, markup_name=None, markup_attrs={}):
+        if isinstance(markup_name, str):
+            return self._matches(markup_name, markup_attrs)
+        return super().search_tag(markup_name, markup_attrs)
+
+
+def build_strainer(selectors: Iterable[str]) -> Optional[SelectorStrainer]:
+    """Build a strainer for the given selectors, or None if any needs the full tree"""
+    compounds = []
+    for selector in selectors:
+        for part in selector.split(','):
+            compound = _first_compound(part)
+            if compound is None:
+                return None
+            compounds.append(compound)
+    return SelectorStrainer(compounds) if compounds else None
+
+
+@lru_cache(maxsize=None)
+def _css(selector: str):
+    from lxml.cssselect import CSSSelector
+    return CSSSelector(selector)
+
+
+class LxmlNode:
+    """
+    Wraps an lxml element in the slice of the bs4 Tag API the scrapers use
+    (select, select_one, text, get), so extract_article code runs unchanged.
+    """
+    __slots__ = ('element',)
+
+    def __init__(self, element):
+        self.element = element
+
+    @property
+    def text(self) -> str:
+        return self.element.text_content()
+
+    def get_text(self, separator: str = '', strip: bool = False) -> str:
+        if not (separator or strip):
+            return self.element.text_content()
+        strings = self.element.itertext()
+        if strip:
+            strings = (s.strip() for s in strings)
+            strings = (s for s in strings if s)
+        return separator.join(strings)
+
+    def get(self, attr: str, default=None):
+        return self.element.get(attr, default)
+
+    def select(self, selector: str) -> List['LxmlNode']:
+        return [LxmlNode(e) for e in _css(selector)(self.element)]
+
+    def select_one(self, selector: str) -> Optional['LxmlNode']:
+        matches = _css(selector)(self.element)
+        return LxmlNode(matches[0]) if matches else None
+
+    def __bool__(self) -> bool:
+        return True
+
+
+class CompiledSelector:
+    """
+    A CSS selector compiled once and reusable against any backend's tree:
+    soupsieve for BeautifulSoup documents, XPath for lxml-native ones.
+    """
+    __slots__ = ('css', '_sieve')
+
+    def __init__(self, css: str):
+        import soupsieve
+        self.css = css
+        self._sieve = soupsieve.compile(css)
+
+    def select(self, node) -> list:
+        if isinstance(node, LxmlNode):
+            return [LxmlNode(e) for e in _css(self.css)(node.element)]
+        return self._sieve.select(node)
+
+    def select_one(self, node):
+        if isinstance(node, LxmlNode):
+            matches = _css(self.css)(node.element)
+            return LxmlNode(matches[0]) if matches else None
+        return self._sieve.select_one(node)
+
+
+class LxmlDocument(LxmlNode):
+    __slots__ = ('document_lang',)
+
+    def __init__(self, element):
+        super().__init__(element)
+        self.document_lang = element.get('lang', '')
+
+    @property
+    def html(self) -> LxmlNode:
+        return LxmlNode(self.element)
+
+
+def _parse_lxml_native(text: str) -> LxmlDocument:
+    import lxml.html
+    from lxml import etree
+    try:
+        root = lxml.html.document_fromstring(text)
+    except ValueError:
+        # str input carrying an XML encoding declaration
+        root = lxml.html.document_fromstring(text.encode('utf-8'))
+    except etree.ParserError:
+        root = lxml.html.document_fromstring('<html></html>')
+    return LxmlDocument(root)
+
+
+def default_backend() -> str:
+    """Fastest parser available: native lxml, bs4 over lxml, else the stdlib parser"""
+    try:
+        import lxml  # noqa: F401
+    except ImportError:
+        return 'html.parser'
+    try:
+        import cssselect  # noqa: F401
+        return 'lxml-native'
+    except ImportError:
+        return 'lxml'
+
+
+def parse_html(text: str, backend: str = 'html.parser',
+               strainer: Optional[SoupStrainer] = None):
+    """
+    Parse a page with the given backend, optionally restricted to the
+    subtrees a strainer keeps. The page's <html lang> is always available
+    as ``soup.document_lang``, even when the <html> element was strained out.
+    The native lxml backend builds the full tree in C and ignores strainer.
+    """
+    if backend == 'lxml-native':
+        return _parse_lxml_native(text)
+    try:
+        soup = BeautifulSoup(text, backend, parse_only=strainer)
+    except FeatureNotFound:
+        logging.warning(f"Parser backend {backend} unavailable, using html.parser")
+        soup = BeautifulSoup(text, 'html.parser', parse_only=strainer)
+
+    if soup.html is not None:
+        soup.document_lang = soup.html.get('lang', '')
+    else:
+        match = _HTML_LANG.search(text, 0, 4096)
+        soup.document_lang = match.group(1) if match else ''
+    return soup
@@ -1,24 +1,4 @@
-from .base_scraper import BaseScraper
+from .news_scraper import NewsScraper
 
-class ProthomAloScraper(BaseScraper):
-    def extract_article(self, url):
-        soup = self.get_page(url)
-        if not soup:
-            return None
-            
-        try:
-            title = soup.select_one('h1.title').text.strip()
-            content = ' '.join([p.text.strip() for p in soup.select('div.story-element p')])
-            date = soup.select_one('time').get('datetime', '')
-            language = 'bn' if soup.html.get('lang', '').startswith('bn') else 'en'
-            
-            return {
-                'url': url,
-                'title': title,
-                'content': content, 
-                'date': date,
-                'language': language
-            }
-        except Exception as e:
-            logging.error(f"Error extracting from {url}: {str(e)}")
-            return None
+class ProthomAloScraper(NewsScraper):
+    """Prothom Alo; extraction rules live in NEWS_SOURCES['prothomalo']"""
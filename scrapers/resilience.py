@@ -0,0 +1,97 @@
+"""
+Retry and circuit-breaker policy shared by BaseScraper and AsyncFetcher.
+
+Timeouts, connection errors, 429 and 5xx responses are retried up to
+FETCH_CONFIG['retries'] times with full-jitter exponential backoff; a
+Retry-After header sets the minimum wait. Each failed attempt also counts
+against the host's circuit breaker. Once a host fails breaker_failures
+times in a row its circuit opens and requests to it fail immediately for
+breaker_reset seconds, after which a single probe request decides whether
+it closes again.
+"""
+import logging
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+from .config import FETCH_CONFIG
+from .metrics import METRICS
+
+# Statuses worth another attempt; other errors will not change on retry
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header, given as seconds or an HTTP date"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None,
+                  base: float = FETCH_CONFIG['backoff_base'],
+                  cap: float = FETCH_CONFIG['backoff_max']) -> Optional[float]:
+    """
+    Seconds to wait before retry number attempt + 1, or None when the
+    server asks for a longer pause than cap and the URL should be given up
+    """
+    delay = random.uniform(0, min(cap, base * 2 ** attempt))
+    if retry_after is not None:
+        if retry_after > cap:
+            return None
+        delay = max(delay, retry_after)
+    return delay
+
+
+class CircuitBreaker:
+    """Per-host consecutive-failure breaker; safe to share between threads and the event loop"""
+
+    def __init__(self, failures: int = FETCH_CONFIG['breaker_failures'],
+                 reset_after: float = FETCH_CONFIG['breaker_reset']):
+        self.failures = failures
+        self.reset_after = reset_after
+        self._lock = threading.Lock()
+        self._failed: Dict[str, int] = {}
+        self._opened: Dict[str, float] = {}   # host -> when its circuit opened
+        self._probing: Dict[str, bool] = {}
+
+    def allow(self, host: str) -> bool:
+        """False while host's circuit is open; lets one probe through once it may close"""
+        with self._lock:
+            opened = self._opened.get(host)
+            if opened is None:
+                return True
+            if time.monotonic() - opened < self.reset_after or self._probing.get(host):
+                return False
+            self._probing[host] = True
+            return True
+
+    def record_success(self, host: str):
+        with self._lock:
+            if host in self._opened:
+                logging.info(f"Circuit for {host} closed")
+            self._failed.pop(host, None)
+            self._opened.pop(host, None)
+            self._probing.pop(host, None)
+
+    def record_failure(self, host: str):
+        with self._lock:
+            self._failed[host] = self._failed.get(host, 0) + 1
+            probe_failed = self._probing.pop(host, False)
+            if probe_failed or (host not in self._opened and self._failed[host] >= self.failures):
+                self._opened[host] = time.monotonic()
+                METRICS.inc('breaker_opened_total', host=host)
+                logging.warning(f"Circuit for {host} opened after {self._failed[host]} failures; "
+                                f"pausing it for {self.reset_after:.0f}s")
+
+    def is_open(self, host: str) -> bool:
+        with self._lock:
+            return host in self._opened
@@ -0,0 +1,40 @@
+import logging
+import xml.etree.ElementTree as ET
+from typing import List, Tuple
+
+
+def _local(tag: str) -> str:
+    """Tag name without its XML namespace"""
+    return tag.rsplit('}', 1)[-1]
+
+
+def parse_sitemap(text: str) -> Tuple[str, List[str]]:
+    """
+    Parse a sitemap into (kind, locations). kind is 'sitemapindex', whose
+    locations are child sitemaps ordered newest first by lastmod, or
+    'urlset' (plain and Google News sitemaps alike), whose locations are
+    pages in document order. Unparseable input gives ('urlset', []).
+    """
+    try:
+        root = ET.fromstring(text.encode('utf-8') if isinstance(text, str) else text)
+    except ET.ParseError as e:
+        logging.warning(f"Unparseable sitemap: {str(e)}")
+        return 'urlset', []
+
+    kind = _local(root.tag)
+    entries = []
+    for entry in root:
+        loc = lastmod = ''
+        for child in entry:
+            name = _local(child.tag)
+            if name == 'loc':
+                loc = (child.text or '').strip()
+            elif name == 'lastmod':
+                lastmod = (child.text or '').strip()
+        if loc:
+            entries.append((lastmod, loc))
+    if kind == 'sitemapindex':
+        # W3C dates sort chronologically as strings; entries without one go last
+        entries.sort(key=lambda entry: entry[0], reverse=True)
+        return kind, [loc for _, loc in entries]
+    return 'urlset', [loc for _, loc in entries]
@@ -0,0 +1,130 @@
+import json
+import logging
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from scrapers.config import MATCH_CONFIG
+from processing.matching import features, score
+
+
+def english_config(source_config: Dict) -> Dict:
+    """Source config for crawling a source's English sections, built from its 'english' entry"""
+    english = source_config['english']
+    config = {key: value for key, value in source_config.items() if key != 'english'}
+    config.update(english)
+    config['list_urls'] = list(english.get('list_urls', []))
+    config['sitemaps'] = list(english.get('sitemaps', []))
+    config['edition'] = 'en'
+    return config
+
+
+class EnglishArticleIndex:
+    """
+    On-disk index of extracted English articles, for pairing Bengali
+    articles without guessing their English URL.
+
+    Each article is stored with its matching features (processing/matching.py).
+    Candidates for a Bengali article are the unmatched English articles of
+    the same source published within MATCH_CONFIG['date_window'] days, plus
+    any sharing a number of three or more digits with it; the best scoring
+    one above MATCH_CONFIG['min_score'] is claimed, so each English article
+    pairs at most once.
+    """
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=60, check_same_thread=False)
+        # WAL lets queue worker processes share the file without locking each other out
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.executescript('''
+            CREATE TABLE IF NOT EXISTS articles (
+                url TEXT PRIMARY KEY,
+                source TEXT NOT NULL,
+                day INTEGER,
+                features TEXT NOT NULL,
+                article TEXT NOT NULL,
+                matched TEXT
+            );
+            CREATE INDEX IF NOT EXISTS articles_by_day ON articles (source, day);
+            CREATE TABLE IF NOT EXISTS numerals (
+                numeral TEXT NOT NULL,
+                url TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS numerals_by_value ON numerals (numeral);
+        ''')
+
+    def __contains__(self, url: str) -> bool:
+        with self._lock:
+            return self._db.execute('SELECT 1 FROM articles WHERE url = ?', (url,)).fetchone() is not None
+
+    def add(self, source: str, article: Dict) -> bool:
+        """Index an extracted English article; False if its URL is already indexed"""
+        feats = features(article, 'en')
+        with self._lock:
+            cursor = self._db.execute(
+                'INSERT OR IGNORE INTO articles (url, source, day, features, article) VALUES (?, ?, ?, ?, ?)',
+                (article['url'], source, feats['day'], json.dumps(feats),
+                 json.dumps(article, ensure_ascii=False)))
+            if cursor.rowcount:
+                self._db.executemany('INSERT INTO numerals (numeral, url) VALUES (?, ?)',
+                                     [(n, article['url']) for n in feats['numerals'] if len(n) >= 3])
+            self._db.commit()
+        return bool(cursor.rowcount)
+
+    def _candidates(self, source: str, feats: Dict) -> List[Tuple[str, Dict]]:
+        limit = MATCH_CONFIG['max_candidates']
+        rows = []
+        if feats['day'] is not None:
+            window = MATCH_CONFIG['date_window']
+            rows += self._db.execute('''
+                SELECT url, features FROM articles
+                WHERE source = ? AND matched IS NULL AND day BETWEEN ? AND ? LIMIT ?
+            ''', (source, feats['day'] - window, feats['day'] + window, limit)).fetchall()
+        keys = [n for n in feats['numerals'] if len(n) >= 3]
+        if keys:
+            rows += self._db.execute(f'''
+                SELECT DISTINCT articles.url, features FROM numerals
+                JOIN articles ON articles.url = numerals.url
+                WHERE numeral IN ({','.join('?' * len(keys))}) AND source = ? AND matched IS NULL
+                LIMIT ?
+            ''', (*keys, source, limit)).fetchall()
+        unique = dict(rows)
+        return [(url, json.loads(feats_json)) for url, feats_json in unique.items()]
+
+    def match(self, source: str, bn_article: Dict) -> Optional[Tuple[Dict, float]]:
+        """Claim the best English match for a Bengali article; returns (article, score) or None"""
+        feats = features(bn_article, 'bn')
+        with self._lock:
+            scored = [(score(feats, en_feats, MATCH_CONFIG['date_window']), url)
+                      for url, en_feats in self._candidates(source, feats)]
+            # Another process sharing the index may claim a candidate first; fall through to the next best
+            for similarity, url in sorted(scored, reverse=True):
+                if similarity < MATCH_CONFIG['min_score']:
+                    break
+                cursor = self._db.execute('UPDATE articles SET matched = ? WHERE url = ? AND matched IS NULL',
+                                          (bn_article['url'], url))
+                self._db.commit()
+                if cursor.rowcount:
+                    (article,) = self._db.execute('SELECT article FROM articles WHERE url = ?',
+                                                  (url,)).fetchone()
+                    return json.loads(article), similarity
+        return None
+
+    def release(self, url: str):
+        """Return a claimed English article to the pool, e.g. when its pair did not align"""
+        with self._lock:
+            self._db.execute('UPDATE articles SET matched = NULL WHERE url = ?', (url,))
+            self._db.commit()
+
+    def counts(self) -> Dict[str, int]:
+        """Indexed and matched English articles"""
+        with self._lock:
+            indexed, matched = self._db.execute(
+                'SELECT COUNT(*), COUNT(matched) FROM articles').fetchone()
+        return {'indexed': indexed, 'matched': matched}
+
+    def close(self):
+        with self._lock:
+            self._db.commit()
+            self._db.close()
@@ -0,0 +1,49 @@
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+
+class CrawlCheckpoint:
+    """
+    The crawl frontier of one ScrapingCoordinator run, kept in a JSON file:
+
+        started_at   when the run began
+        max_articles the run's per-source budget
+        lists_done   [source, list_url] pairs whose URLs were all queued
+        pending      {source: [url, ...]} URLs queued but not yet recorded
+        found        {source: pairs found so far}
+
+    Saves write a temporary file, fsync it and rename it over the old one,
+    so a crash leaves either the previous or the new checkpoint, never a
+    partial one. A run that finishes deletes its checkpoint.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+
+    def load(self) -> Optional[Dict]:
+        """The saved state, or None when there is no usable checkpoint"""
+        if not self.path.exists():
+            return None
+        try:
+            with open(self.path, encoding='utf-8') as fp:
+                return json.load(fp)
+        except (OSError, json.JSONDecodeError) as e:
+            logging.warning(f"Ignoring unreadable checkpoint {self.path}: {str(e)}")
+            return None
+
+    def save(self, state: Dict):
+        state = dict(state, saved_at=time.time())
+        tmp = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp, 'w', encoding='utf-8') as fp:
+            json.dump(state, fp, ensure_ascii=False)
+            fp.flush()
+            os.fsync(fp.fileno())
+        os.replace(tmp, self.path)
+
+    def clear(self):
+        self.path.unlink(missing_ok=True)
+        self.path.with_name(self.path.name + '.tmp').unlink(missing_ok=True)
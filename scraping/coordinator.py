@@ -1,41 +1,255 @@
+import importlib
 import logging
+import shutil
+import sys
+import time
+from collections import Counter
 from pathlib import Path
-from typing import Dict, Type
-from ..scrapers.config import NEWS_SOURCES
-from ..scrapers.base_scraper import BaseScraper
-from ..dataset.dataset_builder import DatasetBuilder
+from typing import Dict, Optional, Type
+from scrapers.config import NEWS_SOURCES, FETCH_CONFIG, MATCH_CONFIG, PIPELINE_CONFIG, QUEUE_CONFIG, USER_AGENT
+from scrapers.base_scraper import BaseScraper
+from scrapers.fetcher import AsyncFetcher
+from scrapers.http_cache import HTTPCache
+from scrapers.metrics import METRICS
+from scrapers.page_archive import ArchiveFetcher, PageArchive
+from dataset.dataset_builder import DatasetBuilder
+from scraping.article_index import EnglishArticleIndex, english_config
+from scraping.checkpoint import CrawlCheckpoint
+from scraping.counterparts import CounterpartIndex
+from scraping.url_index import URLIndex
+from scraping.pipeline import ScrapingPipeline
+from scraping.work_queue import SQLiteWorkQueue, WorkQueue
+
+# Scraper class of sources whose NEWS_SOURCES entry does not name one
+DEFAULT_SCRAPER = 'scrapers.news_scraper.NewsScraper'
+
+
+def load_scraper_class(path: str) -> Type[BaseScraper]:
+    """Import a scraper class from its dotted path, e.g. 'scrapers.prothomalo.ProthomAloScraper'"""
+    module, _, name = path.rpartition('.')
+    return getattr(importlib.import_module(module), name)
+
 
 class ScrapingCoordinator:
-    def __init__(self, output_dir: str):
+    def __init__(self, output_dir: str, concurrency: int = FETCH_CONFIG['concurrency'],
+                 cache_dir: Optional[str] = None, incremental: bool = True,
+                 parser: Optional[str] = None, archive_dir: Optional[str] = None,
+                 pairs_dir: Optional[str] = None):
         self.output_dir = Path(output_dir)
-        self.dataset = DatasetBuilder(str(self.output_dir / 'pairs'))
-        self.scrapers: Dict[str, Type[BaseScraper]] = {}
+        self.dataset = DatasetBuilder(pairs_dir or str(self.output_dir / 'pairs'))
+        self.scrapers: Dict[str, BaseScraper] = {}
+        self.concurrency = concurrency
+        self.parser = parser
+        self.cache = HTTPCache(cache_dir) if cache_dir else None
+        # Raw copy of every fetched page, for rebuild_from_archive()
+        self.archive = PageArchive(archive_dir) if archive_dir else None
+        # One fetcher for every source, so connection pools are shared
+        self.fetcher = AsyncFetcher({'User-Agent': USER_AGENT}, concurrency=concurrency,
+                                    cache=self.cache, archive=self.archive)
+        # Seen-URL index; without it every run re-extracts every article
+        self.index = URLIndex(str(self.output_dir / 'url_index.sqlite')) if incremental else None
+        # Missing counterpart URLs and rewrite-rule hit rates, kept across runs
+        self.counterparts = CounterpartIndex(str(self.output_dir / 'counterparts.sqlite'))
+        # English sections of sources configured with one, indexed for matching
+        self.english_scrapers: Dict[str, BaseScraper] = {}
+        self.english: Optional[EnglishArticleIndex] = None
         
-    def register_scraper(self, name: str, scraper_class: Type[BaseScraper]):
-        """Register a scraper for a news source"""
-        self.scrapers[name] = scraper_class(NEWS_SOURCES[name])
+    def register_scraper(self, name: str, scraper_class: Optional[Type[BaseScraper]] = None,
+                         source_config: Optional[Dict] = None):
+        """
+        Register a scraper for a news source, configured by source_config or
+        else by NEWS_SOURCES[name]. Without scraper_class, the class named by
+        the source's 'scraper' entry is imported now, so only the scrapers of
+        sources actually crawled are loaded
+        """
+        config = source_config if source_config is not None else NEWS_SOURCES[name]
+        if scraper_class is None:
+            scraper_class = load_scraper_class(config.get('scraper', DEFAULT_SCRAPER))
+        self.scrapers[name] = scraper_class(config, fetcher=self.fetcher,
+                                            cache=self.cache, parser=self.parser)
+        if 'english' in config:
+            self.english_scrapers[name] = scraper_class(english_config(config),
+                                                        fetcher=self.fetcher, cache=self.cache,
+                                                        parser=self.parser)
+            if self.english is None:
+                self.english = EnglishArticleIndex(str(self.output_dir / 'english_index.sqlite'))
+
+    def index_english(self, max_articles: int):
+        """
+        Crawl the English sections of sources that have them into the English
+        index, up to MATCH_CONFIG['english_per_article'] new pages per
+        Bengali article in the budget
+        """
+        batch_size = self.concurrency * 4
+        for name, scraper in self.english_scrapers.items():
+            budget = max_articles * MATCH_CONFIG['english_per_article']
+            added, batch = 0, []
+            for url in self._new_english_urls(scraper):
+                batch.append(url)
+                if len(batch) >= batch_size or added + len(batch) >= budget:
+                    added += self._index_batch(name, scraper, batch)
+                    batch = []
+                    if added >= budget:
+                        break
+            if batch:
+                added += self._index_batch(name, scraper, batch)
+            METRICS.inc('english_indexed_total', added, source=name)
+            logging.info(f"Indexed {added} English articles from {name}")
+
+    def _new_english_urls(self, scraper: BaseScraper):
+        """Unindexed English article URLs, in the order the Bengali crawl discovers its own"""
+        seen = set()
+        for entry in scraper.discovery_entries():
+            for url in scraper.iter_article_urls(entry):
+                if url not in seen and url not in self.english:
+                    seen.add(url)
+                    yield url
+
+    def _index_batch(self, name: str, scraper: BaseScraper, urls) -> int:
+        added = 0
+        for url, html in self.fetcher.fetch_all(urls).items():
+            if html is None:
+                continue
+            article = scraper.extract_from_html(url, html)
+            if article and article['content'] and self.english.add(name, article):
+                added += 1
+        return added
         
-    def run(self, max_articles: int = 1000):
-        """Run scraping for all registered sources"""
+    def run(self, max_articles: int = 1000, parse_workers: Optional[int] = PIPELINE_CONFIG['parse'],
+            align_workers: Optional[int] = PIPELINE_CONFIG['align'], resume: bool = False):
+        """
+        Run scraping for all registered sources. The crawl frontier is
+        checkpointed to <output_dir>/checkpoint.json while the run lasts;
+        resume=True continues an interrupted run from it.
+        """
+        logging.info(f"Scraping {', '.join(self.scrapers)}")
+        if self.english_scrapers:
+            self.index_english(max_articles)
+        checkpoint = CrawlCheckpoint(str(self.output_dir / 'checkpoint.json'))
+        if not resume and checkpoint.path.exists():
+            logging.info("Discarding checkpoint of an interrupted run; pass --resume to continue it")
+            checkpoint.clear()
+        pipeline = ScrapingPipeline(self, max_articles, parse_width=parse_workers,
+                                    align_width=align_workers, checkpoint=checkpoint,
+                                    resume=resume)
+        found = pipeline.run()
+        rules = self.counterparts.rule_stats()
+        for name in self.scrapers:
+            logging.info(f"Found {found[name]} article pairs from {name}")
+            for rule, stats in rules.get(name, {}).items():
+                logging.info(f"  rule '{rule}': {stats['hits']} hits, {stats['misses']} misses"
+                             + (" (retired)" if stats['retired'] else ""))
+        return found
+
+    def run_queue(self, queue_path: str, max_articles: int = 1000, workers: int = 1,
+                  resume: bool = False) -> Counter:
+        """
+        Run scraping through a SQLite work queue: fill it, drain it with
+        ``workers`` local QueueWorker processes (or, with workers=0, wait
+        for workers started elsewhere on this machine), then merge what
+        the workers found. resume=True continues an interrupted queued run.
+        """
+        # Imported here, as queue workers build coordinators of their own
+        from scraping.queue_worker import run_workers
+        queue = SQLiteWorkQueue(queue_path)
+        try:
+            self.enqueue(queue, max_articles, resume)
+            if workers:
+                run_workers(workers, queue_path, str(self.output_dir), concurrency=self.concurrency,
+                            parser=self.parser, archive=self.archive is not None)
+            while queue.pending():
+                time.sleep(QUEUE_CONFIG['poll'])
+            self.merge_workers()
+            return self.queue_results(queue)
+        finally:
+            queue.close()
+
+    def enqueue(self, queue: WorkQueue, max_articles: int, resume: bool = False) -> int:
+        """
+        Fill a work queue for QueueWorker processes (scraping/queue_worker.py)
+        with the discovery entries of the registered sources, after indexing
+        their English sections. Without resume the queue is emptied first;
+        with it, the tasks of the interrupted run are kept. Returns the
+        number of entries queued.
+        """
+        if not resume:
+            queue.reset()
+        queue.set_meta('max_articles', max_articles)
+        queue.set_meta('sources', {name: scraper.source_config for name, scraper in self.scrapers.items()})
+        queue.set_meta('scrapers', {name: f'{type(scraper).__module__}.{type(scraper).__name__}'
+                                    for name, scraper in self.scrapers.items()})
+        if self.english_scrapers:
+            self.index_english(max_articles)
+        queued = 0
         for name, scraper in self.scrapers.items():
-            logging.info(f"Scraping {name}")
-            articles_found = 0
-            
-            for list_url in NEWS_SOURCES[name]['list_urls']:
-                article_urls = scraper.discover_article_urls(list_url)
-                
-                for url in article_urls:
-                    if articles_found >= max_articles:
-                        break
-                        
-                    article = scraper.extract_article(url)
-                    if article:
-                        # Try to get English version by URL pattern
-                        en_url = url.replace('/bn/', '/en/')
-                        en_article = scraper.extract_article(en_url)
-                        
-                        if en_article:
-                            self.dataset.add_article_pair(article, en_article)
-                            articles_found += 1
-                            
-            logging.info(f"Found {articles_found} article pairs from {name}")
+            entries = [entry if entry.startswith('http') else f"{scraper.base_url}{entry}"
+                       for entry in scraper.discovery_entries()]
+            queued += queue.put_many('list', name, ((url, {'page': 1}) for url in entries))
+        logging.info(f"Queued {queued} discovery entries, {queue.pending()} tasks pending")
+        return queued
+
+    def queue_results(self, queue: WorkQueue) -> Counter:
+        """Pairs found per registered source by the workers of a queued run"""
+        found = Counter()
+        for name in self.scrapers:
+            counts = queue.counts(name)
+            found[name] = counts.get(f'{WorkQueue.DONE}:{URLIndex.PAIRED}', 0)
+            logging.info(f"Found {found[name]} article pairs from {name}"
+                         + (f" ({counts[WorkQueue.DEAD]} tasks gave up)" if counts.get(WorkQueue.DEAD) else ""))
+        return found
+
+    def merge_workers(self) -> Dict[str, int]:
+        """
+        Fold the pairs and archived pages that QueueWorkers left under
+        <output_dir>/workers into this coordinator's stores, then remove
+        them. Call it once the queue is drained and the workers are gone.
+        """
+        merged = Counter()
+        root = self.output_dir / 'workers'
+        for worker_dir in sorted(root.iterdir()) if root.exists() else []:
+            if (worker_dir / 'pairs').exists():
+                merged['pairs'] += self.dataset.store.import_store(str(worker_dir / 'pairs'))
+            if self.archive is not None and (worker_dir / 'archive').exists():
+                merged['pages'] += self.archive.import_archive(str(worker_dir / 'archive'))
+            shutil.rmtree(worker_dir)
+        logging.info(f"Merged {merged['pairs']} pairs and {merged['pages']} archived pages from workers")
+        return dict(merged)
+
+    def rebuild_from_archive(self, parse_workers: Optional[int] = PIPELINE_CONFIG['parse'],
+                             align_workers: Optional[int] = PIPELINE_CONFIG['align']):
+        """
+        Re-extract and re-align every archived article of the registered
+        sources, e.g. after a selector or aligner fix, without touching the
+        network. Pages are read from the archive instead of fetched; pairs
+        are found the same way as in a crawl, against counterpart and
+        English indexes rebuilt from the archive alone, and saved over the
+        earlier versions of the same pairs.
+        """
+        if self.archive is None or not len(self.archive):
+            raise ValueError("No archived pages to rebuild from")
+        self.fetcher = ArchiveFetcher(self.archive, self.concurrency)
+        # Crawl state describes the live sites, not the archive
+        self.index = None
+        self.counterparts = CounterpartIndex(':memory:')
+        if self.english_scrapers:
+            self.english = EnglishArticleIndex(':memory:')
+        seeds = {}
+        for name, scraper in self.scrapers.items():
+            urls = self.archive.urls(scraper.host)
+            seeds[name] = [url for url in urls if scraper.is_article_url(url)]
+            english = self.english_scrapers.get(name)
+            if english:
+                added = self._index_batch(name, english, [url for url in self.archive.urls(english.host)
+                                                          if english.is_article_url(url)])
+                logging.info(f"Indexed {added} archived English articles from {name}")
+        logging.info(f"Rebuilding from {sum(len(urls) for urls in seeds.values())} archived articles")
+        pipeline = ScrapingPipeline(self, max_articles=sys.maxsize, parse_width=parse_workers,
+                                    align_width=align_workers, seeds=seeds)
+        found = pipeline.run()
+        for name in self.scrapers:
+            logging.info(f"Rebuilt {found[name]} article pairs from {name}")
+        return found
+
+    def _mark(self, url: str, status: str, source: str):
+        if self.index:
+            self.index.mark(url, status, source)
@@ -0,0 +1,159 @@
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+from scrapers.config import COUNTERPART_CONFIG
+
+# Probe methods in order of preference; 'get' means the page is downloaded unprobed
+PROBES = ('head', 'range', 'get')
+
+
+def rule_key(rule: Sequence[str]) -> str:
+    find, replace = rule
+    return f'{find} -> {replace}'
+
+
+class CounterpartIndex:
+    """
+    What previous runs learned about guessing English URLs:
+
+        missing  counterpart URLs that answered 404/410 or did not extract,
+                 skipped until their negative_ttl runs out
+        rules    hits and misses of each rewrite rule per source; a rule
+                 that has missed rule_attempts times with a hit rate under
+                 rule_min_hits is no longer tried for that source
+        probes   the probe method each source answers properly
+
+    Rule statistics and probe methods are kept in memory and written
+    through, so lookups on the fetch path do not touch the database.
+    """
+
+    def __init__(self, path: str, negative_ttl: float = COUNTERPART_CONFIG['negative_ttl'],
+                 rule_attempts: int = COUNTERPART_CONFIG['rule_attempts'],
+                 rule_min_hits: float = COUNTERPART_CONFIG['rule_min_hits'],
+                 probe_below: float = COUNTERPART_CONFIG['probe_below']):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.negative_ttl = negative_ttl
+        self.rule_attempts = rule_attempts
+        self.rule_min_hits = rule_min_hits
+        self.probe_below = probe_below
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), timeout=60, check_same_thread=False)
+        # WAL lets queue worker processes share the file without locking each other out
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.executescript('''
+            CREATE TABLE IF NOT EXISTS missing (
+                url TEXT PRIMARY KEY,
+                reason TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS rules (
+                source TEXT NOT NULL,
+                rule TEXT NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0,
+                misses INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (source, rule)
+            );
+            CREATE TABLE IF NOT EXISTS probes (
+                source TEXT PRIMARY KEY,
+                method TEXT NOT NULL
+            );
+        ''')
+        self._db.execute('DELETE FROM missing WHERE expires_at < ?', (time.time(),))
+        self._db.commit()
+        self._rules: Dict[Tuple[str, str], List[int]] = {
+            (source, rule): [hits, misses]
+            for source, rule, hits, misses in self._db.execute('SELECT * FROM rules')}
+        self._probes: Dict[str, str] = dict(self._db.execute('SELECT source, method FROM probes'))
+
+    def is_missing(self, url: str) -> bool:
+        with self._lock:
+            row = self._db.execute('SELECT expires_at FROM missing WHERE url = ?', (url,)).fetchone()
+        return row is not None and row[0] > time.time()
+
+    def add_missing(self, url: str, reason: str):
+        """Remember that url has no usable page, e.g. reason '404' or 'extract'"""
+        with self._lock:
+            self._db.execute('INSERT OR REPLACE INTO missing (url, reason, expires_at) VALUES (?, ?, ?)',
+                             (url, reason, time.time() + self.negative_ttl))
+            self._db.commit()
+
+    def _retired(self, hits: int, misses: int) -> bool:
+        attempts = hits + misses
+        return attempts >= self.rule_attempts and hits / attempts < self.rule_min_hits
+
+    def candidates(self, source: str, url: str, rules: Sequence[Sequence[str]]) -> List[Tuple[str, str]]:
+        """(rule, counterpart URL) for each live rule that rewrites url to a page not known to be missing"""
+        found = []
+        for rule in rules:
+            find, replace = rule
+            key = rule_key(rule)
+            with self._lock:
+                hits, misses = self._rules.get((source, key), (0, 0))
+            if find not in url or self._retired(hits, misses):
+                continue
+            counterpart = url.replace(find, replace)
+            if counterpart != url and not self.is_missing(counterpart):
+                found.append((key, counterpart))
+        return found
+
+    def record(self, source: str, rule: str, hit: bool, revise: bool = False):
+        """
+        Count one lookup of rule for source. revise turns a hit already
+        counted into a miss, for a page that downloaded but did not extract.
+        """
+        hits, misses = (1 if hit else 0) - (1 if revise else 0), 0 if hit else 1
+        with self._lock:
+            stats = self._rules.setdefault((source, rule), [0, 0])
+            was_retired = self._retired(*stats)
+            # Increments rather than totals, so processes sharing the file add up each other's counts
+            self._db.execute('''
+                INSERT INTO rules (source, rule, hits, misses) VALUES (?, ?, ?, ?)
+                ON CONFLICT (source, rule) DO UPDATE SET hits = MAX(hits + ?, 0), misses = misses + ?
+            ''', (source, rule, max(hits, 0), misses, hits, misses))
+            stats[:] = self._db.execute('SELECT hits, misses FROM rules WHERE source = ? AND rule = ?',
+                                        (source, rule)).fetchone()
+            self._db.commit()
+            retired = self._retired(*stats)
+        if retired and not was_retired:
+            logging.warning(f"Counterpart rule '{rule}' found {stats[0]} pages in {sum(stats)} tries "
+                            f"for {source}; no longer trying it")
+
+    def should_probe(self, source: str, rule: str) -> bool:
+        """Probe before downloading unless the rule almost always finds a page"""
+        with self._lock:
+            hits, misses = self._rules.get((source, rule), (0, 0))
+        return hits + misses == 0 or hits / (hits + misses) < self.probe_below
+
+    def probe_method(self, source: str) -> str:
+        with self._lock:
+            return self._probes.get(source, PROBES[0])
+
+    def probe_refused(self, source: str, method: str) -> str:
+        """Fall back from a probe method the source rejects; returns the next one to use"""
+        following = PROBES[min(PROBES.index(method) + 1, len(PROBES) - 1)]
+        with self._lock:
+            self._probes[source] = following
+            self._db.execute('INSERT OR REPLACE INTO probes (source, method) VALUES (?, ?)',
+                             (source, following))
+            self._db.commit()
+        logging.info(f"{source} refuses {method} probes; using {following}")
+        return following
+
+    def rule_stats(self) -> Dict[str, Dict[str, Dict]]:
+        """{source: {rule: {'hits', 'misses', 'retired'}}}"""
+        stats: Dict[str, Dict[str, Dict]] = {}
+        with self._lock:
+            for (source, rule), (hits, misses) in self._rules.items():
+                stats.setdefault(source, {})[rule] = {
+                    'hits': hits, 'misses': misses, 'retired': self._retired(hits, misses)}
+        return stats
+
+    def close(self):
+        with self._lock:
+            self._db.commit()
+            self._db.close()
@@ -0,0 +1,536 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple, Type
+
+from scrapers.config import COUNTERPART_CONFIG, PIPELINE_CONFIG
+from scrapers.base_scraper import BaseScraper
+from scrapers.metrics import METRICS
+from dataset.dataset_builder import DatasetBuilder
+from scraping.checkpoint import CrawlCheckpoint
+from scraping.url_index import URLIndex
+
+# End-of-stream marker passed down each queue
+_DONE = object()
+
+# Seconds a set-aside discovery job waits at most before checking its source's budget again
+_BUDGET_WAIT = 1.0
+
+# Probe answers meaning the page is not there, and meaning the probe method is not supported
+_MISSING = frozenset({404, 410})
+_REFUSED = frozenset({405, 501})
+
+# Scrapers built inside parse worker processes, one per (class, source)
+_worker_scrapers: Dict[Tuple[Type[BaseScraper], str], BaseScraper] = {}
+
+
+def extract_pair(scraper_class: Type[BaseScraper], source: str, source_config: Dict,
+                 parser: Optional[str], bn_url: str, bn_html: str, en_url: Optional[str],
+                 en_html: Optional[str]) -> List[Optional[Dict]]:
+    """
+    Parse both pages of a candidate pair, or only the Bengali one when the
+    English side is matched from the English index; runs in the parse process pool
+    """
+    key = (scraper_class, source)
+    scraper = _worker_scrapers.get(key)
+    if scraper is None or scraper.source_config != source_config:
+        scraper = _worker_scrapers[key] = scraper_class(source_config, parser=parser)
+    bn_article = scraper.extract_from_html(bn_url, bn_html)
+    if en_html is None:
+        return [bn_article, None]
+    return [bn_article, scraper.extract_from_html(en_url, en_html)]
+
+
+def align_pair(bn_article: Dict, en_article: Dict):
+    """Sentence-align a pair; runs in the align process pool"""
+    return DatasetBuilder._align_paragraphs(bn_article['content'], en_article['content'])
+
+
+def _measured(fn, *args):
+    """Run fn in a worker process and hand back the metrics it recorded"""
+    return fn(*args), METRICS.drain()
+
+
+def _resolve_width(width: Optional[int]) -> int:
+    return (os.cpu_count() or 1) if width is None else width
+
+
+class ScrapingPipeline:
+    """
+    Staged producer/consumer crawl:
+
+        discover -> fetch -> parse/extract -> align -> write
+
+    Stages are connected by bounded queues, so a slow stage blocks the ones
+    feeding it instead of letting work pile up in memory. Discovery runs on
+    threads, fetching on one asyncio loop with ``fetch`` requests in flight,
+    parsing and alignment in process pools, and a single writer thread owns
+    the dataset and the URL index.
+
+    With a checkpoint, the writer saves the crawl frontier every
+    ``checkpoint_every`` seconds: listing pages fully queued, URLs queued
+    but not yet recorded, and pairs found per source. A resumed run skips
+    the finished listing pages and re-queues the pending URLs that did not
+    reach the dataset or the URL index before the crash.
+
+    Sources with an 'english' entry are not paired by URL: only the Bengali
+    page is fetched, and once extracted it is matched against the
+    coordinator's English index (scraping/article_index.py). Other sources
+    rewrite the Bengali URL with their counterpart rules; rewritten URLs
+    known to be missing are skipped and unproven ones are probed before
+    they are downloaded (scraping/counterparts.py).
+
+    A source's ``max_articles`` budget covers the pairs found and the URLs
+    queued but not yet recorded, so no more articles are fetched than
+    could still be needed. A discovery job whose source's budget is held
+    by URLs in flight is set aside, without reading further listing pages,
+    until one of them is recorded.
+
+    With ``seeds``, the given URLs per source are processed instead of
+    anything discovered from listing pages or sitemaps.
+    """
+
+    def __init__(self, coordinator, max_articles: int,
+                 discover_width: int = PIPELINE_CONFIG['discover'],
+                 fetch_width: Optional[int] = None,
+                 parse_width: Optional[int] = PIPELINE_CONFIG['parse'],
+                 align_width: Optional[int] = PIPELINE_CONFIG['align'],
+                 queue_size: int = PIPELINE_CONFIG['queue_size'],
+                 checkpoint: Optional[CrawlCheckpoint] = None, resume: bool = False,
+                 checkpoint_every: float = PIPELINE_CONFIG['checkpoint_every'],
+                 seeds: Optional[Dict[str, List[str]]] = None):
+        self.coordinator = coordinator
+        self.max_articles = max_articles
+        self.discover_width = max(1, discover_width)
+        self.fetch_width = max(1, fetch_width or coordinator.concurrency)
+        self.parse_width = _resolve_width(parse_width)
+        self.align_width = _resolve_width(align_width)
+
+        self.fetch_q = queue.Queue(queue_size)
+        self.parse_q = queue.Queue(queue_size)
+        self.align_q = queue.Queue(queue_size)
+        self.write_q = queue.Queue(queue_size)
+
+        self.found = Counter()
+        self._seen = set()
+        self._seen_lock = threading.Lock()
+        # URLs queued per source and not yet recorded; they hold budget until they settle
+        self._pending = Counter()
+        self._settled = threading.Condition(self._seen_lock)
+
+        self.checkpoint = checkpoint
+        self.resume = resume
+        self.checkpoint_every = checkpoint_every
+        self.started_at = time.time()
+        self._lists_done = set()              # (source, list_url) fully queued
+        self._inflight: Dict[str, str] = {}   # queued URL -> source, until the writer records it
+        self.seeded = seeds is not None
+        # URLs to queue before discovery: seeds, or the pending URLs of a resumed run
+        self._queued: Dict[str, List[str]] = dict(seeds or {})
+
+    def run(self) -> Counter:
+        """Run all stages to completion; returns pairs found per source"""
+        lists_done = self._restore() if self.resume else set()
+        jobs = queue.Queue()
+        for name in self.coordinator.scrapers:
+            if self._queued.get(name):
+                # Seeds, or URLs queued before the interruption, go first
+                jobs.put((name, None))
+            if self.seeded:
+                continue
+            for list_url in self.coordinator.scrapers[name].discovery_entries():
+                if (name, list_url) in lists_done:
+                    self._lists_done.add((name, list_url))
+                else:
+                    jobs.put((name, list_url))
+
+        stages = [
+            threading.Thread(target=self._fetch_stage, name='fetch'),
+            threading.Thread(target=self._pool_stage, name='parse',
+                             args=(self.parse_q, self.parse_width, self._submit_parse,
+                                   self._finish_parse, self.align_q)),
+            threading.Thread(target=self._pool_stage, name='align',
+                             args=(self.align_q, self.align_width, self._submit_align,
+                                   self._finish_align, self.write_q)),
+            threading.Thread(target=self._write_stage, name='write'),
+        ]
+        discoverers = [threading.Thread(target=self._discover_stage, args=(jobs,),
+                                        name=f'discover-{i}')
+                       for i in range(self.discover_width)]
+        for thread in stages + discoverers:
+            thread.start()
+
+        for thread in discoverers:
+            thread.join()
+        self.fetch_q.put(_DONE)
+        for thread in stages:
+            thread.join()
+        if self.checkpoint:
+            self.checkpoint.clear()
+        return self.found
+
+    def _restore(self) -> set:
+        """Load the checkpoint into this run; returns the listing pages already done"""
+        state = self.checkpoint.load() if self.checkpoint else None
+        if not state:
+            logging.info("No checkpoint to resume from; starting a new run")
+            return set()
+        if state['max_articles'] != self.max_articles:
+            logging.warning(f"Checkpoint was written with max_articles={state['max_articles']}, "
+                            f"resuming with {self.max_articles}")
+        self.started_at = state['started_at']
+        names = self.coordinator.scrapers
+        index, dataset = self.coordinator.index, self.coordinator.dataset
+        for name, urls in state['pending'].items():
+            if name not in names:
+                continue
+            unsaved = [url for url in urls if not dataset.has_pair(url)]
+            if not index:
+                # Saved after the checkpoint was written
+                self.found[name] += len(urls) - len(unsaved)
+            self._queued[name] = index.filter_new(unsaved) if index else unsaved
+        if index:
+            # The index also knows the pairs saved after the last checkpoint
+            found = index.paired_since(self.started_at)
+        else:
+            found = state['found']
+        for name in names:
+            self.found[name] += found.get(name, 0)
+
+        done = {tuple(item) for item in state['lists_done']}
+        logging.info(f"Resuming run started {time.ctime(self.started_at)}: {len(done)} listing pages done, "
+                     f"{sum(len(urls) for urls in self._queued.values())} URLs pending, "
+                     f"{sum(self.found.values())} pairs found")
+        return done
+
+    def _save_checkpoint(self):
+        pending: Dict[str, List[str]] = {}
+        with self._seen_lock:
+            for url, name in self._inflight.items():
+                pending.setdefault(name, []).append(url)
+            lists_done = sorted(self._lists_done)
+        self.checkpoint.save({
+            'started_at': self.started_at,
+            'max_articles': self.max_articles,
+            'lists_done': [list(item) for item in lists_done],
+            'pending': pending,
+            'found': dict(self.found),
+        })
+
+    def _budget_left(self, source: str) -> bool:
+        return self.found[source] + self._pending[source] < self.max_articles
+
+    def _release(self, source: str):
+        """Give a queued URL's share of source's budget back to discovery"""
+        with self._settled:
+            self._pending[source] -= 1
+            self._settled.notify_all()
+
+    # Stage 1: discovery
+    def _discover_stage(self, jobs: queue.Queue):
+        while True:
+            try:
+                job = jobs.get_nowait()
+            except queue.Empty:
+                return
+            if len(job) == 2:
+                name, list_url = job
+                if self.found[name] >= self.max_articles:
+                    continue
+                if list_url is None:
+                    # Seeds, or pending URLs of a resumed run
+                    urls = iter(self._queued.pop(name, []))
+                else:
+                    # Lazy: the next listing page is fetched only once this one's URLs are queued
+                    urls = self.coordinator.scrapers[name].iter_article_urls(list_url)
+                job = [name, list_url, urls, 0, 0]
+            if self._discover(job):
+                continue
+            # URLs in flight hold the rest of the source's budget: set the job
+            # aside and come back to it once one of them is recorded
+            name = job[0]
+            with self._settled:
+                jobs.put(job)
+                while self.found[name] < self.max_articles and not self._budget_left(name):
+                    self._settled.wait(_BUDGET_WAIT)
+
+    def _discover(self, job: list) -> bool:
+        """
+        Queue the URLs of a discovery job [source, list_url, urls, discovered,
+        queued] while its source's budget has room; returns False when it
+        stops early because URLs in flight hold the rest of the budget
+        """
+        name, list_url, urls = job[:3]
+        index = self.coordinator.index
+        exhausted = reserved = False
+        try:
+            while True:
+                if not reserved:
+                    # Take a share of the budget before reading on, so a spent
+                    # budget fetches no further listing page
+                    with self._settled:
+                        if self.found[name] >= self.max_articles:
+                            break
+                        if not self._budget_left(name):
+                            return False
+                        self._pending[name] += 1
+                        reserved = True
+                url = next(urls, None)
+                if url is None:
+                    exhausted = True
+                    break
+                job[3] += 1
+                if index and not index.should_fetch(url):
+                    continue
+                with self._seen_lock:
+                    if url in self._seen:
+                        continue
+                    self._seen.add(url)
+                    self._inflight[url] = name
+                reserved = False
+                # Blocks while the fetch queue is full, which paces discovery
+                self.fetch_q.put((name, url))
+                job[4] += 1
+        finally:
+            if reserved:
+                self._release(name)
+        if list_url is not None:
+            logging.info(f"{list_url}: {job[4]} of {job[3]} URLs are new")
+            if exhausted:
+                with self._seen_lock:
+                    self._lists_done.add((name, list_url))
+        return True
+
+    # Stage 2: fetch
+    def _fetch_stage(self):
+        asyncio.run(self._fetch_async())
+        self.parse_q.put(_DONE)
+
+    async def _fetch_async(self):
+        loop = asyncio.get_running_loop()
+        fetcher = self.coordinator.fetcher
+        # Queue hand-offs block, so they run on threads next to the loop
+        with ThreadPoolExecutor(self.fetch_width + 1) as io:
+            async with fetcher.session() as session:
+                async def worker():
+                    while True:
+                        task = await loop.run_in_executor(io, self.fetch_q.get)
+                        if task is _DONE:
+                            await loop.run_in_executor(io, self.fetch_q.put, _DONE)
+                            return
+                        for q, item in await self._fetch_pair(session, *task):
+                            await loop.run_in_executor(io, q.put, item)
+
+                await asyncio.gather(*(worker() for _ in range(self.fetch_width)))
+
+    async def _fetch_pair(self, session, name: str, bn_url: str) -> List[Tuple[queue.Queue, tuple]]:
+        """Fetch a Bengali page and its English counterpart; returns queue hand-offs"""
+        scraper = self.coordinator.scrapers[name]
+        matched = name in self.coordinator.english_scrapers
+        counterparts = self.coordinator.counterparts
+        candidates = []
+        if not matched:
+            rules = scraper.source_config.get('counterpart_rules', COUNTERPART_CONFIG['rules'])
+            # Rules that leave the URL unchanged are skipped; a page paired with itself is junk
+            candidates = counterparts.candidates(name, bn_url, rules)
+            if not candidates:
+                # Every guess is retired or known to be missing, so the Bengali page is not needed
+                METRICS.inc('counterpart_total', source=name, outcome='no_candidate')
+                return [(self.write_q, ('mark', name, bn_url, URLIndex.FETCHED))]
+
+        fetcher = self.coordinator.fetcher
+        bn_html = await fetcher.fetch(session, bn_url)
+        if bn_html is None:
+            return [(self.write_q, ('mark', name, bn_url, URLIndex.FAILED))]
+
+        # A page the cache vouches for whose pair is already on disk needs no parsing
+        if scraper.is_unchanged(bn_url) and self.coordinator.dataset.has_pair(bn_url):
+            return [(self.write_q, ('mark', name, bn_url, URLIndex.PAIRED))]
+
+        if matched:
+            return [(self.parse_q, (name, bn_url, bn_html, None, None, None))]
+        for rule, en_url in candidates:
+            if counterparts.should_probe(name, rule) and not await self._probe(session, name, en_url):
+                counterparts.record(name, rule, hit=False)
+                METRICS.inc('counterpart_total', source=name, outcome='probe_missing')
+                continue
+            status, en_html = await fetcher.fetch_status(session, en_url)
+            if en_html is not None:
+                counterparts.record(name, rule, hit=True)
+                return [(self.parse_q, (name, bn_url, bn_html, en_url, en_html, rule))]
+            if status in _MISSING:
+                counterparts.add_missing(en_url, str(status))
+                counterparts.record(name, rule, hit=False)
+                METRICS.inc('counterpart_total', source=name, outcome='missing')
+        return [(self.write_q, ('mark', name, bn_url, URLIndex.FETCHED))]
+
+    async def _probe(self, session, name: str, url: str) -> bool:
+        """False only when the source says url does not exist; missing URLs are remembered"""
+        counterparts = self.coordinator.counterparts
+        method = counterparts.probe_method(name)
+        while method != 'get':
+            status = await self.coordinator.fetcher.probe(session, url, method)
+            if status in _REFUSED:
+                method = counterparts.probe_refused(name, method)
+                continue
+            if status in _MISSING:
+                counterparts.add_missing(url, str(status))
+                return False
+            return True
+        return True
+
+    # Stages 3 and 4: process pools
+    def _pool_stage(self, inbox: queue.Queue, width: int,
+                    submit: Callable[[Optional[ProcessPoolExecutor], tuple], Future],
+                    finish: Callable[[tuple, Future], None], outbox: queue.Queue):
+        """
+        Feed inbox items to a process pool, keeping at most 2 * width tasks in
+        flight, and hand results to finish() in arrival order. width 0 runs
+        the work inline on this thread.
+        """
+        # Stage threads may hold locks at fork time, so workers start from a clean process
+        method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        pool = (ProcessPoolExecutor(width, mp_context=multiprocessing.get_context(method))
+                if width > 0 else None)
+        pending = deque()
+        try:
+            while True:
+                try:
+                    item = inbox.get(block=not pending)
+                except queue.Empty:
+                    # Nothing new to submit: settle the oldest task instead of holding its result
+                    # back, as discovery may be waiting for its URL to free up budget
+                    finish(*pending.popleft())
+                    continue
+                if item is _DONE:
+                    break
+                pending.append((item, submit(pool, item)))
+                while pending and (len(pending) > 2 * max(width, 1) or pending[0][1].done()):
+                    finish(*pending.popleft())
+            while pending:
+                finish(*pending.popleft())
+        finally:
+            if pool:
+                pool.shutdown()
+            outbox.put(_DONE)
+
+    @staticmethod
+    def _call(pool: Optional[ProcessPoolExecutor], fn, *args) -> Future:
+        future = Future()
+        if pool:
+            # Merge the worker's metrics here and resolve to fn's plain result
+            def unwrap(inner: Future):
+                try:
+                    result, metrics = inner.result()
+                except Exception as e:
+                    future.set_exception(e)
+                    return
+                METRICS.merge(metrics)
+                future.set_result(result)
+
+            pool.submit(_measured, fn, *args).add_done_callback(unwrap)
+            return future
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def _submit_parse(self, pool, item) -> Future:
+        name, bn_url, bn_html, en_url, en_html, _ = item
+        scraper = self.coordinator.scrapers[name]
+        return self._call(pool, extract_pair, type(scraper), name, scraper.source_config,
+                          self.coordinator.parser, bn_url, bn_html, en_url, en_html)
+
+    def _finish_parse(self, item, future: Future):
+        name, bn_url, _, en_url, _, rule = item
+        try:
+            bn_article, en_article = future.result()
+        except Exception as e:
+            logging.error(f"Error extracting from {bn_url}: {str(e)}")
+            bn_article = en_article = None
+        if bn_article and name in self.coordinator.english_scrapers:
+            en_article = self._match(name, bn_article)
+        elif bn_article and rule:
+            METRICS.inc('counterpart_total', source=name, outcome='found' if en_article else 'unextractable')
+            if not en_article:
+                # Downloaded, so counted as a hit, but no use as a pair
+                self.coordinator.counterparts.record(name, rule, hit=False, revise=True)
+                self.coordinator.counterparts.add_missing(en_url, 'extract')
+        if not bn_article:
+            self.write_q.put(('mark', name, bn_url, URLIndex.FAILED))
+        elif not en_article:
+            self.write_q.put(('mark', name, bn_url, URLIndex.FETCHED))
+        else:
+            self.align_q.put((name, bn_article, en_article))
+
+    def _match(self, name: str, bn_article: Dict) -> Optional[Dict]:
+        matched = self.coordinator.english.match(name, bn_article)
+        METRICS.inc('match_total', source=name, outcome='matched' if matched else 'unmatched')
+        if not matched:
+            return None
+        en_article, similarity = matched
+        METRICS.observe('match_score', similarity, source=name)
+        logging.debug(f"Matched {bn_article['url']} to {en_article['url']} ({similarity:.2f})")
+        return en_article
+
+    def _submit_align(self, pool, item) -> Future:
+        _, bn_article, en_article = item
+        return self._call(pool, align_pair, bn_article, en_article)
+
+    def _finish_align(self, item, future: Future):
+        name, bn_article, en_article = item
+        try:
+            aligned = future.result()
+        except Exception as e:
+            logging.error(f"Error aligning {bn_article['url']}: {str(e)}")
+            aligned = []
+        self.write_q.put(('pair', name, bn_article, en_article, aligned))
+
+    # Stage 5: write
+    def _write_stage(self):
+        saved = time.monotonic()
+        while True:
+            try:
+                record = self.write_q.get(timeout=self.checkpoint_every)
+            except queue.Empty:
+                record = None
+            if record is _DONE:
+                return
+            if record is not None:
+                url, paired = self._write(record)
+                with self._settled:
+                    # The pair is counted and its URL's share of the budget freed in
+                    # one step, so discovery never sees a budget both spent and held
+                    if paired:
+                        self.found[record[1]] += 1
+                    if self._inflight.pop(url, None) is not None:
+                        self._pending[record[1]] -= 1
+                    self._settled.notify_all()
+            if self.checkpoint and time.monotonic() - saved >= self.checkpoint_every:
+                self._save_checkpoint()
+                saved = time.monotonic()
+
+    def _write(self, record: tuple) -> Tuple[str, bool]:
+        """Record one outcome; returns the Bengali URL it settles and whether it was paired"""
+        if record[0] == 'mark':
+            _, name, url, status = record
+            self.coordinator._mark(url, status, name)
+            return url, False
+
+        _, name, bn_article, en_article, aligned = record
+        matched = name in self.coordinator.english_scrapers
+        if self.coordinator.dataset.add_aligned_pair(bn_article, en_article, aligned):
+            self.coordinator._mark(bn_article['url'], URLIndex.PAIRED, name)
+            return bn_article['url'], True
+        if matched:
+            # Free the English article for a Bengali one it aligns with
+            self.coordinator.english.release(en_article['url'])
+        self.coordinator._mark(bn_article['url'], URLIndex.FETCHED, name)
+        return bn_article['url'], False
@@ -0,0 +1,234 @@
+import logging
+import multiprocessing
+import os
+import socket
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+from scrapers.config import DISCOVERY_CONFIG, FETCH_CONFIG, QUEUE_CONFIG
+from scrapers.metrics import METRICS
+from scraping.coordinator import ScrapingCoordinator, load_scraper_class
+from scraping.pipeline import ScrapingPipeline
+from scraping.url_index import URLIndex
+from scraping.work_queue import SQLiteWorkQueue, WorkQueue
+
+
+def default_worker_id() -> str:
+    return f'{socket.gethostname()}-{os.getpid()}'
+
+
+class _WorkerCoordinator(ScrapingCoordinator):
+    """Coordinator that also keeps the outcome of each URL, for settling its queue task"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.outcomes: Dict[str, str] = {}
+
+    def _mark(self, url: str, status: str, source: str):
+        self.outcomes[url] = status
+        super()._mark(url, status, source)
+
+
+class QueueWorker:
+    """
+    One crawl worker draining a WorkQueue filled by ScrapingCoordinator.enqueue().
+
+    'list' tasks are discovery entries: a listing page queues its article
+    URLs as 'article' tasks and the page after it as another 'list' task,
+    up to DISCOVERY_CONFIG['max_pages'], and a sitemap queues all of its
+    articles. 'article' tasks are leased in batches and run through a
+    ScrapingPipeline seeded with their URLs; each task is completed with
+    the URL's outcome ('paired', 'fetched' or 'failed'), or failed back to
+    the queue when the batch broke off before reaching it. A heartbeat
+    thread keeps the leases of the batch in hand alive, so a worker that
+    dies holds its tasks up for at most QUEUE_CONFIG['visibility'] seconds.
+
+    Workers share the output directory and with it the URL, counterpart
+    and English indexes, which run in WAL mode so that their writes do not
+    lock each other out. Each worker keeps its own Bloom filter over the URL
+    index, so should_fetch() only knows about the URLs that existed when
+    the worker started and the ones it marked itself. The queue, not the
+    index, keeps a URL from being fetched twice in one run. English claims
+    are conditional updates, so an English article still pairs only once.
+    Pairs and archived pages take one writer per store, so workers write
+    them under <output_dir>/workers/<worker_id>/ for
+    ScrapingCoordinator.merge_workers() to fold in. Workers run without
+    the HTTP cache, as the queue hands out each URL once per run.
+    The per-source budget is shared through the queue's paired count
+    (see _articles()).
+    """
+
+    def __init__(self, queue: WorkQueue, output_dir: str, worker_id: Optional[str] = None,
+                 concurrency: int = FETCH_CONFIG['concurrency'], parser: Optional[str] = None,
+                 archive: bool = True, batch: int = QUEUE_CONFIG['batch'],
+                 visibility: float = QUEUE_CONFIG['visibility'],
+                 heartbeat: float = QUEUE_CONFIG['heartbeat'], poll: float = QUEUE_CONFIG['poll']):
+        self.queue = queue
+        self.worker_id = worker_id or default_worker_id()
+        self.batch = batch
+        self.visibility = visibility
+        self.heartbeat = heartbeat
+        self.poll = poll
+        # Crawl the sources as the run that filled the queue configured them,
+        # without touching this process's NEWS_SOURCES
+        self.sources: Dict[str, Dict] = queue.get_meta('sources', {})
+        private = Path(output_dir) / 'workers' / self.worker_id
+        self.coordinator = _WorkerCoordinator(output_dir, concurrency=concurrency, parser=parser,
+                                              archive_dir=str(private / 'archive') if archive else None,
+                                              pairs_dir=str(private / 'pairs'))
+        self.max_articles = queue.get_meta('max_articles', sys.maxsize)
+        for name, class_path in queue.get_meta('scrapers', {}).items():
+            self.coordinator.register_scraper(name, load_scraper_class(class_path), self.sources.get(name))
+        self.done = Counter()
+
+    def run(self) -> Counter:
+        """Work until no task is queued or leased; returns tasks settled per result"""
+        logging.info(f"Worker {self.worker_id} started on {', '.join(self.coordinator.scrapers)}")
+        while True:
+            tasks = self.queue.lease(self.worker_id, self.batch, self.visibility)
+            if not tasks:
+                if not self.queue.pending():
+                    break
+                # Other workers hold the rest, or it waits out a retry delay
+                time.sleep(self.poll)
+                continue
+            stop = threading.Event()
+            beat = threading.Thread(target=self._keep_alive, args=(tasks, stop),
+                                    name='heartbeat', daemon=True)
+            beat.start()
+            try:
+                released = self._work(tasks)
+            finally:
+                stop.set()
+                beat.join()
+            if released:
+                # Other workers' leases hold the rest of the budget; let them settle first
+                time.sleep(self.poll)
+        logging.info(f"Worker {self.worker_id} finished: "
+                     + ', '.join(f'{count} {result}' for result, count in sorted(self.done.items())))
+        return self.done
+
+    def _keep_alive(self, tasks: List[Dict], stop: threading.Event):
+        while not stop.wait(self.heartbeat):
+            self.queue.heartbeat(tasks, self.visibility)
+
+    def _settle(self, task: Dict, result: str):
+        if self.queue.complete(task, result):
+            self.done[result] += 1
+
+    def _budget_left(self, source: str) -> bool:
+        return self.queue.counts(source).get(f'{WorkQueue.DONE}:{URLIndex.PAIRED}', 0) < self.max_articles
+
+    def _work(self, tasks: List[Dict]) -> int:
+        """Work on a leased batch; returns the number of tasks handed back untried"""
+        articles: Dict[str, List[Dict]] = {}
+        for task in tasks:
+            if task['group'] not in self.coordinator.scrapers:
+                self.queue.fail(task, f"no scraper for {task['group']}")
+            elif not self._budget_left(task['group']):
+                self._settle(task, 'skipped')
+            elif task['kind'] == 'list':
+                try:
+                    self._list(task)
+                except Exception as e:
+                    logging.error(f"Error listing {task['key']}: {e}")
+                    self.queue.fail(task, repr(e))
+            else:
+                articles.setdefault(task['group'], []).append(task)
+        return self._articles(articles) if articles else 0
+
+    def _list(self, task: Dict):
+        """Queue the articles of one listing page and the page after it, or of a sitemap"""
+        name, url, page = task['group'], task['key'], task['payload'].get('page', 1)
+        scraper = self.coordinator.scrapers[name]
+        if urlparse(url).path.endswith('.xml'):
+            urls, next_url = list(scraper.iter_article_urls(url)), None
+        else:
+            urls, next_url = scraper.discover_page(url)
+        # The queue doubles as the seen set: a page with nothing new ends the listing
+        queued = self.queue.put_many('article', name, ((article_url, None) for article_url in urls))
+        if queued and next_url and page < DISCOVERY_CONFIG['max_pages']:
+            self.queue.put('list', next_url, name, {'page': page + 1})
+        logging.info(f"{url}: {queued} of {len(urls)} URLs are new")
+        self._settle(task, 'listed')
+
+    def _articles(self, articles: Dict[str, List[Dict]]) -> int:
+        """
+        Run each source's article tasks through a pipeline and settle each
+        task by its URL's outcome. The pipeline gets what is left of the
+        source's budget once pairs found and tasks leased by other workers
+        are counted; tasks it does not reach go back to the queue untried.
+        Returns the number of tasks handed back.
+        """
+        index = self.coordinator.index
+        released = 0
+        for name, tasks in articles.items():
+            pending = []
+            for task in tasks:
+                if index and not index.should_fetch(task['key']):
+                    # Paired by an earlier run, or not due for a retry yet
+                    self._settle(task, 'known')
+                else:
+                    pending.append(task)
+            if not pending:
+                continue
+            counts = self.queue.counts(name)
+            others = max(counts.get(WorkQueue.LEASED, 0) - len(pending), 0)
+            budget = self.max_articles - counts.get(f'{WorkQueue.DONE}:{URLIndex.PAIRED}', 0) - others
+            self.coordinator.outcomes.clear()
+            error = None
+            if budget > 0:
+                try:
+                    ScrapingPipeline(self.coordinator, max_articles=budget, parse_width=0, align_width=0,
+                                     seeds={name: [task['key'] for task in pending]}).run()
+                except Exception as e:
+                    logging.error(f"Worker {self.worker_id} batch of {name} failed: {e}")
+                    error = repr(e)
+            for task in pending:
+                outcome = self.coordinator.outcomes.get(task['key'])
+                if outcome is not None:
+                    self._settle(task, outcome)
+                elif error:
+                    self.queue.fail(task, error)
+                elif self.queue.release(task):
+                    released += 1
+        return released
+
+    def close(self):
+        for resource in (self.coordinator.index, self.coordinator.counterparts,
+                         self.coordinator.english, self.coordinator.archive,
+                         self.coordinator.dataset.store):
+            if resource is not None:
+                resource.close()
+
+
+def run_worker(queue_path: str, output_dir: str, worker_id: Optional[str] = None, **options):
+    """Run one QueueWorker on a SQLite queue; returns its results and the metrics it recorded"""
+    queue = SQLiteWorkQueue(queue_path)
+    worker = QueueWorker(queue, output_dir, worker_id, **options)
+    try:
+        done = worker.run()
+    finally:
+        worker.close()
+        queue.close()
+    return done, METRICS.drain()
+
+
+def run_workers(count: int, queue_path: str, output_dir: str, **options) -> Counter:
+    """Drain a SQLite queue with count local worker processes, merging their metrics into this process's"""
+    method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    done = Counter()
+    with ProcessPoolExecutor(count, mp_context=multiprocessing.get_context(method)) as pool:
+        futures = [pool.submit(run_worker, queue_path, output_dir, f'{default_worker_id()}-{i}', **options)
+                   for i in range(count)]
+        for future in futures:
+            worker_done, metrics = future.result()
+            done.update(worker_done)
+            METRICS.merge(metrics)
+    return done
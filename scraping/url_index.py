@@ -0,0 +1,135 @@
+import hashlib
+import math
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings using double hashing"""
+
+    def __init__(self, capacity: int = 1_000_000, error_rate: float = 0.01):
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item: str):
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class URLIndex:
+    """
+    Persistent record of every article URL the crawler has handled.
+
+    SQLite holds one row per URL with its status ('fetched', 'paired' or
+    'failed'), attempt count and timestamps. An in-memory Bloom filter over
+    the same URLs answers "never seen" without touching the database, which
+    is the common case for a daily crawl's listing pages.
+
+    The Bloom filter is filled once when the index opens and then only from
+    this process's own marks. Processes sharing the file (queue workers) do
+    not see each other's new URLs there, so across them should_fetch() is
+    advisory; the work queue is what hands each URL out once.
+    """
+
+    FETCHED = 'fetched'
+    PAIRED = 'paired'
+    FAILED = 'failed'
+
+    def __init__(self, path: str, retry_after: float = 24 * 3600, max_attempts: int = 3):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.retry_after = retry_after
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), timeout=60, check_same_thread=False)
+        # WAL lets queue worker processes share the file without locking each other out
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.executescript('''
+            CREATE TABLE IF NOT EXISTS urls (
+                url TEXT PRIMARY KEY,
+                source TEXT,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                first_seen REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+        ''')
+        total = self._db.execute('SELECT COUNT(*) FROM urls').fetchone()[0]
+        self._bloom = BloomFilter(capacity=max(1_000_000, total * 2))
+        for (url,) in self._db.execute('SELECT url FROM urls'):
+            self._bloom.add(url)
+
+    def status(self, url: str) -> Optional[str]:
+        """Return the recorded status of url, or None if it was never seen"""
+        if url not in self._bloom:
+            return None
+        with self._lock:
+            row = self._db.execute('SELECT status FROM urls WHERE url = ?', (url,)).fetchone()
+        return row[0] if row else None
+
+    def should_fetch(self, url: str) -> bool:
+        """True for new URLs and for unpaired ones that are due for a retry"""
+        if url not in self._bloom:
+            return True
+        with self._lock:
+            row = self._db.execute('SELECT status, attempts, updated_at FROM urls WHERE url = ?',
+                                   (url,)).fetchone()
+        if not row:
+            return True
+        status, attempts, updated_at = row
+        if status == self.PAIRED or attempts >= self.max_attempts:
+            return False
+        return time.time() - updated_at >= self.retry_after
+
+    def filter_new(self, urls: Iterable[str]) -> List[str]:
+        """Drop URLs that are already paired or not yet due for a retry"""
+        return [url for url in dict.fromkeys(urls) if self.should_fetch(url)]
+
+    def mark(self, url: str, status: str, source: str = ''):
+        """Record the outcome of handling url"""
+        now = time.time()
+        with self._lock:
+            self._db.execute('''
+                INSERT INTO urls (url, source, status, attempts, first_seen, updated_at)
+                VALUES (?, ?, ?, 1, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET
+                    status = excluded.status,
+                    attempts = urls.attempts + 1,
+                    updated_at = excluded.updated_at
+            ''', (url, source, status, now, now))
+            self._db.commit()
+            if url not in self._bloom:
+                self._bloom.add(url)
+
+    def paired_since(self, since: float) -> Dict[str, int]:
+        """Number of URLs per source paired at or after the given time"""
+        with self._lock:
+            return dict(self._db.execute(
+                'SELECT source, COUNT(*) FROM urls WHERE status = ? AND updated_at >= ? GROUP BY source',
+                (self.PAIRED, since)))
+
+    def counts(self):
+        """Number of URLs per status"""
+        with self._lock:
+            return dict(self._db.execute('SELECT status, COUNT(*) FROM urls GROUP BY status'))
+
+    def close(self):
+        with self._lock:
+            self._db.commit()
+            self._db.close()
@@ -0,0 +1,257 @@
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from scrapers.config import QUEUE_CONFIG
+
+
+class WorkQueue(ABC):
+    """
+    Durable task queue shared by crawl workers.
+
+    A task is a dict: id, kind ('list' or 'article'), key, group (the
+    source), payload, attempts and lease. Keys are unique, so a URL is
+    queued once however many workers discover it. lease() hands a task to
+    one worker for ``visibility`` seconds; the worker extends that with
+    heartbeat() while it works and ends it with complete(), fail() or
+    release(). A lease that runs out, because its worker died or stalled,
+    makes the task available again, and a task leased ``max_attempts``
+    times without completing is set aside as dead. complete(), fail() and
+    release() return False when the caller's lease has already passed to
+    another worker.
+
+    SQLiteWorkQueue is the embedded backend; a network broker can
+    implement the same methods.
+    """
+
+    QUEUED = 'queued'
+    LEASED = 'leased'
+    DONE = 'done'
+    DEAD = 'dead'
+
+    @abstractmethod
+    def put(self, kind: str, key: str, group: str, payload: Optional[Dict] = None) -> bool:
+        """Queue a task; False if a task with this key was queued before"""
+        raise NotImplementedError
+
+    def put_many(self, kind: str, group: str, items: Iterable) -> int:
+        """Queue (key, payload) pairs; returns how many were new"""
+        return sum(self.put(kind, key, group, payload) for key, payload in items)
+
+    @abstractmethod
+    def lease(self, worker: str, limit: int = QUEUE_CONFIG['batch'],
+              visibility: float = QUEUE_CONFIG['visibility']) -> List[Dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def heartbeat(self, tasks: Iterable[Dict], visibility: float = QUEUE_CONFIG['visibility']) -> int:
+        """Extend the leases of tasks still held; returns how many were extended"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def complete(self, task: Dict, result: Optional[str] = None) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    def fail(self, task: Dict, error: str, retry_in: float = QUEUE_CONFIG['retry_delay']) -> bool:
+        """
+        Give a task back for another attempt, retry_in seconds per attempt
+        so far from now, or bury it once it is out of attempts
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def release(self, task: Dict) -> bool:
+        """Hand a leased task back untried; it does not count as an attempt"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def counts(self, group: Optional[str] = None) -> Dict[str, int]:
+        """Tasks per state, and done tasks per result as 'done:<result>'"""
+        raise NotImplementedError
+
+    def pending(self) -> int:
+        """Tasks queued or leased"""
+        counts = self.counts()
+        return counts.get(self.QUEUED, 0) + counts.get(self.LEASED, 0)
+
+    @abstractmethod
+    def set_meta(self, name: str, value):
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_meta(self, name: str, default=None):
+        raise NotImplementedError
+
+    @abstractmethod
+    def reset(self):
+        """Drop every task and setting, to start a new run"""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class SQLiteWorkQueue(WorkQueue):
+    """
+    WorkQueue in one SQLite file, safe to share between processes on a
+    machine. Leases are taken in an immediate transaction, so two workers
+    never receive the same task.
+    """
+
+    def __init__(self, path: str, max_attempts: int = QUEUE_CONFIG['max_attempts']):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), timeout=60, check_same_thread=False,
+                                   isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.executescript('''
+            CREATE TABLE IF NOT EXISTS tasks (
+                id INTEGER PRIMARY KEY,
+                kind TEXT NOT NULL,
+                key TEXT NOT NULL UNIQUE,
+                grp TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                state TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                lease TEXT,
+                worker TEXT,
+                lease_expires REAL,
+                available_at REAL NOT NULL,
+                result TEXT,
+                error TEXT
+            );
+            CREATE INDEX IF NOT EXISTS tasks_ready ON tasks (state, available_at);
+            CREATE TABLE IF NOT EXISTS meta (
+                name TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+        ''')
+
+    def put(self, kind: str, key: str, group: str, payload: Optional[Dict] = None) -> bool:
+        with self._lock:
+            cursor = self._db.execute('''
+                INSERT OR IGNORE INTO tasks (kind, key, grp, payload, state, available_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (kind, key, group, json.dumps(payload or {}), self.QUEUED, time.time()))
+        return bool(cursor.rowcount)
+
+    def put_many(self, kind: str, group: str, items: Iterable) -> int:
+        now = time.time()
+        rows = [(kind, key, group, json.dumps(payload or {}), self.QUEUED, now) for key, payload in items]
+        with self._lock:
+            before = self._db.total_changes
+            self._db.execute('BEGIN IMMEDIATE')
+            self._db.executemany('''
+                INSERT OR IGNORE INTO tasks (kind, key, grp, payload, state, available_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', rows)
+            self._db.execute('COMMIT')
+            return self._db.total_changes - before
+
+    def lease(self, worker: str, limit: int = QUEUE_CONFIG['batch'],
+              visibility: float = QUEUE_CONFIG['visibility']) -> List[Dict]:
+        now = time.time()
+        with self._lock:
+            self._db.execute('BEGIN IMMEDIATE')
+            try:
+                # Expired leases of tasks out of attempts are buried rather than handed out again
+                self._db.execute('''
+                    UPDATE tasks SET state = ?, error = COALESCE(error, 'lease expired'), lease = NULL
+                    WHERE state = ? AND lease_expires < ? AND attempts >= ?
+                ''', (self.DEAD, self.LEASED, now, self.max_attempts))
+                rows = self._db.execute('''
+                    SELECT id, kind, key, grp, payload, attempts FROM tasks
+                    WHERE (state = ? AND available_at <= ?) OR (state = ? AND lease_expires < ?)
+                    ORDER BY kind = 'article' DESC, id LIMIT ?
+                ''', (self.QUEUED, now, self.LEASED, now, limit)).fetchall()
+                tasks = []
+                for task_id, kind, key, group, payload, attempts in rows:
+                    lease = uuid.uuid4().hex
+                    self._db.execute('''
+                        UPDATE tasks SET state = ?, attempts = attempts + 1, lease = ?, worker = ?,
+                                         lease_expires = ?
+                        WHERE id = ?
+                    ''', (self.LEASED, lease, worker, now + visibility, task_id))
+                    tasks.append({'id': task_id, 'kind': kind, 'key': key, 'group': group,
+                                  'payload': json.loads(payload), 'attempts': attempts + 1,
+                                  'lease': lease})
+                self._db.execute('COMMIT')
+            except BaseException:
+                self._db.execute('ROLLBACK')
+                raise
+        return tasks
+
+    def heartbeat(self, tasks: Iterable[Dict], visibility: float = QUEUE_CONFIG['visibility']) -> int:
+        expires = time.time() + visibility
+        with self._lock:
+            before = self._db.total_changes
+            self._db.execute('BEGIN IMMEDIATE')
+            self._db.executemany('UPDATE tasks SET lease_expires = ? WHERE id = ? AND lease = ? AND state = ?',
+                                 [(expires, task['id'], task['lease'], self.LEASED) for task in tasks])
+            self._db.execute('COMMIT')
+            return self._db.total_changes - before
+
+    def complete(self, task: Dict, result: Optional[str] = None) -> bool:
+        with self._lock:
+            cursor = self._db.execute('''
+                UPDATE tasks SET state = ?, result = ?, lease = NULL, error = NULL
+                WHERE id = ? AND lease = ?
+            ''', (self.DONE, result, task['id'], task['lease']))
+        return bool(cursor.rowcount)
+
+    def fail(self, task: Dict, error: str, retry_in: float = QUEUE_CONFIG['retry_delay']) -> bool:
+        state = self.DEAD if task['attempts'] >= self.max_attempts else self.QUEUED
+        with self._lock:
+            cursor = self._db.execute('''
+                UPDATE tasks SET state = ?, error = ?, lease = NULL, available_at = ?
+                WHERE id = ? AND lease = ?
+            ''', (state, error, time.time() + retry_in * task['attempts'], task['id'], task['lease']))
+        return bool(cursor.rowcount)
+
+    def release(self, task: Dict) -> bool:
+        with self._lock:
+            cursor = self._db.execute('''
+                UPDATE tasks SET state = ?, attempts = attempts - 1, lease = NULL, available_at = ?
+                WHERE id = ? AND lease = ?
+            ''', (self.QUEUED, time.time(), task['id'], task['lease']))
+        return bool(cursor.rowcount)
+
+    def counts(self, group: Optional[str] = None) -> Dict[str, int]:
+        where, args = ('WHERE grp = ?', (group,)) if group is not None else ('', ())
+        with self._lock:
+            rows = self._db.execute(f'''
+                SELECT state, result, COUNT(*) FROM tasks {where} GROUP BY state, result
+            ''', args).fetchall()
+        counts: Dict[str, int] = {}
+        for state, result, count in rows:
+            counts[state] = counts.get(state, 0) + count
+            if state == self.DONE and result:
+                counts[f'{state}:{result}'] = counts.get(f'{state}:{result}', 0) + count
+        return counts
+
+    def set_meta(self, name: str, value):
+        with self._lock:
+            self._db.execute('INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)',
+                             (name, json.dumps(value)))
+
+    def get_meta(self, name: str, default=None):
+        with self._lock:
+            row = self._db.execute('SELECT value FROM meta WHERE name = ?', (name,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def reset(self):
+        with self._lock:
+            self._db.execute('DELETE FROM tasks')
+            self._db.execute('DELETE FROM meta')
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,41 @@
+"""
+Compact the sharded pair store: rewrite live records into fresh shards and
+drop records superseded by later saves of the same article.
+
+    python scripts/compact_pairs.py --data-dir data/pairs --import-legacy
+
+Run it while no crawl is writing to the store.
+"""
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from dataset.pair_store import PairStore
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compact the sharded pair store')
+    parser.add_argument('--data-dir', default='data/pairs', help='Directory holding the pair store')
+    parser.add_argument('--import-legacy', action='store_true',
+                        help='First move per-article <id>.json files into the store')
+    parser.add_argument('--keep-legacy', action='store_true',
+                        help='Leave imported per-article files on disk')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    data_dir = Path(args.data_dir)
+    store = PairStore(str(data_dir))
+    if args.import_legacy:
+        imported = store.import_legacy(data_dir, remove=not args.keep_legacy)
+        logging.info(f"Imported {imported} per-article pair files")
+
+    stats = store.compact()
+    store.close()
+    logging.info(f"Compacted {stats['records']} records into {stats['shards']} shards "
+                 f"({stats['bytes_before']} -> {stats['bytes_after']} bytes)")
+
+
+if __name__ == '__main__':
+    main()
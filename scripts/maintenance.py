@@ -1,39 +1,353 @@
+"""
+Dataset maintenance: quality filtering and near-duplicate removal.
+
+Near duplicates (the same syndicated sentence with different spacing,
+punctuation or numbering) are found with MinHash signatures over character
+shingles of the normalized pair and banded LSH, in three streaming passes:
+
+    1. read the dataset in chunks; worker processes compute signatures and
+       band keys, which are spilled to hash-partitioned files on disk
+    2. per partition, rows sharing a band key are unioned into clusters
+    3. the dataset is streamed again and only the first row of each cluster
+       is written back, to dataset.json and to the train, validation and
+       test files, split as the build command splits them
+
+Memory is bounded by the chunk size plus one int32 label per row.
+
+    python scripts/maintenance.py --threshold 0.8 --workers 8
+"""
+import argparse
+import contextlib
 import json
 import logging
+import os
+import re
+import sys
+import tempfile
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Dict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
 import pandas as pd
-from langdetect import detect
 
-def remove_duplicates(df: pd.DataFrame) -> pd.DataFrame:
-    """Remove duplicate sentence pairs"""
-    return df.drop_duplicates(subset=['bn', 'en'])
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from dataset.dataset_builder import BUILD_CONFIG, _JSONLWriter, assign_splits
+
+DEDUP_CONFIG = {
+    'threshold': 0.8,       # estimated Jaccard similarity above which pairs are duplicates
+    'num_perm': 128,        # MinHash permutations
+    'shingle': 5,           # characters per shingle
+    'chunk_size': 50_000,   # rows per worker task
+    'partitions': 16,       # band-key spill files
+    'seed': 1
+}
+
+_DIGITS = re.compile(r'\d+')
+_PUNCT = re.compile(r'[^ঀ-৿\w\s]+')
+_KEY_DTYPE = np.dtype([('key', '<u8'), ('row', '<u4')])
+
 
 def filter_pairs(df: pd.DataFrame) -> pd.DataFrame:
     """Apply quality filters"""
-    mask = (
-        (df['bn'].str.len() > 10) &
-        (df['en'].str.len() > 10) &
-        (df['bn'].str.len() < 1000) &
-        (df['en'].str.len() < 1000)
-    )
-    return df[mask]
-
-def main():
+    return df[quality_mask(df)]
+
+
+def quality_mask(df: pd.DataFrame) -> np.ndarray:
+    """Rows of df that pass the length filters"""
+    bn_len = df['bn'].str.len()
+    en_len = df['en'].str.len()
+    return ((bn_len > 10) & (en_len > 10) & (bn_len < 1000) & (en_len < 1000)).to_numpy()
+
+
+def normalize_for_dedup(text: str) -> str:
+    """Lowercase, drop digits and punctuation, collapse whitespace"""
+    return ' '.join(_PUNCT.sub(' ', _DIGITS.sub('', text.lower())).split())
+
+
+def optimal_bands(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """
+    Choose (bands, rows per band) with bands * rows <= num_perm minimising
+    the false-positive plus false-negative area of the LSH S-curve around
+    threshold
+    """
+    sims = np.linspace(0, 1, 1001)
+    best, best_error = (1, num_perm), np.inf
+    for bands in range(1, num_perm + 1):
+        for rows in range(1, num_perm // bands + 1):
+            hit = 1 - (1 - sims ** rows) ** bands
+            error = np.mean(np.where(sims < threshold, hit, 1 - hit))
+            if error < best_error:
+                best, best_error = (bands, rows), error
+    return best
+
+
+def _splitmix64(x: np.ndarray) -> np.ndarray:
+    x = x + np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+class MinHasher:
+    """MinHash signatures of character shingles, computed for many texts at once"""
+
+    def __init__(self, num_perm: int = DEDUP_CONFIG['num_perm'], shingle: int = DEDUP_CONFIG['shingle'],
+                 seed: int = DEDUP_CONFIG['seed'], batch: int = 2000, block: int = 8):
+        rng = np.random.default_rng(seed)
+        # Multiply-shift hashing: h -> (a * h + b) >> 32 with odd a
+        self.a = rng.integers(1, 2 ** 63, num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self.b = rng.integers(0, 2 ** 63, num_perm, dtype=np.uint64)
+        self.num_perm = num_perm
+        self.shingle = shingle
+        self.batch = batch
+        self.block = block
+
+    def _shingles(self, texts: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Hashes of every shingle and the offset of each text's first one"""
+        n = self.shingle
+        texts = [t or ' ' for t in texts]
+        lengths = np.fromiter((len(t) for t in texts), dtype=np.int64, count=len(texts))
+        # Texts shorter than a shingle still get one, padded with NULs
+        pad = '\0' * (n - 1)
+        # Scraped text can hold lone surrogates, which strict UTF-32 refuses to encode
+        data = (pad.join(texts) + pad).encode('utf-32-le', 'surrogatepass')
+        codes = np.frombuffer(data, dtype='<u4').astype(np.uint64)
+        rolled = np.zeros(len(codes) - n + 1, dtype=np.uint64)
+        for k in range(n):
+            rolled = rolled * np.uint64(1_000_003) + codes[k:len(codes) - n + 1 + k]
+        starts = np.concatenate(([0], np.cumsum(lengths + n - 1)[:-1]))
+        first = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        positions = np.repeat(starts - first, lengths) + np.arange(lengths.sum())
+        return _splitmix64(rolled[positions]), first
+
+    def signatures(self, texts: List[str]) -> np.ndarray:
+        """Array of shape (len(texts), num_perm) of uint32 minimum hashes"""
+        result = np.empty((len(texts), self.num_perm), dtype=np.uint32)
+        shift = np.uint64(32)
+        for start in range(0, len(texts), self.batch):
+            hashes, first = self._shingles(texts[start:start + self.batch])
+            values = np.empty((self.block, len(hashes)), dtype=np.uint64)
+            for p in range(0, self.num_perm, self.block):
+                a = self.a[p:p + self.block, None]
+                b = self.b[p:p + self.block, None]
+                block = values[:len(a)]
+                np.multiply(a, hashes[None, :], out=block)
+                block += b
+                # The shift is monotonic, so it can wait until after the minimum
+                minima = np.minimum.reduceat(block, first, axis=1) >> shift
+                result[start:start + len(first), p:p + len(a)] = minima.T
+        return result
+
+
+def band_keys(signatures: np.ndarray, bands: int, rows: int) -> np.ndarray:
+    """64-bit key per (row, band); bands are salted so their keys never collide"""
+    keys = np.empty((len(signatures), bands), dtype=np.uint64)
+    for band in range(bands):
+        h = np.full(len(signatures), band, dtype=np.uint64)
+        for col in signatures[:, band * rows:(band + 1) * rows].T:
+            h = _splitmix64(h ^ col.astype(np.uint64))
+        keys[:, band] = h
+    return keys
+
+
+_hasher: Optional[MinHasher] = None
+
+
+def _init_worker(num_perm: int, shingle: int, seed: int):
+    global _hasher
+    _hasher = MinHasher(num_perm, shingle, seed)
+
+
+def _signature_chunk(start: int, bn: List[str], en: List[str], keep: np.ndarray,
+                     bands: int, rows: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Band keys for the kept rows of one chunk; runs in the worker pool"""
+    idx = np.flatnonzero(keep)
+    texts = [f"{normalize_for_dedup(bn[i])} | {normalize_for_dedup(en[i])}" for i in idx]
+    if not texts:
+        return np.empty(0, dtype=np.uint32), np.empty((0, bands), dtype=np.uint64)
+    return (start + idx).astype(np.uint32), band_keys(_hasher.signatures(texts), bands, rows)
+
+
+def _read_chunks(path: Path, chunk_size: int):
+    """Yield (first row number, DataFrame) for each chunk of a JSON lines file"""
+    start = 0
+    with pd.read_json(path, lines=True, chunksize=chunk_size, dtype=False,
+                      convert_dates=False, keep_default_dates=False) as reader:
+        for chunk in reader:
+            chunk = chunk.reset_index(drop=True)
+            yield start, chunk
+            start += len(chunk)
+
+
+def _find(parent: np.ndarray, x: np.ndarray) -> np.ndarray:
+    root = parent[x]
+    while True:
+        up = parent[root]
+        if np.array_equal(up, root):
+            return root
+        root = up
+
+
+def _union(parent: np.ndarray, u: np.ndarray, v: np.ndarray):
+    """Union rows u[i] and v[i]; roots always point at a smaller row id"""
+    while len(u):
+        ru, rv = _find(parent, u), _find(parent, v)
+        apart = ru != rv
+        u, v, ru, rv = u[apart], v[apart], ru[apart], rv[apart]
+        np.minimum.at(parent, np.maximum(ru, rv), np.minimum(ru, rv))
+
+
+def find_near_duplicates(path: Path, workers: Optional[int] = None,
+                         threshold: float = DEDUP_CONFIG['threshold'],
+                         num_perm: int = DEDUP_CONFIG['num_perm'],
+                         chunk_size: int = DEDUP_CONFIG['chunk_size'],
+                         partitions: int = DEDUP_CONFIG['partitions']) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Cluster near-duplicate rows of a JSON lines dataset. Returns (root, kept):
+    root[i] is the first row of row i's cluster, kept[i] whether row i passed
+    the quality filters (rows that did not are never clustered).
+    """
+    bands, rows = optimal_bands(threshold, num_perm)
+    logging.info(f"LSH with {bands} bands of {rows} rows for threshold {threshold}")
+    workers = (os.cpu_count() or 1) if workers is None else max(1, workers)
+
+    with tempfile.TemporaryDirectory(prefix='dedup-', dir=path.parent) as spill_dir:
+        spills = [open(Path(spill_dir) / f'keys-{p:03d}.bin', 'wb') for p in range(partitions)]
+        kept_chunks = []
+
+        def spill(row_ids: np.ndarray, keys: np.ndarray):
+            if not len(row_ids):
+                return
+            records = np.empty(keys.size, dtype=_KEY_DTYPE)
+            records['key'] = keys.ravel()
+            records['row'] = np.repeat(row_ids, keys.shape[1])
+            part = records['key'] % np.uint64(partitions)
+            order = np.argsort(part, kind='stable')
+            bounds = np.searchsorted(part[order], np.arange(partitions + 1))
+            for p in range(partitions):
+                spills[p].write(records[order[bounds[p]:bounds[p + 1]]].tobytes())
+
+        # Pass 1: signatures and band keys, at most 2 * workers chunks in flight
+        total = 0
+        with ProcessPoolExecutor(workers, initializer=_init_worker,
+                                 initargs=(num_perm, DEDUP_CONFIG['shingle'], DEDUP_CONFIG['seed'])) as pool:
+            pending = deque()
+            for start, chunk in _read_chunks(path, chunk_size):
+                keep = quality_mask(chunk)
+                kept_chunks.append(keep)
+                total = start + len(chunk)
+                pending.append(pool.submit(_signature_chunk, start, chunk['bn'].tolist(),
+                                           chunk['en'].tolist(), keep, bands, rows))
+                while len(pending) > 2 * workers or (pending and pending[0].done()):
+                    spill(*pending.popleft().result())
+            while pending:
+                spill(*pending.popleft().result())
+        for fp in spills:
+            fp.close()
+        logging.info(f"Hashed {total} rows")
+
+        # Pass 2: rows sharing a band key belong to one cluster
+        parent = np.arange(total, dtype=np.int64 if total >= 2 ** 31 else np.int32)
+        for p in range(partitions):
+            records = np.fromfile(Path(spill_dir) / f'keys-{p:03d}.bin', dtype=_KEY_DTYPE)
+            if not len(records):
+                continue
+            records = records[np.argsort(records['key'], kind='stable')]
+            new_group = np.concatenate(([True], records['key'][1:] != records['key'][:-1]))
+            group_first = records['row'][np.maximum.accumulate(np.where(new_group, np.arange(len(records)), 0))]
+            dup = ~new_group
+            _union(parent, records['row'][dup].astype(parent.dtype), group_first[dup].astype(parent.dtype))
+
+    while True:
+        up = parent[parent]
+        if np.array_equal(up, parent):
+            break
+        parent = up
+    kept = np.concatenate(kept_chunks) if kept_chunks else np.zeros(0, dtype=bool)
+    return parent, kept
+
+
+def cluster_report(root: np.ndarray, kept: np.ndarray, top: int = 10) -> Dict:
+    """Cluster-size histogram and the largest clusters"""
+    sizes = np.bincount(root[kept], minlength=len(root)) if len(root) else np.zeros(0, dtype=int)
+    clustered = sizes[sizes > 1]
+    histogram = Counter()
+    for low, high, label in ((2, 2, '2'), (3, 5, '3-5'), (6, 10, '6-10'),
+                             (11, 100, '11-100'), (101, np.inf, '>100')):
+        histogram[label] = int(((clustered >= low) & (clustered <= high)).sum())
+    largest = np.argsort(sizes)[::-1][:top]
+    return {
+        'rows': int(len(root)),
+        'filtered': int((~kept).sum()),
+        'duplicates': int(kept.sum() - (sizes > 0).sum()),
+        'clusters': int(len(clustered)),
+        'cluster_sizes': dict(histogram),
+        'largest': [{'row': int(r), 'size': int(sizes[r])} for r in largest if sizes[r] > 1]
+    }
+
+
+def write_deduplicated(path: Path, out_path: Path, root: np.ndarray, kept: np.ndarray,
+                       report: Dict, chunk_size: int = DEDUP_CONFIG['chunk_size'],
+                       split_dir: Optional[Path] = None) -> int:
+    """
+    Pass 3: stream path to out_path keeping the first row of every cluster.
+    With split_dir, the kept rows also replace the split files there, so a
+    duplicate cannot stay behind in one split while its twin is in another
+    """
+    examples = {item['row']: item for item in report['largest']}
+    names = [name for name, _ in BUILD_CONFIG['splits']]
+    written = 0
+    with contextlib.ExitStack() as stack:
+        dataset_out = stack.enter_context(_JSONLWriter(out_path))
+        split_outs = ([stack.enter_context(_JSONLWriter(split_dir / f'{name}.json')) for name in names]
+                      if split_dir is not None else [])
+        for start, chunk in _read_chunks(path, chunk_size):
+            row_ids = np.arange(start, start + len(chunk))
+            keep = kept[row_ids] & (root[row_ids] == row_ids)
+            for row in row_ids[keep]:
+                if row in examples:
+                    examples[row]['bn'] = chunk.at[row - start, 'bn']
+                    examples[row]['en'] = chunk.at[row - start, 'en']
+            out = chunk[keep]
+            dataset_out.write(out)
+            if split_outs:
+                split = assign_splits(out['url'])
+                for idx, split_out in enumerate(split_outs):
+                    split_out.write(out[split == idx])
+            written += len(out)
+    return written
+
+
+def main(argv: Optional[List[str]] = None, prog: Optional[str] = None):
+    parser = argparse.ArgumentParser(prog=prog, description='Filter and near-deduplicate the dataset')
+    parser.add_argument('--data-dir', default='data/pairs',
+                        help='Directory holding dataset.json, as written by the build command')
+    parser.add_argument('--threshold', type=float, default=DEDUP_CONFIG['threshold'],
+                        help='Estimated Jaccard similarity above which pairs are duplicates')
+    parser.add_argument('--num-perm', type=int, default=DEDUP_CONFIG['num_perm'])
+    parser.add_argument('--chunk-size', type=int, default=DEDUP_CONFIG['chunk_size'])
+    parser.add_argument('--workers', '-w', type=int, default=None)
+    args = parser.parse_args(argv)
     logging.basicConfig(level=logging.INFO)
-    data_dir = Path('data')
-    
-    # Load dataset
-    df = pd.read_json(data_dir / 'dataset.json', lines=True)
-    initial_size = len(df)
-    
-    # Apply maintenance
-    df = remove_duplicates(df)
-    df = filter_pairs(df)
-    
-    # Save cleaned dataset
-    df.to_json(data_dir / 'dataset.json', orient='records', lines=True)
-    logging.info(f"Removed {initial_size - len(df)} low quality pairs")
+    data_dir = Path(args.data_dir)
+    dataset_path = data_dir / 'dataset.json'
+    if not dataset_path.is_file():
+        parser.error(f"{dataset_path} not found; build the dataset first or pass --data-dir")
+
+    root, kept = find_near_duplicates(dataset_path, workers=args.workers, threshold=args.threshold,
+                                      num_perm=args.num_perm, chunk_size=args.chunk_size)
+    report = cluster_report(root, kept)
+    written = write_deduplicated(dataset_path, dataset_path, root, kept, report, args.chunk_size,
+                                 split_dir=data_dir)
+
+    report['written'] = written
+    with open(data_dir / 'dedup_report.json', 'w', encoding='utf-8') as fp:
+        json.dump(report, fp, ensure_ascii=False, indent=2)
+    logging.info(f"Removed {report['filtered']} low quality and {report['duplicates']} "
+                 f"near-duplicate pairs; clusters by size: {report['cluster_sizes']}")
+
 
 if __name__ == '__main__':
     main()
@@ -1,51 +1,273 @@
+"""
+Validate the built dataset and write a per-split, per-source failure report.
+
+Files are streamed in chunks of lines and checked in a process pool. Format,
+length-ratio and script checks are vectorized; langdetect only runs on rows
+whose script shares are inconclusive. Each failing row is counted once,
+under the first check it fails.
+
+    python scripts/validate_dataset.py --data-dir data/pairs --report data/validation_report.json
+"""
+import argparse
 import json
 import logging
+import os
+import sys
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
 import pandas as pd
-from langdetect import detect
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from dataset.filters import FILTER_CONFIG, bengali_share
+
+VALIDATION_CONFIG = {
+    'word_ratio': (0.3, 3.0),   # bn words / en words
+    'chunk_lines': 20_000,
+    'splits': ('train', 'validation', 'test')
+}
+
+# Failure categories, in the order rows are checked
+FORMAT = 'format'
+LENGTH = 'length'
+SCRIPT = 'script'
+LANGUAGE = 'language'
+CATEGORIES = (FORMAT, LENGTH, SCRIPT, LANGUAGE)
+
+
+def _init_worker():
+    from langdetect import DetectorFactory
+    DetectorFactory.seed = 0
+
+
+def _parse(lines: List[str]) -> pd.DataFrame:
+    """
+    One row per line: bn, en, source, and valid, False for lines without
+    non-empty string bn/en fields (those count under source 'unknown')
+    """
+    rows = []
+    for line in lines:
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            record = None
+        if (not isinstance(record, dict) or not isinstance(record.get('bn'), str)
+                or not isinstance(record.get('en'), str)
+                or not record['bn'].strip() or not record['en'].strip()):
+            rows.append(('', '', 'unknown', False))
+            continue
+        rows.append((record['bn'], record['en'], str(record.get('source') or 'unknown'), True))
+    return pd.DataFrame(rows, columns=['bn', 'en', 'source', 'valid'])
+
+
+def categorize(df: pd.DataFrame) -> np.ndarray:
+    """
+    0 for each row of df (bn, en and valid columns) that passes, otherwise
+    1 + the index in CATEGORIES of the first check it fails
+    """
+    from langdetect import detect, LangDetectException
+
+    category = np.zeros(len(df), dtype=np.int8)
+    category[~df['valid'].to_numpy(dtype=bool)] = CATEGORIES.index(FORMAT) + 1
+    bn_words = df['bn'].str.split().str.len().to_numpy()
+    en_words = df['en'].str.split().str.len().to_numpy()
+    low, high = VALIDATION_CONFIG['word_ratio']
+    ratio = bn_words / np.maximum(en_words, 1)
+    category[(category == 0) & ((ratio < low) | (ratio > high))] = CATEGORIES.index(LENGTH) + 1
+
+    bn_share = bengali_share(df['bn'].tolist())
+    en_share = bengali_share(df['en'].tolist())
+    wrong = (bn_share < FILTER_CONFIG['script_reject']) | (en_share > FILTER_CONFIG['script_reject'])
+    category[(category == 0) & wrong] = CATEGORIES.index(SCRIPT) + 1
+
+    confident = (bn_share >= FILTER_CONFIG['bn_script_min']) & (en_share <= FILTER_CONFIG['en_script_max'])
+    for i in np.flatnonzero((category == 0) & ~confident):
+        try:
+            if detect(df['bn'].iat[i]) != 'bn' or detect(df['en'].iat[i]) != 'en':
+                category[i] = CATEGORIES.index(LANGUAGE) + 1
+        except LangDetectException:
+            # No detectable features, e.g. only digits or punctuation
+            category[i] = CATEGORIES.index(LANGUAGE) + 1
+    return category
+
+
+def check_chunk(lines: List[str]) -> Tuple[Counter, Counter]:
+    """
+    Validate one chunk of JSON lines. Returns (rows per source, failures per
+    (source, category)); unparseable lines count under source 'unknown'.
+    """
+    df = _parse(lines)
+    rows, failures = Counter(), Counter()
+    if df.empty:
+        return rows, failures
+    rows.update(df['source'].value_counts().to_dict())
+    category = categorize(df)
+    failed = category > 0
+    failures.update(zip(df['source'].to_numpy()[failed],
+                        (CATEGORIES[c - 1] for c in category[failed])))
+    return rows, failures
+
+
+def _line_chunks(path: Path, size: int) -> Iterator[List[str]]:
+    chunk = []
+    with open(path, encoding='utf-8') as fp:
+        for line in fp:
+            if line.strip():
+                chunk.append(line)
+                if len(chunk) >= size:
+                    yield chunk
+                    chunk = []
+    if chunk:
+        yield chunk
+
+
+def validate_file(path: Path, pool: ProcessPoolExecutor, workers: int,
+                  chunk_lines: int = VALIDATION_CONFIG['chunk_lines']) -> Tuple[Counter, Counter]:
+    """Validate one JSON lines file; at most 2 * workers chunks are in flight"""
+    rows, failures = Counter(), Counter()
+    pending = deque()
+
+    def collect():
+        chunk_rows, chunk_failures = pending.popleft().result()
+        rows.update(chunk_rows)
+        failures.update(chunk_failures)
+
+    for chunk in _line_chunks(path, chunk_lines):
+        pending.append(pool.submit(check_chunk, chunk))
+        while len(pending) > 2 * workers or (pending and pending[0].done()):
+            collect()
+    while pending:
+        collect()
+    return rows, failures
+
+
+def _summary(rows: int, failures: Counter) -> Dict:
+    failed = sum(failures.values())
+    return {
+        'rows': rows,
+        'failed': failed,
+        'failure_rate': failed / rows if rows else 0.0,
+        'failures': {category: failures[category] for category in CATEGORIES},
+    }
+
+
+def dataset_files(data_dir: Path) -> Dict[str, Path]:
+    """
+    The split files in data_dir, or {'all': dataset.json} when there are
+    none. Raises FileNotFoundError when some splits or the dataset are missing.
+    """
+    files = {split: data_dir / f'{split}.json' for split in VALIDATION_CONFIG['splits']}
+    missing = [str(path) for path in files.values() if not path.is_file()]
+    if not missing:
+        return files
+    if len(missing) < len(files):
+        raise FileNotFoundError(f"{', '.join(missing)} not found; rebuild the dataset")
+    if not (data_dir / 'dataset.json').is_file():
+        raise FileNotFoundError(f"No split files or dataset.json in {data_dir}; "
+                                f"build the dataset first or pass --data-dir")
+    return {'all': data_dir / 'dataset.json'}
+
+
+def validate_data_dir(data_dir: Path, workers: Optional[int] = None,
+                      chunk_lines: int = VALIDATION_CONFIG['chunk_lines']) -> Dict:
+    """
+    Validate the split files in data_dir, or dataset.json when there are
+    none, and return the report: totals, then rates per split and per source
+    """
+    files = dataset_files(Path(data_dir))
+    workers = (os.cpu_count() or 1) if workers is None else max(1, workers)
+
+    report = {'splits': {}, 'sources': {}}
+    total_rows, total_failures = 0, Counter()
+    source_rows, source_failures = Counter(), Counter()
+    with ProcessPoolExecutor(workers, initializer=_init_worker) as pool:
+        for split, path in files.items():
+            logging.info(f"Validating {path}")
+            rows, failures = validate_file(path, pool, workers, chunk_lines)
+            by_category = Counter()
+            for (_, category), count in failures.items():
+                by_category[category] += count
+            split_report = _summary(sum(rows.values()), by_category)
+            split_report['sources'] = {
+                source: _summary(count, Counter({c: failures[source, c] for c in CATEGORIES}))
+                for source, count in sorted(rows.items())
+            }
+            report['splits'][split] = split_report
+            total_rows += split_report['rows']
+            total_failures.update(by_category)
+            source_rows.update(rows)
+            source_failures.update(failures)
+
+    report['sources'] = {
+        source: _summary(count, Counter({c: source_failures[source, c] for c in CATEGORIES}))
+        for source, count in sorted(source_rows.items())
+    }
+    report.update(_summary(total_rows, total_failures))
+    return report
+
 
 def validate_sentence_pair(bn_text: str, en_text: str) -> bool:
-    """Validate Bengali-English sentence pair"""
-    try:
-        # Check language detection
-        if detect(bn_text) != 'bn' or detect(en_text) != 'en':
-            return False
-            
-        # Check length ratios
-        bn_len = len(bn_text.split())
-        en_len = len(en_text.split())
-        if not (0.3 <= bn_len/en_len <= 3.0):
-            return False
-            
-        return True
-    except:
+    """True when one Bengali-English pair passes every check"""
+    if not (isinstance(bn_text, str) and isinstance(en_text, str)):
         return False
+    _init_worker()
+    df = pd.DataFrame({'bn': [bn_text], 'en': [en_text],
+                       'valid': [bool(bn_text.strip() and en_text.strip())]})
+    return not categorize(df)[0]
 
-def validate_dataset(dataset_path: Path) -> Dict[str, List[str]]:
-    """Validate entire dataset and return statistics"""
-    errors = {
-        'language': [],
-        'length': [],
-        'format': []
-    }
-    
-    df = pd.read_json(dataset_path, lines=True)
-    for idx, row in df.iterrows():
-        if not validate_sentence_pair(row['bn'], row['en']):
-            errors['language'].append(idx)
-    
+
+def validate_dataset(dataset_path: Path) -> Dict[str, List[int]]:
+    """
+    Line numbers (blank lines skipped) of one JSON lines file that fail each
+    check, in this process. validate_data_dir streams whole data directories
+    through a process pool and reports rates per split and source.
+    """
+    _init_worker()
+    errors = {category: [] for category in CATEGORIES}
+    offset = 0
+    for lines in _line_chunks(Path(dataset_path), VALIDATION_CONFIG['chunk_lines']):
+        category = categorize(_parse(lines))
+        for i in np.flatnonzero(category):
+            errors[CATEGORIES[category[i] - 1]].append(offset + int(i))
+        offset += len(lines)
     return errors
 
-if __name__ == '__main__':
+
+def main(argv: Optional[List[str]] = None, prog: Optional[str] = None):
+    parser = argparse.ArgumentParser(prog=prog, description='Validate the built dataset')
+    parser.add_argument('--data-dir', default='data/pairs',
+                        help='Directory holding the split files or dataset.json')
+    parser.add_argument('--report', default=None,
+                        help='Where to write the JSON report (default: <data-dir>/validation_report.json)')
+    parser.add_argument('--max-failure-rate', type=float, default=0.0,
+                        help='Exit non-zero when the overall failure rate is above this')
+    parser.add_argument('--workers', '-w', type=int, default=None)
+    parser.add_argument('--chunk-lines', type=int, default=VALIDATION_CONFIG['chunk_lines'])
+    args = parser.parse_args(argv)
     logging.basicConfig(level=logging.INFO)
-    dataset_path = Path('data/dataset.json')
-    
-    errors = validate_dataset(dataset_path)
-    total_errors = sum(len(e) for e in errors.values())
-    
-    if total_errors > 0:
-        logging.error(f"Found {total_errors} validation errors")
-        exit(1)
-    else:
-        logging.info("Dataset validation successful")
+
+    data_dir = Path(args.data_dir)
+    try:
+        dataset_files(data_dir)
+    except FileNotFoundError as e:
+        parser.error(str(e))
+    report = validate_data_dir(data_dir, workers=args.workers, chunk_lines=args.chunk_lines)
+    report_path = Path(args.report) if args.report else data_dir / 'validation_report.json'
+    with open(report_path, 'w', encoding='utf-8') as fp:
+        json.dump(report, fp, indent=2)
+
+    for split, split_report in report['splits'].items():
+        logging.info(f"{split}: {split_report['failed']} of {split_report['rows']} rows failed "
+                     f"{ {c: n for c, n in split_report['failures'].items() if n} }")
+    if report['failure_rate'] > args.max_failure_rate:
+        logging.error(f"Found {report['failed']} validation errors "
+                      f"({report['failure_rate']:.2%}); see {report_path}")
+        sys.exit(1)
+    logging.info("Dataset validation successful")
+
+
+if __name__ == '__main__':
+    main()
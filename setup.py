@@ -1,9 +1,11 @@
-from setuptools import setup, find_packages
+from setuptools import setup, find_namespace_packages
 
 setup(
     name="bangla-nlp",
     version="0.1.0",
-    packages=find_packages(),
+    # The packages have no __init__.py; main.py is the CLI module
+    packages=find_namespace_packages(include=['scrapers', 'scraping', 'dataset', 'processing', 'scripts']),
+    py_modules=['main'],
     install_requires=[
         line.strip()
         for line in open("requirements.txt", encoding="utf-8").readlines()